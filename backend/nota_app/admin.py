@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Usuarios, Notas, Clientes, Productos, Personal, Proveedores, PedidoMateriasPrimas, DocumentFacturas, NotaProducto
+from .models import Usuarios, Notas, Clientes, Productos, Personal, Proveedores, PedidoMateriasPrimas, DocumentFacturas, NotaProducto, ImportacionExcel, ResumenDespachoDiario, Eliminacion
 from .forms import UsuarioAdminForm
 from import_export.admin import ImportExportModelAdmin
 from import_export import resources
@@ -94,6 +94,9 @@ admin.site.register(Productos, ProductosAdmin)
 admin.site.register(PedidoMateriasPrimas)
 admin.site.register(DocumentFacturas)
 admin.site.register(NotaProducto)
+admin.site.register(ImportacionExcel)
+admin.site.register(ResumenDespachoDiario)
+admin.site.register(Eliminacion)
 
 
 
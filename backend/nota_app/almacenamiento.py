@@ -0,0 +1,214 @@
+"""
+Acceso al bucket S3 compatible (Cloudflare R2) donde se guardan las facturas.
+
+Los clientes de boto3 son seguros entre hilos, así que el proceso comparte uno
+solo con su pool de conexiones en vez de crear uno por llamada. Las URLs
+firmadas se guardan en un cache y se reutilizan hasta poco antes de expirar.
+"""
+import hashlib
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from urllib.parse import urlparse
+
+PREFIJO_FACTURAS = "facturas/"
+SUBIDA_EXPIRA = 15 * 60
+# Tiempo para confirmar una subida: la URL vence, pero un PUT ya iniciado puede tardar
+SUBIDA_PENDIENTE = SUBIDA_EXPIRA + 60 * 60
+
+_cliente_s3 = None
+_lock = threading.Lock()
+
+
+def obtener_cliente_s3():
+    """Retorna el cliente S3 del proceso, creándolo la primera vez."""
+    global _cliente_s3
+    if _cliente_s3 is None:
+        with _lock:
+            if _cliente_s3 is None:
+                _cliente_s3 = boto3.session.Session().client(
+                    "s3",
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                    config=Config(
+                        signature_version=settings.AWS_S3_SIGNATURE_VERSION,
+                        max_pool_connections=getattr(settings, 'AWS_S3_MAX_POOL_CONNECTIONS', 20),
+                    ),
+                )
+    return _cliente_s3
+
+
+@receiver(setting_changed)
+def _reiniciar_cliente_s3(setting, **kwargs):
+    # Permite cambiar la configuración AWS_* en tests con override_settings
+    global _cliente_s3
+    if setting.startswith('AWS_'):
+        with _lock:
+            _cliente_s3 = None
+
+
+def key_desde_url(file_url):
+    """Obtiene la key del objeto desde la URL guardada: {endpoint}/{bucket}/{key}."""
+    return urlparse(file_url).path.split('/', 2)[-1]
+
+
+def url_desde_key(key):
+    """URL base que se guarda en la base de datos para una key del bucket."""
+    return f"{settings.AWS_S3_ENDPOINT_URL}/{settings.AWS_STORAGE_BUCKET_NAME}/{key}"
+
+
+def normalizar_nombre_archivo(nombre):
+    """Reemplaza espacios por _ y elimina caracteres especiales del nombre."""
+    nombre = re.sub(r"\s+", "_", nombre.strip())
+    return re.sub(r"[^a-zA-Z0-9_.-]", "", nombre)
+
+
+def generar_key_factura(nombre):
+    """Key única en el bucket para una factura nueva, elegida por el servidor."""
+    return f"{PREFIJO_FACTURAS}{uuid.uuid4().hex}_{normalizar_nombre_archivo(nombre) or 'archivo.pdf'}"
+
+
+def url_subida_firmada(key, content_type, expira=SUBIDA_EXPIRA):
+    """URL firmada para que el navegador suba el archivo con PUT directo al bucket."""
+    return obtener_cliente_s3().generate_presigned_url(
+        "put_object",
+        Params={
+            "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+            "Key": key,
+            "ContentType": content_type,
+        },
+        ExpiresIn=expira,
+    )
+
+
+def _clave_subida(key):
+    return 'subida_factura:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def registrar_subida(key, id_usuario):
+    """Anota la key emitida por solicitar-subida como pendiente del usuario."""
+    caches['default'].set(_clave_subida(key), id_usuario, SUBIDA_PENDIENTE)
+
+
+def subida_pendiente(key, id_usuario):
+    """True si `key` fue emitida a este usuario y aún no se confirma."""
+    return caches['default'].get(_clave_subida(key)) == id_usuario
+
+
+def cerrar_subida(key):
+    caches['default'].delete(_clave_subida(key))
+
+
+def metadata_objeto(key):
+    """HEAD del objeto; retorna None si no existe."""
+    try:
+        return obtener_cliente_s3().head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+
+
+class CacheUrlsFirmadas:
+    """
+    Cache de URLs firmadas con expiración y tamaño acotado.
+
+    - backend 'memoria': LRU por proceso con a lo más `max_entradas` URLs.
+    - backend 'django': usa el cache de Django indicado en `alias`, compartido
+      entre procesos si ese cache lo es.
+
+    Cada URL se entrega hasta `margen` segundos antes de su expiración real,
+    para que el navegador alcance a usarla.
+    """
+
+    def __init__(self, backend='memoria', max_entradas=5000, margen=60 * 60, alias='default'):
+        self.backend = backend
+        self.max_entradas = max_entradas
+        self.margen = margen
+        self.alias = alias
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _clave_django(self, clave):
+        return 'url_firmada:' + hashlib.sha256(repr(clave).encode()).hexdigest()
+
+    def _leer(self, clave):
+        if self.backend == 'django':
+            return caches[self.alias].get(self._clave_django(clave))
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            url, vence = entrada
+            if vence <= time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return url
+
+    def _guardar(self, clave, url, vigencia):
+        if self.backend == 'django':
+            caches[self.alias].set(self._clave_django(clave), url, timeout=vigencia)
+            return
+
+        with self._lock:
+            self._entradas[clave] = (url, time.monotonic() + vigencia)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def obtener(self, clave, generar, expira):
+        """
+        Retorna la URL de `clave` o la crea con `generar()`, que firma por
+        `expira` segundos. Si `generar` retorna None no se guarda nada.
+        """
+        url = self._leer(clave)
+        with self._lock:
+            if url is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if url is not None:
+            return url
+
+        url = generar()
+        vigencia = expira - self.margen
+        if url is not None and vigencia > 0:
+            self._guardar(clave, url, vigencia)
+        return url
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'hits': self.hits,
+                'misses': self.misses,
+                'entradas': len(self._entradas) if self.backend == 'memoria' else None,
+            }
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+urls_firmadas = CacheUrlsFirmadas(
+    backend=getattr(settings, 'URLS_FIRMADAS_CACHE', 'memoria'),
+    max_entradas=getattr(settings, 'URLS_FIRMADAS_MAX_ENTRADAS', 5000),
+)
+
@@ -6,6 +6,7 @@ class NotaAppConfig(AppConfig):
     name = 'nota_app'
 
     def ready(self):
+        from . import signals  # noqa: F401
         import os
         from django.conf import settings
-        os.makedirs(os.path.join(settings.MEDIA_ROOT, "facturas"), exist_ok=True)
\ No newline at end of file
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, "facturas"), exist_ok=True)
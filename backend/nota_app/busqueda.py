@@ -0,0 +1,159 @@
+"""
+Búsqueda por prefijo para los autocompletados.
+
+Cada nombre se normaliza (minúsculas, sin tildes ni signos) y se parte en
+palabras que se guardan en la tabla indice_busqueda. Una búsqueda exige que
+cada término escrito sea prefijo de alguna palabra del nombre, lo que en MySQL
+es un rango sobre el índice (entidad, token) en vez de recorrer la tabla con
+LIKE '%texto%'. Las señales mantienen el índice y
+`manage.py reconstruir_indice_busqueda` lo recalcula completo.
+"""
+import operator
+import re
+import unicodedata
+from functools import reduce
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Min, Q, Value, When
+from .models import Clientes, Productos, Proveedores, DocumentFacturas, IndiceBusqueda
+
+# entidad: (modelo, campo indexado)
+ENTIDADES = {
+    'cliente': (Clientes, 'razon_social'),
+    'producto': (Productos, 'nombre'),
+    'proveedor': (Proveedores, 'razon_social'),
+    'factura': (DocumentFacturas, 'title'),
+}
+
+LARGO_TOKEN = 50
+MAX_TERMINOS = 5
+TAMANO_LOTE = 2000
+
+
+def normalizar(texto):
+    """Minúsculas sin tildes y con los signos reemplazados por espacios."""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', ' ', texto.lower()).strip()
+
+
+def tokenizar(texto):
+    return [token[:LARGO_TOKEN] for token in normalizar(texto).split()]
+
+
+def coincide(palabras, terminos):
+    """True si cada término es prefijo de alguna de las palabras."""
+    return all(any(palabra.startswith(termino) for palabra in palabras) for termino in terminos)
+
+
+def relevancia(palabras, terminos):
+    """
+    Clave de orden (menor es mejor) de un nombre ya tokenizado, la misma que
+    aplica buscar_ids en SQL.
+    """
+    exactos = sum(termino in palabras for termino in terminos)
+    al_inicio = bool(palabras) and palabras[0].startswith(terminos[0])
+    return (-exactos, not al_inicio, len(palabras))
+
+
+def entidad_de(modelo):
+    for entidad, (modelo_entidad, _) in ENTIDADES.items():
+        if modelo_entidad is modelo:
+            return entidad
+    return None
+
+
+def _filas(entidad, id_objeto, texto):
+    tokens = tokenizar(texto)
+    return [
+        IndiceBusqueda(entidad=entidad, id_objeto=id_objeto, token=token, posicion=i, largo=len(tokens))
+        for i, token in enumerate(tokens)
+    ]
+
+
+def indexar(entidad, id_objeto, texto):
+    """Reemplaza las palabras indexadas de un objeto."""
+    with transaction.atomic():
+        IndiceBusqueda.objects.filter(entidad=entidad, id_objeto=id_objeto).delete()
+        IndiceBusqueda.objects.bulk_create(_filas(entidad, id_objeto, texto))
+
+
+def desindexar(entidad, id_objeto):
+    IndiceBusqueda.objects.filter(entidad=entidad, id_objeto=id_objeto).delete()
+
+
+def reconstruir(entidades=None):
+    """Recalcula el índice de las entidades indicadas (todas por defecto)."""
+    total = 0
+    for entidad in entidades or ENTIDADES:
+        modelo, campo = ENTIDADES[entidad]
+        with transaction.atomic():
+            IndiceBusqueda.objects.filter(entidad=entidad).delete()
+            lote = []
+            for id_objeto, texto in modelo.objects.values_list('pk', campo).iterator(chunk_size=TAMANO_LOTE):
+                lote += _filas(entidad, id_objeto, texto)
+                if len(lote) >= TAMANO_LOTE:
+                    IndiceBusqueda.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            IndiceBusqueda.objects.bulk_create(lote)
+            total += len(lote)
+    return total
+
+
+def buscar_ids(entidad, texto, limite=10):
+    """
+    Ids de los objetos cuyo nombre tiene una palabra que empieza con cada
+    término de `texto`, ordenados por relevancia:
+    1. más términos que coinciden con una palabra completa,
+    2. el primer término coincide con la primera palabra,
+    3. nombres más cortos.
+    """
+    terminos = list(dict.fromkeys(tokenizar(texto)))[:MAX_TERMINOS]
+    if not terminos:
+        return []
+
+    # istartswith usa LIKE 'x%' (con índice) en MySQL; startswith usaría LIKE BINARY.
+    # Los candidatos deben tener cada término: se encadenan como subconsultas
+    # para que el agrupamiento solo recorra sus palabras.
+    candidatos = None
+    coincide = Q()
+    for termino in terminos:
+        ids = IndiceBusqueda.objects.filter(entidad=entidad, token__istartswith=termino)
+        if candidatos is not None:
+            ids = ids.filter(id_objeto__in=candidatos)
+        candidatos = ids.values('id_objeto')
+        coincide |= Q(token__istartswith=termino)
+
+    anotaciones = {
+        f'exacto_{i}': Max(Case(When(token=termino, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for i, termino in enumerate(terminos)
+    }
+    anotaciones['al_inicio'] = Max(Case(
+        When(posicion=0, token__istartswith=terminos[0], then=Value(1)), default=Value(0), output_field=IntegerField()
+    ))
+    anotaciones['palabras'] = Min('largo')
+    exactos = reduce(operator.add, (F(f'exacto_{i}') for i in range(len(terminos))))
+
+    resultados = (
+        IndiceBusqueda.objects.filter(coincide, entidad=entidad, id_objeto__in=candidatos)
+        .values('id_objeto')
+        .annotate(**anotaciones)
+        .annotate(exactos=exactos)
+        .order_by('-exactos', '-al_inicio', 'palabras', 'id_objeto')
+    )
+    return [fila['id_objeto'] for fila in resultados[:limite]]
+
+
+def buscar(entidad, texto, queryset=None, limite=10):
+    """
+    Objetos de `entidad` que coinciden con `texto`, en orden de relevancia.
+    `queryset` permite agregar select_related u only a la lectura final.
+    """
+    modelo, _ = ENTIDADES[entidad]
+    queryset = modelo.objects.all() if queryset is None else queryset
+    if not tokenizar(texto):
+        return list(queryset[:limite])
+
+    ids = buscar_ids(entidad, texto, limite)
+    objetos = queryset.in_bulk(ids)
+    return [objetos[pk] for pk in ids if pk in objetos]
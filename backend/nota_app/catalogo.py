@@ -0,0 +1,216 @@
+"""
+Catálogo de productos en memoria del proceso.
+
+Los productos cambian pocas veces al día, así que cada proceso guarda:
+- codigo -> id_producto
+- id_producto -> registro compacto (los campos que devuelve por-codigo)
+- una lista ordenada de (palabra normalizada, id_producto) para buscar por
+  prefijo con bisect, que cumple el papel de un trie con menos memoria.
+
+Se carga completo la primera vez que se usa. Después, cada
+CATALOGO_PRODUCTOS_REFRESCO segundos (o apenas una señal avisa de un cambio en
+este proceso) se traen solo los productos con fecha_modificacion reciente y
+los borrados registrados en eliminaciones, así se ven también los cambios de
+otros procesos. Si aun así el total no cuadra con la base de datos (borrados
+sin señal) se recarga.
+
+Las estructuras no se modifican nunca: cada cambio arma un índice nuevo y
+reemplaza la referencia, así las lecturas no necesitan el lock.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .busqueda import relevancia, tokenizar
+from .models import Eliminacion, Productos
+
+CAMPOS = [
+    'id_producto', 'nombre', 'codigo', 'descripcion', 'precio_venta',
+    'stock', 'categoria', 'unidad_medida', 'precio_compra',
+]
+
+# Un producto guardado justo antes de un refresco puede confirmarse después;
+# se vuelven a leer los modificados y borrados en este margen
+MARGEN_REFRESCO = timedelta(seconds=60)
+
+
+class _Indice:
+    """Foto inmutable del catálogo."""
+
+    __slots__ = ('por_id', 'por_codigo', 'palabras_por_id', 'palabras')
+
+    def __init__(self, por_id, palabras_por_id):
+        self.por_id = por_id
+        self.por_codigo = {registro['codigo']: id_producto for id_producto, registro in por_id.items()}
+        self.palabras_por_id = palabras_por_id
+        self.palabras = sorted(
+            (palabra, id_producto) for id_producto, palabras in palabras_por_id.items() for palabra in palabras
+        )
+
+    def con_cambios(self, cambiados, eliminados):
+        """Índice nuevo con `cambiados` (registros) agregados y `eliminados` (ids) quitados."""
+        por_id, palabras_por_id = dict(self.por_id), dict(self.palabras_por_id)
+        for id_producto in eliminados:
+            por_id.pop(id_producto, None)
+            palabras_por_id.pop(id_producto, None)
+        for registro in cambiados:
+            por_id[registro['id_producto']] = registro
+            palabras_por_id[registro['id_producto']] = tokenizar(registro['nombre'])
+        return _Indice(por_id, palabras_por_id)
+
+
+_VACIO = _Indice({}, {})
+
+
+class CatalogoProductos:
+
+    def __init__(self, refresco=30):
+        self.refresco = refresco
+        self._lock = threading.Lock()
+        self._revisado = 0.0
+        self._marca = None
+        self._indice = None
+
+    # --- mantenimiento ---
+
+    def _cargar(self):
+        marca = timezone.now()
+        por_id, palabras_por_id = {}, {}
+        for registro in Productos.objects.values(*CAMPOS).iterator(chunk_size=5000):
+            por_id[registro['id_producto']] = registro
+            palabras_por_id[registro['id_producto']] = tokenizar(registro['nombre'])
+        self._indice = _Indice(por_id, palabras_por_id)
+        self._marca = marca
+
+    def _refrescar(self):
+        indice = self._indice
+        desde = self._marca - MARGEN_REFRESCO
+        marca = timezone.now()
+        cambiados = list(Productos.objects.filter(fecha_modificacion__gte=desde).values(*CAMPOS))
+        eliminados = set(
+            Eliminacion.objects.filter(entidad=Productos._meta.model_name, fecha__gte=desde)
+            .values_list('id_objeto', flat=True)
+        )
+        if cambiados or eliminados:
+            indice = indice.con_cambios(cambiados, eliminados)
+
+        if Productos.objects.count() != len(indice.por_id):
+            self._cargar()
+        else:
+            self._indice, self._marca = indice, marca
+
+    def _asegurar(self):
+        """Índice vigente, cargándolo o refrescándolo si corresponde."""
+        indice = self._indice
+        if indice is not None and time.monotonic() - self._revisado < self.refresco:
+            return indice
+        with self._lock:
+            if self._indice is None:
+                self._cargar()
+            elif time.monotonic() - self._revisado >= self.refresco:
+                self._refrescar()
+            self._revisado = time.monotonic()
+            return self._indice
+
+    def marcar_cambio(self):
+        """Fuerza un refresco en el próximo acceso (lo llaman las señales)."""
+        self._revisado = 0.0
+
+    def quitar(self, id_producto):
+        with self._lock:
+            indice = self._indice
+            if indice is not None and id_producto in indice.por_id:
+                self._indice = indice.con_cambios([], [id_producto])
+
+    def limpiar(self):
+        with self._lock:
+            self._indice, self._marca = None, None
+            self._revisado = 0.0
+
+    @property
+    def por_id(self):
+        return (self._indice or _VACIO).por_id
+
+    @property
+    def por_codigo(self):
+        return (self._indice or _VACIO).por_codigo
+
+    # --- consultas ---
+
+    def obtener_por_codigo(self, codigo):
+        """Registro compacto del producto con ese código, o None."""
+        indice = self._asegurar()
+        id_producto = indice.por_codigo.get(codigo)
+        return indice.por_id.get(id_producto) if id_producto is not None else None
+
+    def obtener_por_ids(self, ids):
+        """Registros compactos de los ids indicados que están en memoria, en ese orden."""
+        indice = self._asegurar()
+        return [indice.por_id[id_producto] for id_producto in ids if id_producto in indice.por_id]
+
+    def ids_por_codigo(self, codigos):
+        """
+        {codigo: id_producto} de los códigos indicados. Los que no están en
+        memoria se buscan en la base de datos con una sola consulta IN.
+        """
+        indice = self._asegurar()
+        encontrados = {codigo: indice.por_codigo[codigo] for codigo in codigos if codigo in indice.por_codigo}
+        faltantes = [codigo for codigo in codigos if codigo not in encontrados]
+        if faltantes:
+            encontrados.update(
+                Productos.objects.filter(codigo__in=faltantes).values_list('codigo', 'id_producto')
+            )
+        return encontrados
+
+    def obtener_por_codigos(self, codigos):
+        """
+        {codigo: registro compacto} de los códigos indicados. Los que no están
+        en memoria se buscan en la base de datos con una sola consulta IN.
+        """
+        indice = self._asegurar()
+        encontrados = {
+            codigo: indice.por_id[indice.por_codigo[codigo]] for codigo in codigos if codigo in indice.por_codigo
+        }
+        faltantes = [codigo for codigo in codigos if codigo not in encontrados]
+        if faltantes:
+            for registro in Productos.objects.filter(codigo__in=faltantes).values(*CAMPOS):
+                encontrados[registro['codigo']] = registro
+        return encontrados
+
+    @staticmethod
+    def _ids_con_prefijo(palabras, prefijo):
+        i = bisect_left(palabras, (prefijo,))
+        ids = set()
+        while i < len(palabras) and palabras[i][0].startswith(prefijo):
+            ids.add(palabras[i][1])
+            i += 1
+        return ids
+
+    def buscar(self, texto, limite=10):
+        """
+        Ids de productos cuyo nombre tiene una palabra que empieza con cada
+        término, con el mismo orden de relevancia que busqueda.buscar_ids.
+        """
+        terminos = list(dict.fromkeys(tokenizar(texto)))
+        if not terminos:
+            return []
+        indice = self._asegurar()
+
+        candidatos = None
+        for termino in sorted(terminos, key=len, reverse=True):
+            ids = self._ids_con_prefijo(indice.palabras, termino)
+            candidatos = ids if candidatos is None else candidatos & ids
+            if not candidatos:
+                return []
+
+        return heapq.nsmallest(
+            limite,
+            candidatos,
+            key=lambda id_producto: (*relevancia(indice.palabras_por_id[id_producto], terminos), id_producto),
+        )
+
+
+catalogo_productos = CatalogoProductos(refresco=getattr(settings, 'CATALOGO_PRODUCTOS_REFRESCO', 30))
@@ -0,0 +1,154 @@
+"""
+Exportación de listados a CSV o XLSX sin cargar la tabla completa.
+
+Las filas se leen por bloques de TAMANO_BLOQUE con paginación por llave
+(keyset): cada bloque es una consulta que sigue después de la última fila del
+anterior según el orden del listado, que termina en la llave primaria. No se
+usa .iterator() porque con MySQL el driver igual baja el resultado completo
+antes de entregar la primera fila. Así la memoria no depende de la cantidad de
+filas:
+- CSV se envía a medida que se genera cada bloque de filas.
+- XLSX se arma con openpyxl en modo write_only (cada fila se escribe al
+  archivo temporal y se libera) y se envía por partes al terminar, porque el
+  formato es un zip que recién queda válido al cerrarse.
+"""
+import csv
+import tempfile
+from datetime import datetime
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+
+TAMANO_BLOQUE = 2000
+TAMANO_PARTE = 64 * 1024
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _valor(valor):
+    # Excel no acepta fechas con zona horaria; se exportan en hora local
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.make_naive(valor)
+    return valor
+
+
+def _admite_nulos(modelo, campo):
+    if campo == 'pk':
+        return False
+    try:
+        return modelo._meta.get_field(campo).null
+    except FieldDoesNotExist:
+        # Campo de una relación: se trata como si pudiera ser nulo
+        return True
+
+
+def _orden(queryset):
+    """
+    [(campo, descendente, admite_nulos)] del orden del queryset, terminado en
+    la llave primaria para que cada fila tenga una posición única.
+    """
+    orden = []
+    for campo in queryset.query.order_by:
+        descendente = campo.startswith('-')
+        nombre = campo.lstrip('-')
+        orden.append((nombre, descendente, _admite_nulos(queryset.model, nombre)))
+    if not orden or orden[-1][0] not in ('pk', queryset.model._meta.pk.name):
+        orden.append(('pk', orden[-1][1] if orden else False, False))
+    return orden
+
+
+def _ordenar(queryset, orden):
+    # Los nulos van primero en orden ascendente y al final en descendente,
+    # igual en todos los motores, para que _despues_de sepa dónde están
+    return queryset.order_by(*(
+        (F(campo).desc(nulls_last=True) if descendente else F(campo).asc(nulls_first=True)) if nulos
+        else f"{'-' if descendente else ''}{campo}"
+        for campo, descendente, nulos in orden
+    ))
+
+
+def _despues_de(orden, valores):
+    """Condición de las filas que siguen a la fila con `valores` en `orden`."""
+    condicion = Q(pk__in=[])
+    iguales = Q()
+    for (campo, descendente, nulos), valor in zip(orden, valores):
+        if valor is None:
+            siguiente = Q(pk__in=[]) if descendente else Q(**{f'{campo}__isnull': False})
+            igual = Q(**{f'{campo}__isnull': True})
+        else:
+            siguiente = Q(**{f"{campo}__{'lt' if descendente else 'gt'}": valor})
+            if descendente and nulos:
+                siguiente |= Q(**{f'{campo}__isnull': True})
+            igual = Q(**{campo: valor})
+        condicion |= iguales & siguiente
+        iguales &= igual
+    return condicion
+
+
+def filas(queryset, columnas):
+    """
+    Genera las filas del queryset con los campos de `columnas` [(encabezado, campo)],
+    una consulta de hasta TAMANO_BLOQUE filas a la vez.
+    """
+    campos = [campo for _, campo in columnas]
+    orden = _orden(queryset)
+    # Las columnas del orden van al final de cada fila para continuar desde la última
+    consulta = _ordenar(queryset, orden).values_list(*campos, *(campo for campo, _, _ in orden))
+    ultima = None
+    while True:
+        bloque = consulta if ultima is None else consulta.filter(_despues_de(orden, ultima))
+        bloque = list(bloque[:TAMANO_BLOQUE])
+        for fila in bloque:
+            yield [_valor(valor) for valor in fila[:len(campos)]]
+        if len(bloque) < TAMANO_BLOQUE:
+            return
+        ultima = bloque[-1][len(campos):]
+
+
+class _Eco:
+    """Archivo mínimo para csv.writer: devuelve lo escrito en vez de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def generar_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel abra el archivo como UTF-8
+    yield '\ufeff' + escritor.writerow(encabezados)
+    bloque = []
+    for fila in filas:
+        bloque.append(escritor.writerow(fila))
+        if len(bloque) == TAMANO_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def generar_xlsx(encabezados, filas):
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Datos')
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append(fila)
+
+    with tempfile.TemporaryFile() as archivo:
+        libro.save(archivo)
+        archivo.seek(0)
+        while parte := archivo.read(TAMANO_PARTE):
+            yield parte
+
+
+def respuesta_exportacion(queryset, columnas, nombre, formato):
+    """StreamingHttpResponse con el queryset en `formato` ('csv' o 'xlsx')."""
+    encabezados = [encabezado for encabezado, _ in columnas]
+    generador = generar_csv if formato == 'csv' else generar_xlsx
+    respuesta = StreamingHttpResponse(generador(encabezados, filas(queryset, columnas)), content_type=FORMATOS[formato])
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return respuesta
@@ -0,0 +1,147 @@
+"""
+Filtros, orden y campos parciales de los listados.
+
+Cada vista declara sus filtros en `filtros` como {parametro: (lookup, tipo)}:
+- 'texto' y 'entero': igualdad; varios valores separados por coma usan IN.
+- 'desde' y 'hasta': fecha YYYY-MM-DD, desde el inicio o hasta el final del
+  día en la zona horaria del proyecto.
+
+`?ordering=` elige uno de los órdenes de `ordenamientos`
+({nombre: columnas}); sin él se usa `cursor_ordering`. Cada orden debe
+terminar en la llave primaria para que el cursor sea estable.
+
+`?fields=a,b` reduce la respuesta a esos campos del serializer y el SELECT a
+las columnas que necesitan (ver `plan_campos`).
+"""
+from datetime import datetime, time
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+PARAMETRO_ORDEN = 'ordering'
+PARAMETRO_CAMPOS = 'fields'
+
+
+def _valores(parametro, valor, tipo):
+    if tipo in ('desde', 'hasta'):
+        dia = parse_date(valor) if len(valor) == 10 else None
+        if dia is None:
+            raise serializers.ValidationError({parametro: ['Debe ser una fecha YYYY-MM-DD.']})
+        return timezone.make_aware(datetime.combine(dia, time.min if tipo == 'desde' else time.max))
+
+    valores = [parte.strip() for parte in valor.split(',') if parte.strip()]
+    if tipo == 'entero':
+        try:
+            valores = [int(parte) for parte in valores]
+        except ValueError:
+            raise serializers.ValidationError({parametro: ['Debe ser un número entero.']})
+    return valores
+
+
+def filtrar(queryset, request, filtros):
+    """Aplica los filtros declarados que vengan en la query."""
+    for parametro, (lookup, tipo) in filtros.items():
+        valor = request.query_params.get(parametro, '').strip()
+        if not valor:
+            continue
+        valores = _valores(parametro, valor, tipo)
+        if tipo in ('desde', 'hasta'):
+            queryset = queryset.filter(**{lookup: valores})
+        elif len(valores) == 1:
+            queryset = queryset.filter(**{lookup: valores[0]})
+        elif valores:
+            queryset = queryset.filter(**{f'{lookup}__in': valores})
+    return queryset
+
+
+def ordenamiento(request, view):
+    """Columnas del orden pedido con ?ordering=, o `cursor_ordering` de la vista."""
+    ordenamientos = getattr(view, 'ordenamientos', {})
+    pedido = request.query_params.get(PARAMETRO_ORDEN)
+    if pedido:
+        if pedido not in ordenamientos:
+            raise serializers.ValidationError(
+                {PARAMETRO_ORDEN: [f"Debe ser uno de: {', '.join(ordenamientos) or 'ninguno'}"]}
+            )
+        return tuple(ordenamientos[pedido])
+    return tuple(getattr(view, 'cursor_ordering', ()))
+
+
+class FiltrosDeclarativos(BaseFilterBackend):
+    """Filtra por `view.filtros` y ordena según `ordenamiento`."""
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = filtrar(queryset, request, getattr(view, 'filtros', {}))
+        orden = ordenamiento(request, view)
+        return queryset.order_by(*orden) if orden else queryset
+
+
+def campos_pedidos(request):
+    """Nombres de ?fields= sin repetidos, o None si no se pidió."""
+    valor = request.query_params.get(PARAMETRO_CAMPOS, '') if request is not None else ''
+    campos = list(dict.fromkeys(campo.strip() for campo in valor.split(',') if campo.strip()))
+    return campos or None
+
+
+def recortar_campos(serializer, campos):
+    """Deja en el serializer (o en el hijo de uno con many=True) solo `campos`."""
+    destino = getattr(serializer, 'child', serializer)
+    desconocidos = [campo for campo in campos if campo not in destino.fields]
+    if desconocidos:
+        raise serializers.ValidationError({PARAMETRO_CAMPOS: [f"Campos desconocidos: {', '.join(desconocidos)}"]})
+    for nombre in list(destino.fields):
+        if nombre not in campos:
+            destino.fields.pop(nombre)
+
+
+def _columnas(modelo, ruta):
+    """Todas las columnas de cada modelo a lo largo de `ruta` ('a__b'), para only()."""
+    columnas, prefijo = [], []
+    for parte in ruta.split('__'):
+        modelo = modelo._meta.get_field(parte).related_model
+        prefijo.append(parte)
+        columnas += ['__'.join([*prefijo, campo.name]) for campo in modelo._meta.concrete_fields]
+    return columnas
+
+
+def plan_campos(serializer, campos, select_related, orden):
+    """
+    Retorna (select_related, only) para leer solo las columnas de `campos`.
+
+    - un campo simple lee su columna;
+    - 'relacion.campo' lee esa columna de la relación con un JOIN;
+    - un serializer anidado lee la relación completa y sus select_related.
+    Si algún campo no sale de una columna (source='*', métodos) retorna None
+    y se usa el plan completo.
+    """
+    modelo = serializer.Meta.model
+    only = {modelo._meta.pk.name, *(columna.lstrip('-') for columna in orden)}
+    relaciones, anidadas = set(), set()
+    for nombre in campos:
+        campo = serializer.fields[nombre]
+        if campo.source == '*':
+            return None
+        partes = campo.source.split('.')
+        try:
+            modelo._meta.get_field(partes[0])
+        except FieldDoesNotExist:
+            return None
+        if isinstance(campo, serializers.BaseSerializer):
+            anidadas.add(partes[0])
+            continue
+        if len(partes) > 1:
+            relaciones.add('__'.join(partes[:-1]))
+        only.add('__'.join(partes))
+
+    relacionados = [
+        ruta for ruta in select_related
+        if ruta in relaciones or any(ruta == relacion or ruta.startswith(f'{relacion}__') for relacion in anidadas)
+    ]
+    relacionados += [relacion for relacion in relaciones | anidadas if relacion not in relacionados]
+    # only() restringe también los modelos unidos: las relaciones anidadas se leen completas
+    for ruta in relacionados:
+        if ruta.split('__')[0] in anidadas:
+            only.update(_columnas(modelo, ruta))
+    return relacionados, sorted(only)
@@ -0,0 +1,237 @@
+"""
+Carga masiva de NotaProducto desde la planilla del ERP.
+
+La planilla trae las columnas [numnota, cod_articu, pend] y se lee en bloques
+de tamaño fijo (openpyxl en modo solo lectura para xlsx, lector por bloques
+para csv), así la memoria no depende del tamaño del archivo. El formato .xls
+antiguo no se puede leer por partes: se carga completo y se entrega en
+bloques igual que los demás. cod_articu se lee como texto para conservar los
+ceros a la izquierda. Cada bloque se
+limpia de forma vectorizada con pandas, las notas y productos se resuelven con
+una consulta IN cada uno y la escritura es un upsert con bulk_create. De las
+filas omitidas se guarda el total, la cuenta por motivo y el detalle solo de
+las primeras MAX_OMITIDAS_DETALLE.
+"""
+from collections import Counter
+from contextlib import nullcontext
+from operator import itemgetter
+import pandas as pd
+from openpyxl import load_workbook
+from django.db import connection, transaction
+from .catalogo import catalogo_productos
+from .models import Notas, NotaProducto
+
+COLUMNAS_EXCEL = ['numnota', 'cod_articu', 'pend']
+# Sin esto pandas lee '0012' como el número 12
+TIPOS_COLUMNAS = {'cod_articu': str}
+TAMANO_LOTE = 1000
+MAX_OMITIDAS_DETALLE = 500
+
+# La primera fila de la planilla es el encabezado
+FILA_INICIAL_EXCEL = 2
+
+
+def _leer_csv(archivo, tamano):
+    yield from pd.read_csv(
+        archivo, usecols=COLUMNAS_EXCEL, dtype=TIPOS_COLUMNAS, chunksize=tamano, encoding_errors='replace'
+    )
+
+
+def _leer_xls(archivo, tamano):
+    df = pd.read_excel(archivo, usecols=COLUMNAS_EXCEL, dtype=TIPOS_COLUMNAS)
+    for inicio in range(0, len(df), tamano):
+        yield df.iloc[inicio:inicio + tamano]
+
+
+def _leer_xlsx(archivo, tamano):
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = [str(c).strip() if c is not None else '' for c in next(filas, ())]
+        faltantes = [c for c in COLUMNAS_EXCEL if c not in encabezado]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en la planilla: {', '.join(faltantes)}")
+        posiciones = [encabezado.index(c) for c in COLUMNAS_EXCEL]
+
+        bloque, indices = [], []
+        for i, fila in enumerate(filas):
+            valores = [fila[p] if p < len(fila) else None for p in posiciones]
+            if all(v is None for v in valores):
+                continue
+            bloque.append(valores)
+            indices.append(i)
+            if len(bloque) == tamano:
+                yield pd.DataFrame(bloque, columns=COLUMNAS_EXCEL, index=indices)
+                bloque, indices = [], []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=COLUMNAS_EXCEL, index=indices)
+    finally:
+        libro.close()
+
+
+def leer_planilla_por_bloques(archivo, tamano=TAMANO_LOTE):
+    """
+    Genera DataFrames de hasta `tamano` filas con las columnas COLUMNAS_EXCEL.
+    El índice de cada bloque es la posición de la fila de datos en el archivo.
+    """
+    nombre = getattr(archivo, 'name', '').lower()
+    if nombre.endswith('.csv'):
+        yield from _leer_csv(archivo, tamano)
+    elif nombre.endswith('.xls'):
+        yield from _leer_xls(archivo, tamano)
+    else:
+        yield from _leer_xlsx(archivo, tamano)
+
+
+def _normalizar_codigo(valor):
+    # Los códigos numéricos llegan como float cuando la columna tiene vacíos
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def limpiar_filas(df, fila_inicial=FILA_INICIAL_EXCEL):
+    """
+    Normaliza las columnas de la planilla.
+
+    Retorna un DataFrame con [fila, num_nota, codigo, cantidad] y la lista de
+    filas omitidas con el motivo y su tipo (el motivo sin datos de la fila).
+    """
+    filas = pd.Series(df.index, index=df.index) + fila_inicial
+    num_nota = pd.to_numeric(df['numnota'], errors='coerce')
+    cantidad = pd.to_numeric(df['pend'], errors='coerce')
+    codigo = df['cod_articu'].where(df['cod_articu'].isna(), df['cod_articu'].map(_normalizar_codigo))
+
+    motivos = pd.Series(None, index=df.index, dtype=object)
+    # Cantidades con decimales o negativas no se truncan: se informan
+    motivos = motivos.mask(cantidad.isna() | (cantidad % 1 != 0) | (cantidad < 0), 'Cantidad inválida')
+    motivos = motivos.mask(codigo.isna() | (codigo == ''), 'Código de artículo vacío')
+    motivos = motivos.mask(num_nota.isna() | (num_nota % 1 != 0), 'Número de nota inválido')
+
+    validas = motivos.isna()
+    limpio = pd.DataFrame({
+        'fila': filas[validas],
+        'num_nota': num_nota[validas].astype('int64'),
+        'codigo': codigo[validas],
+        'cantidad': cantidad[validas].astype('int64'),
+    })
+
+    omitidas = [
+        {'fila': int(fila), 'motivo': motivo, 'tipo': motivo}
+        for fila, motivo in zip(filas[~validas], motivos[~validas])
+    ]
+
+    # Si una misma nota/producto se repite gana la última fila, igual que antes
+    duplicadas = limpio.duplicated(['num_nota', 'codigo'], keep='last')
+    omitidas += [
+        {'fila': int(fila), 'motivo': 'Fila duplicada, se usa la última ocurrencia', 'tipo': 'Fila duplicada'}
+        for fila in limpio.loc[duplicadas, 'fila']
+    ]
+    return limpio[~duplicadas], omitidas
+
+
+def _importar_bloque(df, usuario):
+    limpio, omitidas = limpiar_filas(df)
+
+    notas = dict(
+        Notas.objects.filter(num_nota__in=limpio['num_nota'].unique().tolist())
+        .values_list('num_nota', 'id_nota')
+    )
+    productos = catalogo_productos.ids_por_codigo(limpio['codigo'].unique().tolist())
+
+    limpio = limpio.assign(
+        nota_id=limpio['num_nota'].map(notas),
+        producto_id=limpio['codigo'].map(productos),
+    )
+    sin_nota = limpio['nota_id'].isna()
+    sin_producto = limpio['producto_id'].isna() & ~sin_nota
+    omitidas += [
+        {'fila': int(fila), 'motivo': f'La nota {num_nota} no existe', 'tipo': 'Nota inexistente'}
+        for fila, num_nota in zip(limpio.loc[sin_nota, 'fila'], limpio.loc[sin_nota, 'num_nota'])
+    ]
+    omitidas += [
+        {'fila': int(fila), 'motivo': f'El producto {codigo} no existe', 'tipo': 'Producto inexistente'}
+        for fila, codigo in zip(limpio.loc[sin_producto, 'fila'], limpio.loc[sin_producto, 'codigo'])
+    ]
+    limpio = limpio[~(sin_nota | sin_producto)]
+
+    objetos = [
+        NotaProducto(
+            nota_id=int(nota_id),
+            producto_id=int(producto_id),
+            cantidad=int(cantidad),
+            usuario_creacion=usuario,
+            usuario_modificacion=usuario,
+        )
+        for nota_id, producto_id, cantidad in zip(limpio['nota_id'], limpio['producto_id'], limpio['cantidad'])
+    ]
+
+    # En un conflicto (nota, producto) solo se actualizan la cantidad y la auditoría;
+    # el usuario creador original se conserva
+    upsert = {
+        'update_conflicts': True,
+        'update_fields': ['cantidad', 'usuario_modificacion', 'fecha_modificacion'],
+    }
+    # MySQL resuelve el conflicto con ON DUPLICATE KEY y no acepta indicar las columnas
+    if connection.features.supports_update_conflicts_with_target:
+        upsert['unique_fields'] = ['nota', 'producto']
+
+    NotaProducto.objects.bulk_create(objetos, batch_size=TAMANO_LOTE, **upsert)
+    return len(objetos), omitidas
+
+
+class Omitidas:
+    """
+    Filas omitidas de una carga: el total, la cuenta por tipo de motivo y el
+    detalle (fila y motivo) de las primeras `max_detalle`, para que ni la
+    memoria ni el reporte crezcan con el archivo.
+    """
+
+    def __init__(self, max_detalle=MAX_OMITIDAS_DETALLE):
+        self.max_detalle = max_detalle
+        self.total = 0
+        self.por_motivo = Counter()
+        self.detalle = []
+
+    def agregar(self, omitidas):
+        # Los bloques llegan en orden de fila, así que basta ordenar cada uno
+        for omitida in sorted(omitidas, key=itemgetter('fila')):
+            self.total += 1
+            self.por_motivo[omitida['tipo']] += 1
+            if len(self.detalle) < self.max_detalle:
+                self.detalle.append({'fila': omitida['fila'], 'motivo': omitida['motivo']})
+
+
+def importar_nota_productos(bloques, usuario, progreso=None):
+    """
+    Crea o actualiza los NotaProducto a partir de los bloques de la planilla.
+
+    Sin `progreso` toda la carga ocurre en una sola transacción. Con `progreso`
+    cada bloque se confirma por separado y luego se llama
+    progreso(total_filas, procesadas, total_omitidas) con los acumulados, para que
+    otras conexiones puedan ver el avance. Repetir una carga es seguro porque
+    la escritura es un upsert.
+
+    Retorna un reporte con el total de filas, las procesadas, el total de
+    omitidas, su cuenta por motivo y el detalle (fila de la planilla y motivo)
+    de las primeras MAX_OMITIDAS_DETALLE.
+    """
+    total_filas, procesadas, omitidas = 0, 0, Omitidas(MAX_OMITIDAS_DETALLE)
+
+    with transaction.atomic() if progreso is None else nullcontext():
+        for df in bloques:
+            with transaction.atomic():
+                procesadas_bloque, omitidas_bloque = _importar_bloque(df, usuario)
+            total_filas += len(df)
+            procesadas += procesadas_bloque
+            omitidas.agregar(omitidas_bloque)
+            if progreso is not None:
+                progreso(total_filas, procesadas, omitidas.total)
+
+    return {
+        'total_filas': total_filas,
+        'procesadas': procesadas,
+        'total_omitidas': omitidas.total,
+        'omitidas_por_motivo': dict(omitidas.por_motivo),
+        'omitidas': omitidas.detalle,
+    }
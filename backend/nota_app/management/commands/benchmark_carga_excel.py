@@ -0,0 +1,79 @@
+import time
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from nota_app.importacion import importar_nota_productos
+from nota_app.models import Usuarios, Clientes, Notas, Productos, NotaProducto
+
+
+class Rollback(Exception):
+    pass
+
+
+def importar_por_fila(df, usuario):
+    """Implementación anterior de upload_excel: consultas y update_or_create por fila."""
+    procesadas = 0
+    for _, row in df.iterrows():
+        try:
+            nota = Notas.objects.get(num_nota=int(row['numnota']))
+            producto = Productos.objects.get(codigo=str(row['cod_articu']).strip())
+            obj, created = NotaProducto.objects.update_or_create(
+                nota=nota,
+                producto=producto,
+                defaults={'cantidad': int(row['pend']), 'usuario_creacion': usuario, 'usuario_modificacion': usuario},
+            )
+            if created:
+                obj.usuario_creacion = usuario
+                obj.save()
+            procesadas += 1
+        except (Notas.DoesNotExist, Productos.DoesNotExist):
+            continue
+    return procesadas
+
+
+class Command(BaseCommand):
+    help = 'Compara el rendimiento de la carga de Excel por fila contra la carga masiva (no deja datos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=5000)
+        parser.add_argument('--notas', type=int, default=500)
+        parser.add_argument('--productos', type=int, default=200)
+
+    def handle(self, *args, **options):
+        filas, n_notas, n_productos = options['filas'], options['notas'], options['productos']
+
+        try:
+            with transaction.atomic():
+                usuario = Usuarios.objects.create(username='benchmark_carga_excel', rut='benchmark_carga_excel')
+                cliente = Clientes.objects.create(
+                    razon_social='BENCHMARK', direccion='-', comuna='-', id_usuario=usuario
+                )
+                base = 10 ** 9
+                Notas.objects.bulk_create([
+                    Notas(num_nota=base + i, cliente=cliente, fecha_despacho=timezone.now(), id_usuario=usuario)
+                    for i in range(n_notas)
+                ])
+                Productos.objects.bulk_create([
+                    Productos(nombre=f'BENCH {i}', codigo=f'BENCH{i}', id_usuario=usuario)
+                    for i in range(n_productos)
+                ])
+
+                # Pares únicos nota/producto para que ambos caminos escriban lo mismo
+                df = pd.DataFrame({
+                    'numnota': [base + (i % n_notas) for i in range(filas)],
+                    'cod_articu': [f'BENCH{(i // n_notas) % n_productos}' for i in range(filas)],
+                    'pend': [i % 50 for i in range(filas)],
+                })
+
+                for nombre, funcion in [('por fila', importar_por_fila), ('masiva', lambda df, u: importar_nota_productos([df], u))]:
+                    sid = transaction.savepoint()
+                    inicio = time.perf_counter()
+                    funcion(df, usuario)
+                    duracion = time.perf_counter() - inicio
+                    transaction.savepoint_rollback(sid)
+                    self.stdout.write(f'{nombre:>9}: {duracion:8.2f} s  ({filas / duracion:10.0f} filas/s)')
+
+                raise Rollback()
+        except Rollback:
+            pass
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+from nota_app import resumen
+from nota_app.models import Usuarios, Clientes, Notas
+
+
+class Rollback(Exception):
+    pass
+
+
+def resumen_cuatro_consultas(dia_inicio, dia_fin):
+    """Implementación anterior de DashboardViewSet.resumen: cuatro consultas sobre notas."""
+    fecha_inicio = timezone.make_aware(datetime.combine(dia_inicio, datetime.min.time()))
+    fecha_fin = timezone.make_aware(datetime.combine(dia_fin, datetime.max.time()))
+    notas_filtro = Q(fecha_despacho__gte=fecha_inicio) & Q(fecha_despacho__lte=fecha_fin)
+
+    total = Notas.objects.filter(notas_filtro).count()
+    por_estado = list(
+        Notas.objects.filter(notas_filtro).values('despacho_retira').annotate(total=Count('id_nota')).order_by('-total')
+    )
+    por_dia = list(
+        Notas.objects.filter(notas_filtro)
+        .annotate(dia=Cast('fecha_despacho', DateField()))
+        .values('dia').annotate(total=Count('id_nota')).order_by('dia')
+    )
+    por_comuna = list(
+        Notas.objects.filter(notas_filtro).exclude(cliente__comuna__isnull=True)
+        .values('cliente__comuna', 'despacho_retira').annotate(total=Count('id_nota')).order_by('-total')
+    )
+    return {'total': total, 'por_estado': por_estado, 'por_dia': por_dia, 'por_comuna': por_comuna}
+
+
+class Command(BaseCommand):
+    help = 'Compara el resumen del dashboard en cuatro consultas, en una pasada y desde la tabla de resumen'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rangos', type=int, nargs='+', default=[7, 30, 90, 365], help='Días hacia atrás')
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument(
+            '--notas', type=int, default=0,
+            help='Crea notas de prueba repartidas en el último año (se descartan al terminar)',
+        )
+
+    def medir(self, funcion, dia_inicio, dia_fin, repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion(dia_inicio, dia_fin)
+        return (time.perf_counter() - inicio) / repeticiones * 1000
+
+    def crear_notas(self, cantidad):
+        usuario = Usuarios.objects.create(username='benchmark_resumen', rut='benchmark_resumen')
+        comunas = ['SANTIAGO', 'MAIPU', 'PUDAHUEL', 'QUILICURA', 'LA FLORIDA', 'PUENTE ALTO']
+        clientes = Clientes.objects.bulk_create([
+            Clientes(razon_social=f'BENCH {c}', direccion='-', comuna=c, id_usuario=usuario) for c in comunas
+        ])
+        ahora = timezone.now()
+        Notas.objects.bulk_create([
+            Notas(
+                num_nota=10 ** 9 + i,
+                cliente=clientes[i % len(clientes)],
+                fecha_despacho=ahora - timedelta(minutes=(i * 37) % (365 * 24 * 60)),
+                despacho_retira=['DESPACHO', 'RETIRA', None][i % 3],
+                id_usuario=usuario,
+            )
+            for i in range(cantidad)
+        ], batch_size=1000)
+        resumen.reconstruir()
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['notas']:
+                    self.crear_notas(options['notas'])
+
+                hoy = timezone.localdate()
+                implementaciones = [
+                    ('4 consultas', resumen_cuatro_consultas),
+                    ('1 pasada', resumen.resumen_directo),
+                    ('tabla', resumen.resumen_notas),
+                ]
+                self.stdout.write(f"{'días':>6} {'notas':>8} " + ' '.join(f'{nombre:>12}' for nombre, _ in implementaciones))
+                for dias in options['rangos']:
+                    dia_inicio = hoy - timedelta(days=dias - 1)
+                    total = resumen.resumen_notas(dia_inicio, hoy)['total']
+                    tiempos = [
+                        self.medir(funcion, dia_inicio, hoy, options['repeticiones'])
+                        for _, funcion in implementaciones
+                    ]
+                    self.stdout.write(f'{dias:>6} {total:>8} ' + ' '.join(f'{t:>9.1f} ms' for t in tiempos))
+
+                raise Rollback()
+        except Rollback:
+            pass
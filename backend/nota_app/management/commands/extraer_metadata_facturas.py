@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from nota_app.models import DocumentFacturas
+from nota_app.pdf import extraer_metadata
+
+
+class Command(BaseCommand):
+    help = 'Completa page_count y metadata_pdf de las facturas leyendo solo el trailer de cada PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=200, help='Facturas guardadas por bulk_update')
+        parser.add_argument('--hilos', type=int, default=8, help='Lecturas simultáneas al bucket')
+        parser.add_argument(
+            '--todas', action='store_true',
+            help='Procesa también las que ya tienen metadatos',
+        )
+        parser.add_argument(
+            '--reintentar', action='store_true',
+            help='Incluye las que fallaron antes (metadata_pdf con error)',
+        )
+
+    def handle(self, *args, **options):
+        facturas = DocumentFacturas.objects.exclude(file_url='').only(
+            'id_factura', 'file_url', 'file_size', 'page_count'
+        ).order_by('id_factura')
+        if not options['todas']:
+            facturas = facturas.filter(page_count__isnull=True)
+            if not options['reintentar']:
+                facturas = facturas.filter(metadata_pdf__isnull=True)
+
+        total, con_error, ultimo_id = 0, 0, 0
+        with ThreadPoolExecutor(max_workers=options['hilos']) as executor:
+            while True:
+                # Paginación por id: las filas procesadas dejan de cumplir el filtro
+                lote = list(facturas.filter(id_factura__gt=ultimo_id)[:options['lote']])
+                if not lote:
+                    break
+                ultimo_id = lote[-1].id_factura
+
+                lote = list(executor.map(extraer_metadata, lote))
+                DocumentFacturas.objects.bulk_update(lote, ['page_count', 'metadata_pdf'])
+
+                total += len(lote)
+                con_error += sum(1 for f in lote if 'error' in f.metadata_pdf)
+                self.stdout.write(f'{total} facturas procesadas ({con_error} con error)')
+
+        self.stdout.write(self.style.SUCCESS(f'Listo: {total} facturas, {con_error} con error'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from nota_app.models import ImportacionExcel
+from nota_app.tareas import procesar_importacion
+
+
+class Command(BaseCommand):
+    help = 'Procesa las importaciones de Excel pendientes (por ejemplo, tras un reinicio)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reintentar', action='store_true',
+            help='Vuelve a encolar también las que quedaron en PROCESANDO',
+        )
+
+    def handle(self, *args, **options):
+        if options['reintentar']:
+            ImportacionExcel.objects.filter(estado='PROCESANDO').update(estado='PENDIENTE')
+
+        pendientes = ImportacionExcel.objects.filter(estado='PENDIENTE').order_by('id_importacion')
+        for id_importacion in pendientes.values_list('id_importacion', flat=True):
+            procesar_importacion(id_importacion)
+            estado = ImportacionExcel.objects.values_list('estado', flat=True).get(id_importacion=id_importacion)
+            self.stdout.write(f'Importación {id_importacion}: {estado}')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from nota_app.sincronizacion import purgar
+
+
+class Command(BaseCommand):
+    help = 'Borra los registros de eliminaciones más antiguos que SINCRONIZACION_RETENCION_DIAS'
+
+    def handle(self, *args, **options):
+        total = purgar()
+        self.stdout.write(self.style.SUCCESS(f'{total} eliminaciones purgadas'))
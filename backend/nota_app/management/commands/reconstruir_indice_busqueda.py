@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from nota_app.busqueda import ENTIDADES, reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la tabla indice_busqueda de los autocompletados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entidades', nargs='*', help=f"Por defecto todas: {', '.join(ENTIDADES)}")
+
+    def handle(self, *args, **options):
+        desconocidas = set(options['entidades']) - set(ENTIDADES)
+        if desconocidas:
+            raise CommandError(f"Entidades desconocidas: {', '.join(sorted(desconocidas))}")
+
+        total = reconstruir(options['entidades'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido: {total} palabras'))
@@ -0,0 +1,15 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from nota_app.resumen import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la tabla resumen_despacho_diario desde notas (tras cargas masivas o para corregir desvíos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help='Primer día a recalcular (YYYY-MM-DD)')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Último día a recalcular (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        combinaciones = reconstruir(options['desde'], options['hasta'])
+        self.stdout.write(self.style.SUCCESS(f'Resumen reconstruido: {combinaciones} combinaciones día/comuna/despacho'))
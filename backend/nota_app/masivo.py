@@ -0,0 +1,305 @@
+"""
+Altas, cambios y bajas por lote de notas y líneas de picking.
+
+Cada elemento se valida con su serializer, pero todo lo que requiere la base
+de datos (clientes por RUT, números de nota repetidos, notas y productos
+referenciados, pares nota/producto) se resuelve para el lote completo con una
+consulta IN. Los elementos válidos se escriben con bulk_create/bulk_update y
+los inválidos se informan por posición: [{'indice': i, 'errores': {...}}].
+Quien llama debe envolver la operación en una transacción.
+
+bulk_create y bulk_update no disparan señales, así que el resumen de
+despachos se ajusta aquí. Las bajas usan delete() del queryset, que sí las
+dispara.
+"""
+from collections import Counter
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from . import resumen
+from .models import Clientes, Notas, NotaProducto, Productos
+from .serializer import ClientesSerializer, NotaLoteSerializer, NotaProductoLoteSerializer
+
+MAX_ELEMENTOS = 500
+TAMANO_LOTE = 500
+
+CAMPOS_CLIENTE = ['razon_social', 'direccion', 'comuna', 'telefono', 'correo', 'contacto']
+CAMPOS_SOLO_ESCRITURA_NOTA = ['rut_cliente', 'guardar_cliente', *CAMPOS_CLIENTE]
+
+
+def validar(serializer_class, elementos, partial=False, clave=None):
+    """
+    Valida cada elemento por separado. Retorna (validos, errores) donde
+    validos es una lista de (indice, datos). Con `clave` el elemento debe
+    traer ese campo (el id en las actualizaciones) y no puede repetirse.
+    """
+    validos, errores, vistos = [], [], set()
+    for indice, elemento in enumerate(elementos):
+        if not isinstance(elemento, dict):
+            errores.append({'indice': indice, 'errores': {'non_field_errors': ['Se esperaba un objeto.']}})
+            continue
+        serializer = serializer_class(data=elemento, partial=partial)
+        if not serializer.is_valid():
+            errores.append({'indice': indice, 'errores': serializer.errors})
+            continue
+        datos = serializer.validated_data
+        if clave is not None:
+            if datos.get(clave) is None:
+                errores.append({'indice': indice, 'errores': {clave: ['Este campo es requerido.']}})
+                continue
+            if datos[clave] in vistos:
+                errores.append({'indice': indice, 'errores': {clave: ['Repetido en el lote.']}})
+                continue
+            vistos.add(datos[clave])
+        validos.append((indice, dict(datos)))
+    return validos, errores
+
+
+def _error(errores, indice, campo, mensaje):
+    errores.append({'indice': indice, 'errores': {campo: [mensaje]}})
+
+
+def _ordenar(errores):
+    return sorted(errores, key=lambda error: error['indice'])
+
+
+# --- notas ---
+
+def _numeros_ocupados(validos):
+    """
+    {num_nota: id_nota} de los números del lote que ya existen en la base de
+    datos, en una sola consulta.
+    """
+    numeros = {datos['num_nota'] for _, datos in validos if 'num_nota' in datos}
+    return dict(Notas.objects.filter(num_nota__in=numeros).values_list('num_nota', 'id_nota'))
+
+
+def _crear_cliente(rut, datos, usuario):
+    """
+    Crea el cliente de una nota del lote. Retorna (cliente, None) o
+    (None, errores) si los datos no son válidos; la creación va en su propio
+    savepoint para que un error no anule el resto del lote.
+    """
+    serializer = ClientesSerializer(data={'rut_cliente': rut, **{
+        campo: datos[campo] for campo in CAMPOS_CLIENTE if datos.get(campo) is not None
+    }})
+    if not serializer.is_valid():
+        return None, serializer.errors
+    try:
+        with transaction.atomic():
+            return Clientes.objects.create(id_usuario=usuario, **serializer.validated_data), None
+    except IntegrityError:
+        return None, {'rut_cliente': ['No se pudo crear el cliente.']}
+
+
+def crear_notas(elementos, usuario):
+    """Crea notas como NotasSerializer.create. Retorna (ids creados, errores)."""
+    validos, errores = validar(NotaLoteSerializer, elementos)
+    ocupados = _numeros_ocupados(validos)
+    ruts = {datos['rut_cliente'] for _, datos in validos}
+    clientes = {cliente.rut_cliente: cliente for cliente in Clientes.objects.filter(rut_cliente__in=ruts)}
+
+    notas, numeros = [], set()
+    for indice, datos in validos:
+        if datos['num_nota'] in ocupados or datos['num_nota'] in numeros:
+            _error(errores, indice, 'num_nota', 'Ya existe una nota con este número.')
+            continue
+
+        rut = datos['rut_cliente']
+        if rut not in clientes:
+            if not datos.get('guardar_cliente'):
+                _error(errores, indice, 'rut_cliente', f'El cliente con RUT {rut} no existe y no se solicitó crearlo.')
+                continue
+            # Los clientes nuevos son pocos; se crean uno a uno para que las señales los indexen
+            cliente, errores_cliente = _crear_cliente(rut, datos, usuario)
+            if cliente is None:
+                errores.append({'indice': indice, 'errores': errores_cliente})
+                continue
+            clientes[rut] = cliente
+
+        numeros.add(datos['num_nota'])
+        campos = {campo: valor for campo, valor in datos.items() if campo not in CAMPOS_SOLO_ESCRITURA_NOTA}
+        notas.append(Notas(cliente=clientes[rut], id_usuario=usuario, **campos))
+
+    Notas.objects.bulk_create(notas, batch_size=TAMANO_LOTE)
+    resumen.ajustar_conteos(Counter(
+        resumen.clave_nota(nota.fecha_despacho, nota.despacho_retira, nota.cliente.comuna) for nota in notas
+    ))
+    # MySQL no devuelve los ids de bulk_create; num_nota es único
+    ids = list(Notas.objects.filter(num_nota__in=numeros).values_list('id_nota', flat=True))
+    return ids, _ordenar(errores)
+
+
+def actualizar_notas(elementos, usuario):
+    """
+    Actualiza parcialmente notas identificadas por id_nota. El cliente de una
+    nota no cambia. Retorna (ids actualizados, errores).
+    """
+    validos, errores = validar(NotaLoteSerializer, elementos, partial=True, clave='id_nota')
+    existentes = Notas.objects.select_related('cliente').in_bulk([datos['id_nota'] for _, datos in validos])
+    ocupados = _numeros_ocupados(validos)
+
+    notas, campos, numeros, conteos = [], set(), set(), Counter()
+    ahora = timezone.now()
+    for indice, datos in validos:
+        nota = existentes.get(datos.pop('id_nota'))
+        if nota is None:
+            _error(errores, indice, 'id_nota', 'La nota no existe.')
+            continue
+        numero = datos.get('num_nota', nota.num_nota)
+        if ocupados.get(numero, nota.pk) != nota.pk or (numero != nota.num_nota and numero in numeros):
+            _error(errores, indice, 'num_nota', 'Ya existe una nota con este número.')
+            continue
+        numeros.add(numero)
+
+        conteos[resumen.clave_nota(nota.fecha_despacho, nota.despacho_retira, nota.cliente.comuna)] -= 1
+        for campo, valor in datos.items():
+            if campo not in CAMPOS_SOLO_ESCRITURA_NOTA:
+                setattr(nota, campo, valor)
+                campos.add(campo)
+        nota.id_usuario_modificacion = usuario
+        nota.fecha_modificacion = ahora
+        conteos[resumen.clave_nota(nota.fecha_despacho, nota.despacho_retira, nota.cliente.comuna)] += 1
+        notas.append(nota)
+
+    if notas:
+        Notas.objects.bulk_update(
+            notas, [*campos, 'id_usuario_modificacion', 'fecha_modificacion'], batch_size=TAMANO_LOTE
+        )
+        resumen.ajustar_conteos(conteos)
+    return [nota.pk for nota in notas], _ordenar(errores)
+
+
+def eliminar(modelo, elementos):
+    """
+    Elimina los ids indicados con un delete() del queryset. Retorna
+    (ids eliminados, errores) con un error por cada id que no existe.
+    """
+    errores, ids = [], []
+    for indice, elemento in enumerate(elementos):
+        try:
+            ids.append((indice, int(elemento)))
+        except (TypeError, ValueError):
+            _error(errores, indice, 'id', 'Debe ser un número entero.')
+
+    queryset = modelo.objects.filter(pk__in=[pk for _, pk in ids])
+    existentes = set(queryset.values_list('pk', flat=True))
+    errores += [
+        {'indice': indice, 'errores': {'id': ['No existe.']}} for indice, pk in ids if pk not in existentes
+    ]
+    queryset.delete()
+    return sorted(existentes), _ordenar(errores)
+
+
+def eliminar_notas(elementos, usuario):
+    return eliminar(Notas, elementos)
+
+
+# --- líneas de picking ---
+
+def _verificar_referencias(validos, errores):
+    """
+    Descarta los elementos cuya nota o producto no existe, con una consulta
+    por modelo. Retorna los elementos restantes.
+    """
+    notas = {datos['nota_id'] for _, datos in validos if datos.get('nota_id') is not None}
+    productos = {datos['producto_id'] for _, datos in validos if 'producto_id' in datos}
+    notas = set(Notas.objects.filter(id_nota__in=notas).values_list('id_nota', flat=True))
+    productos = set(Productos.objects.filter(id_producto__in=productos).values_list('id_producto', flat=True))
+
+    restantes = []
+    for indice, datos in validos:
+        if datos.get('nota_id') is not None and datos['nota_id'] not in notas:
+            _error(errores, indice, 'nota_id', 'La nota no existe.')
+        elif 'producto_id' in datos and datos['producto_id'] not in productos:
+            _error(errores, indice, 'producto_id', 'El producto no existe.')
+        else:
+            restantes.append((indice, datos))
+    return restantes
+
+
+def _pares_existentes(pares):
+    """{(nota_id, producto_id): id} de los pares que ya existen, en una consulta."""
+    pares = {par for par in pares if par[0] is not None}
+    if not pares:
+        return {}
+    filas = NotaProducto.objects.filter(
+        nota_id__in={nota for nota, _ in pares}, producto_id__in={producto for _, producto in pares}
+    ).values_list('nota_id', 'producto_id', 'id')
+    # Los dos IN traen el producto cruzado de notas y productos; solo sirven los pares pedidos
+    return {(nota, producto): pk for nota, producto, pk in filas if (nota, producto) in pares}
+
+
+def crear_nota_productos(elementos, usuario):
+    """Crea líneas de picking. Retorna (ids creados, errores)."""
+    validos, errores = validar(NotaProductoLoteSerializer, elementos)
+    validos = _verificar_referencias(validos, errores)
+    existentes = _pares_existentes((datos.get('nota_id'), datos['producto_id']) for _, datos in validos)
+
+    lineas, pares = [], set()
+    for indice, datos in validos:
+        datos.pop('id', None)
+        par = (datos.get('nota_id'), datos['producto_id'])
+        if par[0] is not None and (par in existentes or par in pares):
+            _error(errores, indice, 'non_field_errors', 'El producto ya está en la nota.')
+            continue
+        pares.add(par)
+        lineas.append(NotaProducto(usuario_creacion=usuario, **datos))
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        NotaProducto.objects.bulk_create(lineas, batch_size=TAMANO_LOTE)
+        return [linea.pk for linea in lineas], _ordenar(errores)
+
+    # Sin ids de vuelta (MySQL) las líneas se releen por su par (nota, producto);
+    # las que no tienen nota no tienen clave natural y se guardan una a una
+    con_nota = [linea for linea in lineas if linea.nota_id is not None]
+    NotaProducto.objects.bulk_create(con_nota, batch_size=TAMANO_LOTE)
+    ids = list(_pares_existentes((linea.nota_id, linea.producto_id) for linea in con_nota).values())
+    for linea in lineas:
+        if linea.nota_id is None:
+            linea.save()
+            ids.append(linea.pk)
+    return ids, _ordenar(errores)
+
+
+def actualizar_nota_productos(elementos, usuario):
+    """Actualiza parcialmente líneas identificadas por id. Retorna (ids, errores)."""
+    validos, errores = validar(NotaProductoLoteSerializer, elementos, partial=True, clave='id')
+    validos = _verificar_referencias(validos, errores)
+    existentes = NotaProducto.objects.in_bulk([datos['id'] for _, datos in validos])
+
+    pares_nuevos = {}
+    for indice, datos in validos:
+        linea = existentes.get(datos['id'])
+        if linea is not None:
+            pares_nuevos[indice] = (datos.get('nota_id', linea.nota_id), datos.get('producto_id', linea.producto_id))
+    ocupados = _pares_existentes(pares_nuevos.values())
+
+    lineas, campos, pares = [], set(), set()
+    ahora = timezone.now()
+    for indice, datos in validos:
+        linea = existentes.get(datos.pop('id'))
+        if linea is None:
+            _error(errores, indice, 'id', 'La línea no existe.')
+            continue
+        par = pares_nuevos[indice]
+        if par[0] is not None and (ocupados.get(par, linea.pk) != linea.pk or par in pares):
+            _error(errores, indice, 'non_field_errors', 'El producto ya está en la nota.')
+            continue
+        pares.add(par)
+
+        for campo, valor in datos.items():
+            setattr(linea, campo, valor)
+            campos.add(campo)
+        linea.usuario_modificacion = usuario
+        linea.fecha_modificacion = ahora
+        lineas.append(linea)
+
+    if lineas:
+        NotaProducto.objects.bulk_update(
+            lineas, [*campos, 'usuario_modificacion', 'fecha_modificacion'], batch_size=TAMANO_LOTE
+        )
+    return [linea.pk for linea in lineas], _ordenar(errores)
+
+
+def eliminar_nota_productos(elementos, usuario):
+    return eliminar(NotaProducto, elementos)
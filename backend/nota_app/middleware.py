@@ -1,3 +1,13 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('nota_app.metricas')
+
+
 class JWTTokenFromCookieMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -6,4 +16,104 @@ class JWTTokenFromCookieMiddleware:
         token = request.COOKIES.get('access_token')
         if token:
             request.META['HTTP_AUTHORIZATION'] = f'Bearer {token}'
-        return self.get_response(request)
\ No newline at end of file
+        return self.get_response(request)
+
+
+class _ContadorConsultas:
+    """execute_wrapper que cuenta las consultas SQL y suma su duración."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.duracion = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracion += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 1)
+
+
+def sumar_serializacion(request, segundos):
+    """Acumula tiempo de serialización en la solicitud que mide MetricasMiddleware."""
+    request = getattr(request, '_request', request)
+    if hasattr(request, 'tiempo_serializacion'):
+        request.tiempo_serializacion = (request.tiempo_serializacion or 0) + segundos
+
+
+class MetricasMiddleware:
+    """
+    Mide cada solicitud: cantidad de consultas SQL y su tiempo, tiempo de
+    serialización (serializer.data, medido por SerializacionMedidaMixin en las
+    vistas), tiempo de render de la respuesta (los datos ya armados a JSON),
+    tiempo total y tamaño. Los expone en Server-Timing y escribe una línea
+    JSON en el logger nota_app.metricas.
+
+    En las respuestas en streaming los encabezados salen antes del cuerpo, así
+    que no incluyen las consultas hechas al generarlo ni su tamaño.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = _ContadorConsultas()
+        request.tiempo_serializacion = None
+        request.tiempo_render = None
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexion in connections.all():
+                stack.enter_context(conexion.execute_wrapper(contador))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        metricas = [f'db;dur={_ms(contador.duracion)};desc="{contador.consultas} consultas"']
+        if request.tiempo_serializacion is not None:
+            metricas.append(f'serialize;dur={_ms(request.tiempo_serializacion)}')
+        if request.tiempo_render is not None:
+            metricas.append(f'render;dur={_ms(request.tiempo_render)}')
+        metricas.append(f'total;dur={_ms(total)}')
+        if response.has_header('Server-Timing'):
+            metricas.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(metricas)
+
+        # Sin Timing-Allow-Origin el navegador oculta Server-Timing a otros orígenes
+        origen = request.headers.get('Origin')
+        if origen and origen in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+            response['Timing-Allow-Origin'] = origen
+
+        self.registrar(request, response, contador, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Se ejecuta justo antes del render; el callback marca el final
+        inicio = time.perf_counter()
+
+        def medir_render(respuesta):
+            request.tiempo_render = time.perf_counter() - inicio
+
+        response.add_post_render_callback(medir_render)
+        return response
+
+    def registrar(self, request, response, contador, total):
+        usuario = getattr(request, 'user', None)
+        resolver = request.resolver_match
+        logger.info(json.dumps({
+            'metodo': request.method,
+            'ruta': request.path,
+            # El nombre de la vista agrupa las solicitudes por endpoint (sin ids)
+            'vista': resolver.view_name if resolver else None,
+            'estado': response.status_code,
+            'consultas': contador.consultas,
+            'sql_ms': _ms(contador.duracion),
+            'serializacion_ms': _ms(request.tiempo_serializacion) if request.tiempo_serializacion is not None else None,
+            'render_ms': _ms(request.tiempo_render) if request.tiempo_render is not None else None,
+            'total_ms': _ms(total),
+            'bytes': None if response.streaming else len(response.content),
+            'usuario': usuario.pk if usuario is not None and usuario.is_authenticated else None,
+        }))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0015_notaproducto_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionExcel',
+            fields=[
+                ('id_importacion', models.AutoField(primary_key=True, serialize=False)),
+                ('archivo', models.FileField(upload_to='importaciones/')),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('estado', models.CharField(default='PENDIENTE', max_length=20)),
+                ('total_filas', models.IntegerField(default=0)),
+                ('filas_procesadas', models.IntegerField(default=0)),
+                ('filas_omitidas', models.IntegerField(default=0)),
+                ('omitidas', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+                ('id_usuario', models.ForeignKey(db_column='id_usuario', on_delete=django.db.models.deletion.DO_NOTHING, related_name='importaciones_excel', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'importacion_excel',
+                'managed': True,
+            },
+        ),
+    ]
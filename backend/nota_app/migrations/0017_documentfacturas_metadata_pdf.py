@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0016_importacionexcel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentfacturas',
+            name='metadata_pdf',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
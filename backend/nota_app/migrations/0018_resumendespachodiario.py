@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:03
+
+from collections import Counter
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def llenar_resumen(apps, schema_editor):
+    Notas = apps.get_model('nota_app', 'Notas')
+    ResumenDespachoDiario = apps.get_model('nota_app', 'ResumenDespachoDiario')
+    conteos = Counter(
+        (timezone.localdate(fecha) if timezone.is_aware(fecha) else fecha.date(), comuna, despacho_retira)
+        for fecha, despacho_retira, comuna in Notas.objects.values_list(
+            'fecha_despacho', 'despacho_retira', 'cliente__comuna'
+        ).iterator(chunk_size=5000)
+    )
+    ResumenDespachoDiario.objects.bulk_create(
+        [
+            ResumenDespachoDiario(dia=dia, comuna=comuna, despacho_retira=despacho_retira, total=total)
+            for (dia, comuna, despacho_retira), total in conteos.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0017_documentfacturas_metadata_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDespachoDiario',
+            fields=[
+                ('id_resumen', models.AutoField(primary_key=True, serialize=False)),
+                ('dia', models.DateField()),
+                ('comuna', models.CharField(max_length=50)),
+                ('despacho_retira', models.CharField(blank=True, max_length=50, null=True)),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'resumen_despacho_diario',
+                'managed': True,
+                'indexes': [models.Index(fields=['dia', 'comuna', 'despacho_retira'], name='resumen_despacho_clave_idx')],
+            },
+        ),
+        migrations.RunPython(llenar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0018_resumendespachodiario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentfacturas',
+            index=models.Index(fields=['created_at', 'id_factura'], name='facturas_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentfacturas',
+            index=models.Index(fields=['estado', 'created_at'], name='facturas_estado_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notaproducto',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='nota_producto_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notaproducto',
+            index=models.Index(fields=['estado', 'fecha_creacion'], name='nota_producto_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notas',
+            index=models.Index(fields=['fecha_despacho', 'id_nota'], name='notas_despacho_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notas',
+            index=models.Index(fields=['fecha_despacho', 'despacho_retira', 'cliente'], name='notas_despacho_retira_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notas',
+            index=models.Index(fields=['estado_solicitud', 'fecha_despacho'], name='notas_estado_despacho_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidomateriasprimas',
+            index=models.Index(fields=['estado', 'fecha_entrega'], name='pedido_estado_entrega_idx'),
+        ),
+    ]
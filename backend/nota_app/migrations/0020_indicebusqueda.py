@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:09
+
+import re
+import unicodedata
+from django.db import migrations, models
+
+LARGO_TOKEN = 50
+TAMANO_LOTE = 2000
+
+ENTIDADES = {
+    'producto': ('Productos', 'nombre'),
+    'proveedor': ('Proveedores', 'razon_social'),
+    'factura': ('DocumentFacturas', 'title'),
+}
+
+
+# Copia congelada de nota_app.busqueda.tokenizar: la migración debe indexar
+# igual aunque el tokenizador de la app cambie después.
+def tokenizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^a-z0-9]+', ' ', texto.lower()).strip()
+    return [token[:LARGO_TOKEN] for token in texto.split()]
+
+
+def llenar_indice(apps, schema_editor):
+    IndiceBusqueda = apps.get_model('nota_app', 'IndiceBusqueda')
+    for entidad, (nombre_modelo, campo) in ENTIDADES.items():
+        modelo = apps.get_model('nota_app', nombre_modelo)
+        filas = []
+        for id_objeto, texto in modelo.objects.values_list('pk', campo).iterator(chunk_size=TAMANO_LOTE):
+            tokens = tokenizar(texto)
+            filas += [
+                IndiceBusqueda(entidad=entidad, id_objeto=id_objeto, token=token, posicion=i, largo=len(tokens))
+                for i, token in enumerate(tokens)
+            ]
+            if len(filas) >= TAMANO_LOTE:
+                IndiceBusqueda.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+                filas = []
+        IndiceBusqueda.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0019_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusqueda',
+            fields=[
+                ('id_indice', models.AutoField(primary_key=True, serialize=False)),
+                ('entidad', models.CharField(max_length=20)),
+                ('id_objeto', models.IntegerField()),
+                ('token', models.CharField(max_length=50)),
+                ('posicion', models.SmallIntegerField(default=0)),
+                ('largo', models.SmallIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'indice_busqueda',
+                'managed': True,
+                'indexes': [models.Index(fields=['entidad', 'token', 'id_objeto'], name='indice_busqueda_token_idx'), models.Index(fields=['entidad', 'id_objeto'], name='indice_busqueda_objeto_idx')],
+            },
+        ),
+        migrations.RunPython(llenar_indice, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+import re
+import unicodedata
+from django.db import migrations
+
+LARGO_TOKEN = 50
+TAMANO_LOTE = 2000
+
+
+# Copia congelada de nota_app.busqueda.tokenizar, igual a la de 0020
+def tokenizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^a-z0-9]+', ' ', texto.lower()).strip()
+    return [token[:LARGO_TOKEN] for token in texto.split()]
+
+
+def indexar_clientes(apps, schema_editor):
+    Clientes = apps.get_model('nota_app', 'Clientes')
+    IndiceBusqueda = apps.get_model('nota_app', 'IndiceBusqueda')
+    filas = []
+    for id_cliente, razon_social in Clientes.objects.values_list('pk', 'razon_social').iterator(chunk_size=TAMANO_LOTE):
+        tokens = tokenizar(razon_social)
+        filas += [
+            IndiceBusqueda(entidad='cliente', id_objeto=id_cliente, token=token, posicion=i, largo=len(tokens))
+            for i, token in enumerate(tokens)
+        ]
+        if len(filas) >= TAMANO_LOTE:
+            IndiceBusqueda.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+            filas = []
+    IndiceBusqueda.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+
+
+def desindexar_clientes(apps, schema_editor):
+    apps.get_model('nota_app', 'IndiceBusqueda').objects.filter(entidad='cliente').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0020_indicebusqueda'),
+    ]
+
+    operations = [
+        migrations.RunPython(indexar_clientes, desindexar_clientes),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0021_indice_busqueda_clientes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Eliminacion',
+            fields=[
+                ('id_eliminacion', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entidad', models.CharField(max_length=30)),
+                ('id_objeto', models.IntegerField()),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'eliminaciones',
+                'managed': True,
+                'indexes': [models.Index(fields=['entidad', 'fecha'], name='eliminaciones_entidad_idx')],
+            },
+        ),
+    ]
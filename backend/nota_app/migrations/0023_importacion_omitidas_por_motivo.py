@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nota_app', '0022_eliminaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacionexcel',
+            name='omitidas_por_motivo',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -35,6 +35,13 @@ class Notas(models.Model):
     class Meta:
         managed = True
         db_table = 'notas'
+        indexes = [
+            # Listado por cursor (-fecha_despacho, -id_nota) y filtros por rango
+            models.Index(fields=['fecha_despacho', 'id_nota'], name='notas_despacho_idx'),
+            # Cubre la consulta agrupada del resumen del dashboard
+            models.Index(fields=['fecha_despacho', 'despacho_retira', 'cliente'], name='notas_despacho_retira_idx'),
+            models.Index(fields=['estado_solicitud', 'fecha_despacho'], name='notas_estado_despacho_idx'),
+        ]
 
 
 class Clientes(models.Model):
@@ -141,6 +148,9 @@ class PedidoMateriasPrimas(models.Model):
     class Meta:
         managed = True
         db_table = 'pedido_materias_primas'
+        indexes = [
+            models.Index(fields=['estado', 'fecha_entrega'], name='pedido_estado_entrega_idx'),
+        ]
 
     def __str__(self):
         return f"Pedido {self.id_pedido} - Producto: {self.id_producto.nombre} - Proveedor: {self.id_proveedor.razon_social}"
@@ -191,6 +201,7 @@ class DocumentFacturas(models.Model):
     file_url = models.URLField(max_length=500)
     file_size = models.BigIntegerField()
     page_count = models.IntegerField(blank=True, null=True)
+    metadata_pdf = models.JSONField(blank=True, null=True)
     observacion = models.TextField(blank=True, null=True)
     empresa = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -203,6 +214,11 @@ class DocumentFacturas(models.Model):
     class Meta:
         managed = True
         db_table = 'document_facturas'
+        indexes = [
+            # Listado por cursor (-created_at, -id_factura)
+            models.Index(fields=['created_at', 'id_factura'], name='facturas_creacion_idx'),
+            models.Index(fields=['estado', 'created_at'], name='facturas_estado_creacion_idx'),
+        ]
 
 
 class NotaProducto(models.Model):
@@ -220,6 +236,90 @@ class NotaProducto(models.Model):
     class Meta:
         db_table = 'nota_producto'
         unique_together = ('nota', 'producto')
+        indexes = [
+            # Listado por cursor (-fecha_creacion, -id) y filtro por estado del picking
+            models.Index(fields=['fecha_creacion', 'id'], name='nota_producto_creacion_idx'),
+            models.Index(fields=['estado', 'fecha_creacion'], name='nota_producto_estado_idx'),
+        ]
 
     def __str__(self):
-        return f"Nota {self.nota.num_nota} - {self.producto.nombre} - Cantidad: {self.cantidad}"
\ No newline at end of file
+        return f"Nota {self.nota.num_nota} - {self.producto.nombre} - Cantidad: {self.cantidad}"
+
+class ImportacionExcel(models.Model):
+    id_importacion = models.AutoField(primary_key=True)
+    archivo = models.FileField(upload_to='importaciones/')
+    nombre_archivo = models.CharField(max_length=255)
+    estado = models.CharField(max_length=20, default='PENDIENTE')
+    total_filas = models.IntegerField(default=0)
+    filas_procesadas = models.IntegerField(default=0)
+    filas_omitidas = models.IntegerField(default=0)
+    # Detalle de las primeras filas omitidas y la cuenta de todas por motivo
+    omitidas = models.JSONField(default=list, blank=True)
+    omitidas_por_motivo = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+    id_usuario = models.ForeignKey('Usuarios', models.DO_NOTHING, db_column='id_usuario', related_name='importaciones_excel')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = True
+        db_table = 'importacion_excel'
+
+    def __str__(self):
+        return f"Importación {self.id_importacion} - {self.nombre_archivo} ({self.estado})"
+
+
+class ResumenDespachoDiario(models.Model):
+    id_resumen = models.AutoField(primary_key=True)
+    dia = models.DateField()
+    comuna = models.CharField(max_length=50)
+    despacho_retira = models.CharField(max_length=50, blank=True, null=True)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        managed = True
+        db_table = 'resumen_despacho_diario'
+        indexes = [
+            models.Index(fields=['dia', 'comuna', 'despacho_retira'], name='resumen_despacho_clave_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} - {self.comuna} - {self.despacho_retira}: {self.total}"
+
+
+class IndiceBusqueda(models.Model):
+    id_indice = models.AutoField(primary_key=True)
+    entidad = models.CharField(max_length=20)
+    id_objeto = models.IntegerField()
+    token = models.CharField(max_length=50)
+    posicion = models.SmallIntegerField(default=0)
+    largo = models.SmallIntegerField(default=1)
+
+    class Meta:
+        managed = True
+        db_table = 'indice_busqueda'
+        indexes = [
+            models.Index(fields=['entidad', 'token', 'id_objeto'], name='indice_busqueda_token_idx'),
+            models.Index(fields=['entidad', 'id_objeto'], name='indice_busqueda_objeto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad} {self.id_objeto}: {self.token}"
+
+
+class Eliminacion(models.Model):
+    """Registro de borrados para la sincronización incremental (ver sincronizacion.py)."""
+    id_eliminacion = models.BigAutoField(primary_key=True)
+    entidad = models.CharField(max_length=30)
+    id_objeto = models.IntegerField()
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        managed = True
+        db_table = 'eliminaciones'
+        indexes = [
+            models.Index(fields=['entidad', 'fecha'], name='eliminaciones_entidad_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad} {self.id_objeto} eliminado el {self.fecha}"
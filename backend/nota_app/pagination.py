@@ -0,0 +1,29 @@
+from rest_framework.pagination import CursorPagination
+from .filtros import ordenamiento
+
+
+class CursorPaginacion(CursorPagination):
+    """
+    Paginación por cursor sobre columnas indexadas.
+
+    - El orden se toma del atributo `cursor_ordering` de la vista (o del
+      pedido con ?ordering=, ver filtros.py), que debe terminar en la llave
+      primaria para que el orden sea estable.
+    - `?page_size=` permite ajustar el tamaño de página hasta `max_page_size`.
+    - `?paginar=false` devuelve la lista completa para clientes antiguos.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    opt_out_query_param = 'paginar'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.opt_out_query_param, '').lower() in ('false', '0', 'no'):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = ordenamiento(request, view)
+        if ordering:
+            return ordering
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,163 @@
+"""
+Extracción del número de páginas y metadatos de las facturas PDF.
+
+El PDF no se descarga completo: PyPDF2 lee desde un archivo virtual que pide
+al bucket solo los rangos que necesita (encabezado, trailer, tabla xref y los
+pocos objetos del catálogo), en bloques de tamaño fijo que se guardan en
+memoria mientras dura la lectura.
+"""
+import io
+import logging
+from PyPDF2 import PdfReader
+from django.conf import settings
+from .almacenamiento import obtener_cliente_s3, key_desde_url
+from .models import DocumentFacturas
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 64 * 1024
+
+# Si el xref está dañado PyPDF2 recorre el archivo entero; se corta antes
+MAX_BYTES_LEIDOS = 4 * 1024 * 1024
+
+
+class LecturaExcedida(Exception):
+    pass
+
+
+class ArchivoRemoto(io.RawIOBase):
+    """
+    Archivo de solo lectura sobre un objeto del bucket usando GET con Range.
+    """
+
+    def __init__(self, key, tamano, tamano_bloque=TAMANO_BLOQUE, max_bytes=MAX_BYTES_LEIDOS):
+        self.key = key
+        self.tamano = tamano
+        self.tamano_bloque = tamano_bloque
+        self.max_bytes = max_bytes
+        self.posicion = 0
+        self.bloques = {}
+        self.bytes_leidos = 0
+        self.peticiones = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.posicion
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.posicion = offset
+        elif whence == io.SEEK_CUR:
+            self.posicion += offset
+        elif whence == io.SEEK_END:
+            self.posicion = self.tamano + offset
+        self.posicion = max(0, self.posicion)
+        return self.posicion
+
+    def _descargar(self, primero, ultimo):
+        """Trae los bloques [primero, ultimo] en una sola petición."""
+        inicio = primero * self.tamano_bloque
+        fin = min((ultimo + 1) * self.tamano_bloque, self.tamano) - 1
+        if self.bytes_leidos + fin - inicio + 1 > self.max_bytes:
+            raise LecturaExcedida(f"Se superó el máximo de {self.max_bytes} bytes leídos")
+
+        respuesta = obtener_cliente_s3().get_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=self.key, Range=f"bytes={inicio}-{fin}"
+        )
+        datos = respuesta["Body"].read()
+        self.peticiones += 1
+        self.bytes_leidos += len(datos)
+        for i in range(primero, ultimo + 1):
+            desde = (i - primero) * self.tamano_bloque
+            self.bloques[i] = datos[desde:desde + self.tamano_bloque]
+
+    def read(self, size=-1):
+        if self.posicion >= self.tamano:
+            return b""
+        fin = self.tamano if size is None or size < 0 else min(self.posicion + size, self.tamano)
+
+        primero = self.posicion // self.tamano_bloque
+        ultimo = (fin - 1) // self.tamano_bloque
+        faltantes = [i for i in range(primero, ultimo + 1) if i not in self.bloques]
+        if faltantes:
+            self._descargar(faltantes[0], faltantes[-1])
+
+        datos = b"".join(self.bloques[i] for i in range(primero, ultimo + 1))
+        desde = self.posicion - primero * self.tamano_bloque
+        resultado = datos[desde:desde + fin - self.posicion]
+        self.posicion += len(resultado)
+        return resultado
+
+    def readinto(self, buffer):
+        datos = self.read(len(buffer))
+        buffer[:len(datos)] = datos
+        return len(datos)
+
+
+def _texto(valor):
+    return str(valor) if valor is not None else None
+
+
+def leer_metadata_pdf(archivo):
+    """
+    Retorna (page_count, metadata) leyendo solo el trailer y el catálogo del PDF.
+    `archivo` es cualquier archivo binario con seek.
+    """
+    reader = PdfReader(archivo, strict=False)
+    if reader.is_encrypted:
+        # Los PDF con clave solo de propietario se abren con clave vacía
+        reader.decrypt("")
+
+    # /Count de la raíz del árbol de páginas evita recorrer todas las páginas
+    page_count = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+
+    info = reader.metadata or {}
+    metadata = {
+        "version": reader.pdf_header.lstrip("%"),
+        "encriptado": reader.is_encrypted,
+        "titulo": _texto(info.get("/Title")),
+        "autor": _texto(info.get("/Author")),
+        "asunto": _texto(info.get("/Subject")),
+        "creador": _texto(info.get("/Creator")),
+        "productor": _texto(info.get("/Producer")),
+        "fecha_creacion": _texto(info.get("/CreationDate")),
+        "fecha_modificacion": _texto(info.get("/ModDate")),
+    }
+    return page_count, metadata
+
+
+def extraer_metadata(factura):
+    """
+    Calcula page_count y metadata_pdf de una factura sin guardarla.
+    Si el PDF no se puede leer deja el error en metadata_pdf.
+    """
+    archivo = ArchivoRemoto(key_desde_url(factura.file_url), factura.file_size)
+    try:
+        page_count, metadata = leer_metadata_pdf(archivo)
+    except Exception as e:
+        logger.warning(f"No se pudo leer el PDF de la factura {factura.id_factura}: {str(e)}")
+        page_count, metadata = factura.page_count, {"error": str(e)}
+
+    metadata["bytes_leidos"] = archivo.bytes_leidos
+    metadata["peticiones"] = archivo.peticiones
+    factura.page_count = page_count
+    factura.metadata_pdf = metadata
+    return factura
+
+
+def extraer_metadata_factura(id_factura):
+    """Tarea de segundo plano para una factura recién subida."""
+    factura = DocumentFacturas.objects.only('id_factura', 'file_url', 'file_size', 'page_count').filter(
+        id_factura=id_factura
+    ).first()
+    if factura is None or not factura.file_url:
+        return
+    extraer_metadata(factura)
+    DocumentFacturas.objects.filter(id_factura=id_factura).update(
+        page_count=factura.page_count, metadata_pdf=factura.metadata_pdf
+    )
@@ -0,0 +1,253 @@
+"""
+Resumen diario de despachos para el dashboard.
+
+La tabla ResumenDespachoDiario guarda cuántas notas hay por día de despacho
+(fecha local), comuna del cliente y despacho_retira. Las señales de Notas y
+Clientes la mantienen al día en la misma transacción del cambio; las escrituras
+masivas (bulk_create, update) no disparan señales, así que después de ellas hay
+que correr `manage.py reconstruir_resumen_despachos`.
+
+Una combinación puede quedar repartida en más de una fila (dos altas
+concurrentes de la misma clave), por eso las lecturas siempre suman.
+
+La reconstrucción y `resumen_directo` leen las notas con una sola consulta
+agrupada y cuentan por día local en una pasada con pandas.
+
+Las respuestas por rango de días se guardan en el cache de Django junto a su
+ETag, con una clave que incluye una versión por día. Al confirmarse un cambio
+en la tabla se renueva la versión de los días tocados, así que solo los rangos
+que los contienen dejan de encontrarse, sin registro compartido ni locks. Con
+varios procesos el cache debe ser compartido (CACHES en settings); si no, cada
+proceso puede servir su copia hasta RESUMEN_CACHE_TIMEOUT.
+"""
+import hashlib
+import json
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, time, timezone as dt_timezone
+from functools import partial
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from .models import Notas, ResumenDespachoDiario
+
+
+def dia_local(fecha):
+    """Día de despacho en la zona horaria del proyecto."""
+    return timezone.localdate(fecha) if timezone.is_aware(fecha) else fecha.date()
+
+
+def clave_nota(fecha_despacho, despacho_retira, comuna):
+    return (dia_local(fecha_despacho), comuna, despacho_retira)
+
+
+def ajustar(clave, delta):
+    """Suma `delta` notas a la combinación (dia, comuna, despacho_retira)."""
+    if not delta:
+        return
+    dia, comuna, despacho_retira = clave
+    filas = ResumenDespachoDiario.objects.filter(dia=dia, comuna=comuna, despacho_retira=despacho_retira)
+    if not filas.update(total=F('total') + delta):
+        ResumenDespachoDiario.objects.create(dia=dia, comuna=comuna, despacho_retira=despacho_retira, total=delta)
+
+
+def ajustar_conteos(conteos):
+    """Aplica un Counter {clave: delta} y borra las combinaciones que quedan en cero."""
+    for clave, delta in conteos.items():
+        ajustar(clave, delta)
+    if any(delta < 0 for delta in conteos.values()):
+        ResumenDespachoDiario.objects.filter(total__lte=0).delete()
+
+    dias = {dia for (dia, _, _), delta in conteos.items() if delta}
+    if dias:
+        transaction.on_commit(partial(invalidar_cache, dias))
+
+
+def agrupar_notas(filas):
+    """
+    Cuenta las notas por (dia, comuna, despacho_retira) en una pasada vectorizada
+    a partir de filas (fecha_despacho, despacho_retira, comuna, total).
+    Retorna una lista de tuplas (dia, comuna, despacho_retira, total).
+    """
+    df = pd.DataFrame.from_records(filas, columns=['fecha_despacho', 'despacho_retira', 'comuna', 'total'])
+    if df.empty:
+        return []
+
+    fechas = pd.to_datetime(df['fecha_despacho'], utc=settings.USE_TZ)
+    if settings.USE_TZ:
+        fechas = fechas.dt.tz_convert(timezone.get_current_timezone_name())
+    df['dia'] = fechas.dt.date
+
+    conteos = df.groupby(['dia', 'comuna', 'despacho_retira'], dropna=False, sort=False)['total'].sum().reset_index()
+    conteos = conteos.astype(object).where(conteos.notna(), None)
+    return list(conteos.itertuples(index=False, name=None))
+
+
+def filas_notas(dia_inicio=None, dia_fin=None):
+    """
+    Notas agrupadas por hora UTC, comuna y despacho_retira en una sola consulta,
+    opcionalmente entre dos días locales (incluidos). La zona horaria del
+    proyecto tiene desfases de horas enteras, así que cada hora cae en un solo
+    día local; truncar en UTC evita depender de las tablas de zonas de MySQL.
+    """
+    notas = Notas.objects.all()
+    if dia_inicio is not None:
+        notas = notas.filter(fecha_despacho__gte=timezone.make_aware(datetime.combine(dia_inicio, time.min)))
+    if dia_fin is not None:
+        notas = notas.filter(fecha_despacho__lte=timezone.make_aware(datetime.combine(dia_fin, time.max)))
+    return (
+        notas.annotate(hora=TruncHour('fecha_despacho', tzinfo=dt_timezone.utc))
+        .values_list('hora', 'despacho_retira', 'cliente__comuna')
+        .annotate(total=Count('id_nota'))
+        .order_by()
+    )
+
+
+def reconstruir(dia_inicio=None, dia_fin=None):
+    """Recalcula la tabla desde notas, completa o solo entre dos días."""
+    conteos = agrupar_notas(filas_notas(dia_inicio, dia_fin))
+
+    with transaction.atomic():
+        filas = ResumenDespachoDiario.objects.all()
+        if dia_inicio is not None:
+            filas = filas.filter(dia__gte=dia_inicio)
+        if dia_fin is not None:
+            filas = filas.filter(dia__lte=dia_fin)
+        filas.delete()
+        ResumenDespachoDiario.objects.bulk_create(
+            [
+                ResumenDespachoDiario(dia=dia, comuna=comuna, despacho_retira=despacho_retira, total=total)
+                for dia, comuna, despacho_retira, total in conteos
+            ],
+            batch_size=1000,
+        )
+        transaction.on_commit(invalidar_cache)
+    return len(conteos)
+
+
+def mover_comuna(id_cliente, comuna_anterior, comuna_nueva):
+    """Traslada las notas de un cliente que cambió de comuna."""
+    filas = Notas.objects.filter(cliente_id=id_cliente).values_list('fecha_despacho', 'despacho_retira')
+    conteos = Counter()
+    for fecha_despacho, despacho_retira in filas:
+        conteos[clave_nota(fecha_despacho, despacho_retira, comuna_anterior)] -= 1
+        conteos[clave_nota(fecha_despacho, despacho_retira, comuna_nueva)] += 1
+    ajustar_conteos(conteos)
+
+
+def armar_resumen(conteos):
+    """
+    Arma los bloques del dashboard (total, por estado, por día y por comuna)
+    desde conteos (dia, comuna, despacho_retira, total).
+    """
+    total = 0
+    por_estado, por_dia, por_comuna = defaultdict(int), defaultdict(int), defaultdict(int)
+    for dia, comuna, despacho_retira, n in conteos:
+        total += n
+        por_estado[despacho_retira] += n
+        por_dia[dia] += n
+        por_comuna[(comuna, despacho_retira)] += n
+
+    return {
+        'total': total,
+        'por_estado': sorted(
+            ({'despacho_retira': estado, 'total': n} for estado, n in por_estado.items()),
+            key=lambda item: (-item['total'], item['despacho_retira'] or ''),
+        ),
+        'por_dia': [{'dia': dia, 'total': por_dia[dia]} for dia in sorted(por_dia)],
+        'por_comuna': sorted(
+            (
+                {'cliente__comuna': comuna, 'despacho_retira': estado, 'total': n}
+                for (comuna, estado), n in por_comuna.items()
+            ),
+            key=lambda item: (-item['total'], item['cliente__comuna'], item['despacho_retira'] or ''),
+        ),
+    }
+
+
+def resumen_notas(dia_inicio, dia_fin):
+    """
+    Totales del dashboard entre dos días (incluidos) con una sola consulta a la
+    tabla de resumen.
+    """
+    filas = (
+        ResumenDespachoDiario.objects.filter(dia__range=(dia_inicio, dia_fin))
+        .values_list('dia', 'comuna', 'despacho_retira')
+        .annotate(total=Sum('total'))
+    )
+    return armar_resumen(filas)
+
+
+def resumen_directo(dia_inicio, dia_fin):
+    """
+    Los mismos totales leyendo las notas una sola vez, sin la tabla de resumen.
+    """
+    return armar_resumen(agrupar_notas(filas_notas(dia_inicio, dia_fin)))
+
+
+PREFIJO_CACHE = 'resumen_despachos'
+CLAVE_VERSION_GLOBAL = f'{PREFIJO_CACHE}:version'
+
+
+def _clave_dia(dia):
+    return f'{PREFIJO_CACHE}:version:{dia.isoformat()}'
+
+
+def _nueva_version():
+    return uuid.uuid4().hex
+
+
+def _versiones(claves):
+    """
+    Versión actual de cada clave. Las que faltan se crean con `cache.add`, que
+    no pisa la que otro proceso haya creado entremedio.
+    """
+    versiones = cache.get_many(claves)
+    faltantes = [clave for clave in claves if clave not in versiones]
+    if faltantes:
+        for clave in faltantes:
+            cache.add(clave, _nueva_version(), None)
+        versiones.update(cache.get_many(faltantes))
+    return [versiones.get(clave, '') for clave in claves]
+
+
+def _clave_cache(dia_inicio, dia_fin):
+    """
+    Clave del rango que incluye la versión global y la de cada día, así un
+    cambio en cualquier día del rango lleva a otra clave sin borrar nada.
+    """
+    dias = pd.date_range(dia_inicio, dia_fin).date
+    versiones = _versiones([CLAVE_VERSION_GLOBAL] + [_clave_dia(dia) for dia in dias])
+    huella = hashlib.md5(':'.join(versiones).encode()).hexdigest()
+    return f'{PREFIJO_CACHE}:{dia_inicio.isoformat()}:{dia_fin.isoformat()}:{huella}'
+
+
+def invalidar_cache(dias=None):
+    """
+    Cambia la versión de `dias` (o la global si es None). Los rangos que los
+    contienen pasan a otra clave y las entradas viejas vencen por timeout.
+    """
+    if dias is None:
+        cache.set(CLAVE_VERSION_GLOBAL, _nueva_version(), None)
+    else:
+        cache.set_many({_clave_dia(dia): _nueva_version() for dia in dias}, None)
+
+
+def resumen_cacheado(dia_inicio, dia_fin):
+    """
+    Retorna (resumen, etag) del rango, calculándolo con `resumen_notas` si no
+    está en cache.
+    """
+    clave = _clave_cache(dia_inicio, dia_fin)
+    entrada = cache.get(clave)
+    if entrada is None:
+        datos = resumen_notas(dia_inicio, dia_fin)
+        contenido = json.dumps(datos, cls=DjangoJSONEncoder, sort_keys=True)
+        entrada = (datos, f'"{hashlib.md5(contenido.encode()).hexdigest()}"')
+        cache.set(clave, entrada, getattr(settings, 'RESUMEN_CACHE_TIMEOUT', 10 * 60))
+    return entrada
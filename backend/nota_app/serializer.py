@@ -1,8 +1,8 @@
 from rest_framework import serializers
-from .models import Usuarios, Notas, Clientes, Productos, Proveedores, Personal, Sabado, PedidoMateriasPrimas, DocumentFacturas, NotaProducto, ProductoProveedor
-import boto3
+from .models import Usuarios, Notas, Clientes, Productos, Proveedores, Personal, Sabado, PedidoMateriasPrimas, DocumentFacturas, NotaProducto, ProductoProveedor, ImportacionExcel
 from django.conf import settings
-from urllib.parse import quote, urlparse
+from urllib.parse import quote
+from .almacenamiento import PREFIJO_FACTURAS, obtener_cliente_s3, key_desde_url, url_desde_key, normalizar_nombre_archivo, urls_firmadas
 
 class UsuariosSerializer(serializers.ModelSerializer):
     
@@ -265,50 +265,54 @@ class DocumentFacturasSerializer(serializers.ModelSerializer):
         model = DocumentFacturas
         fields = ['id_factura', 'title', 'empresa', 'observacion', 
               'file_url', 'file_size', 'created_at', 'updated_at',
-              'usuario_creador', 'estado', 'page_count','signed_url', 'download_url']
-        read_only_fields = ['id_usuario', 'created_at', 'updated_at', 'file_url']
+              'usuario_creador', 'estado', 'page_count', 'metadata_pdf', 'signed_url', 'download_url']
+        read_only_fields = ['id_usuario', 'created_at', 'updated_at', 'file_url', 'metadata_pdf']
+
+    URL_EXPIRA = 24 * 60 * 60
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # ?urls=false lista sin firmar; las URLs se piden por factura con la acción url
+        request = self.context.get('request')
+        if request is not None and request.query_params.get('urls', '').lower() == 'false':
+            fields.pop('signed_url')
+            fields.pop('download_url')
+        return fields
 
     def _generate_presigned_url(self, obj, for_download=False):
         if not obj.file_url:
             return None
 
-
-        s3 = boto3.client(
-            "s3",
-            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name="auto",
-        )
-
-        parsed = urlparse(obj.file_url)
-        key = parsed.path.split('/', 2)[-1]
-        key = quote(key, safe="/")
-
-        try:
-            params = {
-                "Bucket": settings.AWS_STORAGE_BUCKET_NAME, 
-                "Key": key
-            }
-            
-            # Diferentes parámetros según el propósito
-            if for_download:
-                filename = f"{obj.title}.pdf" if obj.title else "archivo.pdf"
-                params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
-                params["ResponseContentType"] = "application/octet-stream"
-            else:
-                # Para ver: permitir que el navegador decida cómo manejar el PDF
-                params["ResponseContentDisposition"] = "inline"
-
-            url = s3.generate_presigned_url(
-                "get_object",
-                Params=params,
-                ExpiresIn=24 * 60 * 60,
-            )
-            return url
-        except Exception as e:
-            print("Error generando signed_url:", e)
-            return None
+        key = quote(key_desde_url(obj.file_url), safe="/")
+        disposicion = "attachment" if for_download else "inline"
+
+        def generar():
+            try:
+                params = {
+                    "Bucket": settings.AWS_STORAGE_BUCKET_NAME, 
+                    "Key": key
+                }
+                
+                # Diferentes parámetros según el propósito
+                if for_download:
+                    filename = f"{obj.title}.pdf" if obj.title else "archivo.pdf"
+                    params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+                    params["ResponseContentType"] = "application/octet-stream"
+                else:
+                    # Para ver: permitir que el navegador decida cómo manejar el PDF
+                    params["ResponseContentDisposition"] = "inline"
+
+                return obtener_cliente_s3().generate_presigned_url(
+                    "get_object",
+                    Params=params,
+                    ExpiresIn=self.URL_EXPIRA,
+                )
+            except Exception as e:
+                print("Error generando signed_url:", e)
+                return None
+
+        # La key del objeto no cambia, así que la URL sirve hasta poco antes de expirar
+        return urls_firmadas.obtener((key, disposicion, obj.title), generar, self.URL_EXPIRA)
         
     def get_signed_url(self, obj):
         """URL para VER el archivo (se abre en el navegador)"""
@@ -325,30 +329,40 @@ class DocumentFacturasSerializer(serializers.ModelSerializer):
         file_obj = request.FILES.get("file")
         if file_obj:
             # Normalizar nombre del archivo
-            import re
-            file_name = re.sub(r"\s+", "_", file_obj.name)
-            file_name = re.sub(r"[^a-zA-Z0-9_.-]", "", file_name)
-
-            key = f"facturas/{file_name}"
-
-            s3 = boto3.client(
-                "s3",
-                endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name="auto",
-            )
+            key = f"{PREFIJO_FACTURAS}{normalizar_nombre_archivo(file_obj.name)}"
 
+            s3 = obtener_cliente_s3()
             s3.upload_fileobj(file_obj, settings.AWS_STORAGE_BUCKET_NAME, key)
 
             # Guardamos la URL base en la DB
-            validated_data["file_url"] = f"{settings.AWS_S3_ENDPOINT_URL}/{settings.AWS_STORAGE_BUCKET_NAME}/{key}"
+            validated_data["file_url"] = url_desde_key(key)
             validated_data["file_size"] = file_obj.size
 
         return super().create(validated_data)
     
 
 
+class SolicitudSubidaFacturaSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=200)
+    content_type = serializers.ChoiceField(choices=['application/pdf'], default='application/pdf')
+    file_size = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_file_size(self, value):
+        if value > settings.FACTURAS_MAX_BYTES:
+            raise serializers.ValidationError(f"El archivo supera el máximo de {settings.FACTURAS_MAX_BYTES} bytes.")
+        return value
+
+
+class ConfirmarSubidaFacturaSerializer(serializers.Serializer):
+    key = serializers.CharField(max_length=400)
+
+    def validate_key(self, value):
+        # Solo se aceptan keys emitidas por solicitar-subida
+        if not value.startswith(PREFIJO_FACTURAS) or '..' in value:
+            raise serializers.ValidationError("Key inválida.")
+        return value
+    
+
 class NotaProductoSerializer(serializers.ModelSerializer):
     # lectura: objeto anidado
     nota = NotasSerializer(read_only=True)
@@ -399,3 +413,65 @@ class NotaProductoSerializer(serializers.ModelSerializer):
         validated_data['usuario_modificacion'] = self.context['request'].user
         return super().update(instance, validated_data)
 
+
+class NotaLoteSerializer(serializers.ModelSerializer):
+    """
+    Un elemento de /nota/lote/. Valida solo el formato; la unicidad de
+    num_nota y el cliente se resuelven para todo el lote en masivo.py.
+    """
+    id_nota = serializers.IntegerField(required=False)
+    rut_cliente = serializers.CharField(write_only=True)
+    guardar_cliente = serializers.BooleanField(write_only=True, required=False, default=False)
+    razon_social = serializers.CharField(write_only=True, required=False)
+    direccion = serializers.CharField(write_only=True, required=False)
+    comuna = serializers.CharField(write_only=True, required=False)
+    telefono = serializers.CharField(write_only=True, required=False)
+    correo = serializers.CharField(write_only=True, required=False)
+    contacto = serializers.CharField(write_only=True, required=False)
+
+    class Meta:
+        model = Notas
+        fields = [
+            'id_nota', 'num_nota', 'fecha_despacho', 'estado_solicitud', 'observacion',
+            'despacho_retira', 'horario_desde', 'horario_hasta',
+            'rut_cliente', 'guardar_cliente', 'razon_social', 'direccion', 'comuna',
+            'telefono', 'correo', 'contacto',
+        ]
+        extra_kwargs = {'num_nota': {'validators': []}}
+
+
+class NotaProductoLoteSerializer(serializers.ModelSerializer):
+    """
+    Un elemento de /notas_productos/lote/. La nota, el producto y el par
+    (nota, producto) se verifican para todo el lote en masivo.py.
+    """
+    id = serializers.IntegerField(required=False)
+    nota_id = serializers.IntegerField(required=False, allow_null=True)
+    producto_id = serializers.IntegerField()
+
+    class Meta:
+        model = NotaProducto
+        fields = ['id', 'nota_id', 'producto_id', 'cantidad', 'tipo', 'observacion', 'estado']
+        validators = []
+
+
+class ImportacionExcelSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id_importacion', read_only=True)
+    usuario_creador = serializers.CharField(source='id_usuario.username', read_only=True)
+
+    class Meta:
+        model = ImportacionExcel
+        fields = [
+            'job_id', 'nombre_archivo', 'estado',
+            'total_filas', 'filas_procesadas', 'filas_omitidas', 'omitidas_por_motivo', 'omitidas', 'error',
+            'usuario_creador', 'fecha_creacion', 'fecha_modificacion',
+        ]
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # El detalle de filas omitidas solo se envía al terminar, el polling lleva los contadores
+        if instance.estado != 'TERMINADO':
+            data.pop('omitidas')
+        return data
+
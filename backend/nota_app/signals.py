@@ -0,0 +1,105 @@
+"""
+Señales que mantienen las tablas derivadas al día.
+"""
+from collections import Counter
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Notas, Clientes, Productos, Proveedores, Personal, DocumentFacturas
+from . import busqueda, resumen, sincronizacion, typeahead
+from .catalogo import catalogo_productos
+
+
+@receiver(pre_save, sender=Notas)
+def guardar_clave_anterior_nota(sender, instance, raw=False, **kwargs):
+    instance._clave_resumen_anterior = None
+    if raw or instance.pk is None:
+        return
+    anterior = Notas.objects.filter(pk=instance.pk).values_list(
+        'fecha_despacho', 'despacho_retira', 'cliente__comuna'
+    ).first()
+    if anterior is not None:
+        instance._clave_resumen_anterior = resumen.clave_nota(*anterior)
+
+
+@receiver(post_save, sender=Notas)
+def actualizar_resumen_nota(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    comuna = Clientes.objects.values_list('comuna', flat=True).get(pk=instance.cliente_id)
+    nueva = resumen.clave_nota(instance.fecha_despacho, instance.despacho_retira, comuna)
+    anterior = getattr(instance, '_clave_resumen_anterior', None)
+    if anterior == nueva:
+        return
+
+    conteos = Counter({nueva: 1})
+    if anterior is not None:
+        conteos[anterior] -= 1
+    resumen.ajustar_conteos(conteos)
+
+
+@receiver(post_delete, sender=Notas)
+def descontar_resumen_nota(sender, instance, **kwargs):
+    comuna = Clientes.objects.values_list('comuna', flat=True).filter(pk=instance.cliente_id).first()
+    if comuna is None:
+        return
+    resumen.ajustar_conteos(Counter({resumen.clave_nota(instance.fecha_despacho, instance.despacho_retira, comuna): -1}))
+
+
+@receiver(pre_save, sender=Clientes)
+def guardar_comuna_anterior(sender, instance, raw=False, **kwargs):
+    instance._comuna_anterior = None
+    if raw or instance.pk is None:
+        return
+    instance._comuna_anterior = Clientes.objects.values_list('comuna', flat=True).filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=Clientes)
+def actualizar_resumen_comuna(sender, instance, created=False, raw=False, **kwargs):
+    anterior = getattr(instance, '_comuna_anterior', None)
+    if raw or created or anterior is None or anterior == instance.comuna:
+        return
+    resumen.mover_comuna(instance.pk, anterior, instance.comuna)
+
+
+@receiver(post_save, sender=Clientes)
+@receiver(post_save, sender=Productos)
+@receiver(post_save, sender=Proveedores)
+@receiver(post_save, sender=DocumentFacturas)
+def indexar_busqueda(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    entidad = busqueda.entidad_de(sender)
+    _, campo = busqueda.ENTIDADES[entidad]
+    busqueda.indexar(entidad, instance.pk, getattr(instance, campo))
+    transaction.on_commit(partial(typeahead.invalidar, entidad))
+
+
+@receiver(post_delete, sender=Clientes)
+@receiver(post_delete, sender=Productos)
+@receiver(post_delete, sender=Proveedores)
+@receiver(post_delete, sender=DocumentFacturas)
+def desindexar_busqueda(sender, instance, **kwargs):
+    entidad = busqueda.entidad_de(sender)
+    busqueda.desindexar(entidad, instance.pk)
+    transaction.on_commit(partial(typeahead.invalidar, entidad))
+
+
+@receiver(post_save, sender=Productos)
+def refrescar_catalogo(sender, instance, **kwargs):
+    transaction.on_commit(catalogo_productos.marcar_cambio)
+
+
+@receiver(post_delete, sender=Productos)
+def quitar_del_catalogo(sender, instance, **kwargs):
+    transaction.on_commit(partial(catalogo_productos.quitar, instance.pk))
+
+
+@receiver(post_delete, sender=Notas)
+@receiver(post_delete, sender=Clientes)
+@receiver(post_delete, sender=Productos)
+@receiver(post_delete, sender=Proveedores)
+@receiver(post_delete, sender=Personal)
+def registrar_eliminacion(sender, instance, **kwargs):
+    sincronizacion.registrar_eliminacion(instance)
@@ -0,0 +1,109 @@
+"""
+Sincronización incremental de listados.
+
+Con ?sync_token= (o ?modified_since=<fecha ISO>) un listado devuelve solo
+las filas creadas o modificadas desde esa marca y los ids borrados desde
+entonces, más un sync_token nuevo para la próxima consulta. Un sync_token
+vacío pide la foto completa.
+
+Los borrados quedan en la tabla eliminaciones (señal post_delete). La marca
+del token se retrocede MARGEN para no perder filas de transacciones que se
+confirman después de leer; el cliente puede recibir una fila repetida y debe
+aplicarlas como upsert. Un token más antiguo que la retención de
+eliminaciones ya no es confiable y se responde 410 para que recargue todo.
+
+Cuando el listado se pagina, el sync_token nuevo se toma en la primera página
+y se repite en las siguientes con ?sync_marca=, para que los cambios hechos
+mientras el cliente recorre las páginas se vuelvan a pedir en la próxima
+sincronización.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Eliminacion
+
+MARGEN = timedelta(seconds=60)
+PARAMETRO_MARCA = 'sync_marca'
+
+
+class TokenInvalido(ValueError):
+    pass
+
+
+class TokenVencido(Exception):
+    pass
+
+
+def retencion():
+    return timedelta(days=getattr(settings, 'SINCRONIZACION_RETENCION_DIAS', 30))
+
+
+def codificar_token(fecha):
+    # Microsegundos desde epoch: opaco para el cliente y sin problemas en la URL
+    return str(int(fecha.timestamp() * 1_000_000))
+
+
+def decodificar_token(token):
+    try:
+        return datetime.fromtimestamp(int(token) / 1_000_000, tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        raise TokenInvalido('sync_token inválido')
+
+
+def marca_desde(query_params):
+    """
+    Fecha desde la que se piden cambios, o None para la foto completa.
+    Lanza TokenInvalido si el parámetro no se puede leer y TokenVencido si es
+    más antiguo que la retención de eliminaciones.
+    """
+    if 'sync_token' in query_params:
+        token = query_params['sync_token'].strip()
+        desde = decodificar_token(token) if token else None
+    else:
+        desde = parse_datetime(query_params.get('modified_since', '').strip())
+        if desde is None:
+            raise TokenInvalido('modified_since debe ser una fecha ISO 8601')
+        if timezone.is_naive(desde):
+            desde = timezone.make_aware(desde)
+
+    if desde is not None and desde < timezone.now() - retencion():
+        raise TokenVencido()
+    return desde
+
+
+def marca_paginas(query_params):
+    """sync_token fijado en la primera página de un recorrido paginado, o None."""
+    marca = query_params.get(PARAMETRO_MARCA, '').strip()
+    if not marca:
+        return None
+    decodificar_token(marca)
+    return marca
+
+
+def cambios(queryset, campo_modificacion, entidad, desde):
+    """
+    Retorna (queryset de filas cambiadas, ids eliminados, sync_token nuevo).
+    La marca nueva se toma antes de leer para no saltarse cambios concurrentes.
+    """
+    token = codificar_token(timezone.now() - MARGEN)
+    if desde is None:
+        return queryset, [], token
+
+    eliminados = Eliminacion.objects.filter(entidad=entidad, fecha__gte=desde).values_list('id_objeto', flat=True)
+    return (
+        queryset.filter(**{f'{campo_modificacion}__gte': desde}),
+        sorted(set(eliminados)),
+        token,
+    )
+
+
+def registrar_eliminacion(instancia):
+    Eliminacion.objects.create(entidad=instancia._meta.model_name, id_objeto=instancia.pk)
+
+
+def purgar(antes_de=None):
+    """Borra las eliminaciones más antiguas que la retención. Retorna cuántas."""
+    antes_de = antes_de or timezone.now() - retencion()
+    borradas, _ = Eliminacion.objects.filter(fecha__lt=antes_de).delete()
+    return borradas
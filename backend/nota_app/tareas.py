@@ -0,0 +1,111 @@
+"""
+Ejecución en segundo plano de tareas largas sin un broker externo.
+
+Las tareas se guardan en la base de datos (ImportacionExcel) y se ejecutan en
+un pool de hilos del mismo proceso. Si el proceso (el worker de gunicorn) se
+reinicia antes de terminar, la tarea en PROCESANDO deja de avanzar: pasado
+TAREAS_ABANDONO_SEGUNDOS sin avance se marca ERROR al consultarla o al encolar
+otra (`marcar_abandonadas`), y se puede volver a subir el archivo. Las que
+quedaron en PENDIENTE las retoma `manage.py procesar_importaciones`, y
+`manage.py extraer_metadata_facturas` completa las facturas sin páginas.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+from .importacion import leer_planilla_por_bloques, importar_nota_productos
+from .models import ImportacionExcel
+from .pdf import extraer_metadata_factura
+
+logger = logging.getLogger(__name__)
+
+# Cada bloque de la carga actualiza fecha_modificacion; sin avance en este
+# tiempo se asume que el proceso que la ejecutaba ya no existe
+ABANDONO = timedelta(seconds=getattr(settings, 'TAREAS_ABANDONO_SEGUNDOS', 600))
+MENSAJE_ABANDONO = 'La carga se interrumpió porque el servidor se reinició. Vuelve a subir el archivo.'
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'TAREAS_MAX_WORKERS', 2),
+    thread_name_prefix='tareas',
+)
+
+
+def en_segundo_plano(funcion, *args):
+    """
+    Envía `funcion(*args)` al pool cuando la transacción actual se confirma,
+    así el hilo ve las filas recién creadas. Cierra las conexiones del hilo al
+    terminar.
+    """
+    def ejecutar():
+        close_old_connections()
+        try:
+            funcion(*args)
+        except Exception:
+            logger.exception(f"Error en tarea de segundo plano {funcion.__name__}")
+        finally:
+            connections.close_all()
+
+    transaction.on_commit(lambda: _executor.submit(ejecutar))
+
+
+def procesar_importacion(id_importacion):
+    """Ejecuta una ImportacionExcel pendiente y registra su avance por bloque."""
+    # Solo un proceso puede tomar la tarea
+    tomada = ImportacionExcel.objects.filter(
+        id_importacion=id_importacion, estado='PENDIENTE'
+    ).update(estado='PROCESANDO', fecha_modificacion=timezone.now())
+    if not tomada:
+        return
+
+    importacion = ImportacionExcel.objects.select_related('id_usuario').get(id_importacion=id_importacion)
+
+    def progreso(total_filas, procesadas, total_omitidas):
+        ImportacionExcel.objects.filter(id_importacion=id_importacion).update(
+            total_filas=total_filas,
+            filas_procesadas=procesadas,
+            filas_omitidas=total_omitidas,
+            fecha_modificacion=timezone.now(),
+        )
+
+    try:
+        with importacion.archivo.open('rb') as archivo:
+            reporte = importar_nota_productos(
+                leer_planilla_por_bloques(archivo), importacion.id_usuario, progreso=progreso
+            )
+    except Exception as e:
+        logger.error(f"Error en importación {id_importacion}: {str(e)}", exc_info=True)
+        ImportacionExcel.objects.filter(id_importacion=id_importacion).update(estado='ERROR', error=str(e))
+        return
+
+    # El archivo ya no se necesita una vez cargado
+    importacion.archivo.storage.delete(importacion.archivo.name)
+    importacion.archivo = ''
+
+    importacion.total_filas = reporte['total_filas']
+    importacion.filas_procesadas = reporte['procesadas']
+    importacion.filas_omitidas = reporte['total_omitidas']
+    importacion.omitidas_por_motivo = reporte['omitidas_por_motivo']
+    importacion.omitidas = reporte['omitidas']
+    importacion.estado = 'TERMINADO'
+    importacion.save()
+
+
+def marcar_abandonadas(**filtros):
+    """
+    Marca ERROR las importaciones en PROCESANDO que no avanzan hace más de
+    ABANDONO (su hilo murió con el proceso). Retorna cuántas marcó.
+    """
+    return ImportacionExcel.objects.filter(
+        estado='PROCESANDO', fecha_modificacion__lt=timezone.now() - ABANDONO, **filtros
+    ).update(estado='ERROR', error=MENSAJE_ABANDONO, fecha_modificacion=timezone.now())
+
+
+def encolar_importacion(importacion):
+    marcar_abandonadas()
+    en_segundo_plano(procesar_importacion, importacion.id_importacion)
+
+
+def encolar_metadata_factura(factura):
+    en_segundo_plano(extraer_metadata_factura, factura.id_factura)
@@ -0,0 +1,1337 @@
+import io
+import json
+import time
+from unittest import mock
+from openpyxl import Workbook, load_workbook
+from PyPDF2 import PdfWriter
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from . import almacenamiento, busqueda, exportacion, importacion, masivo, pdf, resumen, sincronizacion, tareas, typeahead
+from .catalogo import catalogo_productos
+from .serializer import ProductosSerializer
+from .models import Usuarios, Notas, Clientes, Productos, Proveedores, Personal, PedidoMateriasPrimas, NotaProducto, DocumentFacturas, ResumenDespachoDiario, IndiceBusqueda, ImportacionExcel
+from .views import NotasView, NotaProductoView, DocumentFacturasView
+
+
+# Bucket y credenciales ficticias: las pruebas con S3 no dependen del .env.
+# Firmar URLs no se conecta al bucket; lo demás se reemplaza con mocks.
+bucket_de_prueba = override_settings(
+    AWS_STORAGE_BUCKET_NAME='test-bucket',
+    AWS_S3_ENDPOINT_URL='https://example.invalid',
+    AWS_ACCESS_KEY_ID='test',
+    AWS_SECRET_ACCESS_KEY='test',
+)
+
+
+class ListadoQueryCountTest(APITestCase):
+    """
+    El número de consultas de un listado no debe crecer con la cantidad de filas.
+    """
+
+    endpoints = [
+        '/api/v1/nota/',
+        '/api/v1/cliente/',
+        '/api/v1/productos/',
+        '/api/v1/proveedores/',
+        '/api/v1/personal/',
+        '/api/v1/pedido_materias_primas/',
+        '/api/v1/notas_productos/',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.modificador = Usuarios.objects.create_user(username='modificador', password='x', rut='2-7')
+        self.client.force_authenticate(self.usuario)
+        self.creados = 0
+
+    def crear_filas(self, cantidad):
+        usuarios = {'id_usuario': self.usuario, 'id_usuario_modificacion': self.modificador}
+        for _ in range(cantidad):
+            i = self.creados
+            self.creados += 1
+            cliente = Clientes.objects.create(
+                razon_social=f'Cliente {i}', rut_cliente=f'{i}-C', direccion='Calle 1', comuna='SANTIAGO', **usuarios
+            )
+            producto = Productos.objects.create(nombre=f'Producto {i}', codigo=f'P{i}', **usuarios)
+            proveedor = Proveedores.objects.create(
+                razon_social=f'Proveedor {i}', rut_proveedor=f'{i}-P', direccion='Calle 2', comuna='MAIPU', **usuarios
+            )
+            Personal.objects.create(nombre=f'Nombre {i}', apellido='Apellido', rut=f'{i}-R', **usuarios)
+            nota = Notas.objects.create(num_nota=i, cliente=cliente, fecha_despacho=timezone.now(), **usuarios)
+            PedidoMateriasPrimas.objects.create(id_producto=producto, id_proveedor=proveedor, cantidad=1, **usuarios)
+            NotaProducto.objects.create(
+                nota=nota, producto=producto, cantidad=1,
+                usuario_creacion=self.usuario, usuario_modificacion=self.modificador,
+            )
+
+    def contar_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_queries_constantes_al_crecer_las_filas(self):
+        self.crear_filas(2)
+        iniciales = {url: self.contar_queries(url) for url in self.endpoints}
+
+        self.crear_filas(8)
+        for url in self.endpoints:
+            with self.subTest(url=url):
+                self.assertEqual(self.contar_queries(url), iniciales[url])
+
+
+class PaginacionCursorTest(APITestCase):
+    """
+    Los listados grandes se entregan por páginas siguiendo el cursor.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        cliente = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        ahora = timezone.now()
+        # Dos notas con la misma fecha: el desempate por id mantiene el orden estable
+        for numero, dias in [(1, 0), (2, 1), (3, 1), (4, 2), (5, 3)]:
+            Notas.objects.create(
+                num_nota=numero, cliente=cliente, fecha_despacho=ahora - timezone.timedelta(days=dias), id_usuario=self.usuario
+            )
+
+    def recorrer(self, params):
+        response = self.client.get('/api/v1/nota/', params)
+        paginas = [response.data]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            paginas.append(response.data)
+        return paginas
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        paginas = self.recorrer({'page_size': 2})
+        self.assertEqual([len(pagina['results']) for pagina in paginas], [2, 2, 1])
+        self.assertIsNone(paginas[0]['previous'])
+        numeros = [nota['num_nota'] for pagina in paginas for nota in pagina['results']]
+        # Orden por defecto: -fecha_despacho, -id_nota
+        self.assertEqual(numeros, [1, 3, 2, 4, 5])
+
+        paginas = self.recorrer({'page_size': 2, 'ordering': 'num_nota'})
+        self.assertEqual([nota['num_nota'] for pagina in paginas for nota in pagina['results']], [1, 2, 3, 4, 5])
+
+    def test_tamano_maximo_y_sin_paginar(self):
+        response = self.client.get('/api/v1/nota/', {'page_size': 5000})
+        self.assertEqual(len(response.data['results']), 5)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/nota/', {'paginar': 'false'})
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+        self.assertFalse([q for q in ctx.captured_queries if 'LIMIT' in q['sql'] and 'notas' in q['sql']])
+
+
+class PickingCompactoTest(APITestCase):
+    """
+    ?view=compact entrega filas planas para el grid de picking en una consulta.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        cliente = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        self.nota = Notas.objects.create(num_nota=7, cliente=cliente, fecha_despacho=timezone.now(), id_usuario=self.usuario)
+        self.productos = [
+            Productos.objects.create(nombre=f'Producto {i}', codigo=f'P{i}', id_usuario=self.usuario) for i in range(6)
+        ]
+
+    def listar(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/notas_productos/', {'view': 'compact'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], len(ctx.captured_queries)
+
+    def test_campos_y_consultas(self):
+        NotaProducto.objects.create(nota=self.nota, producto=self.productos[0], cantidad=2, usuario_creacion=self.usuario)
+        # Sin nota: las columnas de la nota vienen vacías, no se pierde la fila
+        NotaProducto.objects.create(producto=self.productos[1], cantidad=1, usuario_creacion=self.usuario)
+        filas, consultas = self.listar()
+
+        esperados = {*NotaProductoView.campos_compactos, *NotaProductoView.campos_compactos_relacionados}
+        self.assertEqual([set(fila) for fila in filas], [esperados, esperados])
+        con_nota = next(fila for fila in filas if fila['id_nota'])
+        self.assertEqual(
+            (con_nota['num_nota'], con_nota['razon_social_cliente'], con_nota['producto_codigo'], con_nota['usuario_creador']),
+            (7, 'Panadería', 'P0', 'tester'),
+        )
+        self.assertIsNone(next(fila for fila in filas if not fila['id_nota'])['num_nota'])
+        self.assertEqual(consultas, 1)
+
+        for producto in self.productos[2:]:
+            NotaProducto.objects.create(nota=self.nota, producto=producto, cantidad=1, usuario_creacion=self.usuario)
+        filas, consultas = self.listar()
+        self.assertEqual((len(filas), consultas), (6, 1))
+
+
+@bucket_de_prueba
+class SubidaDirectaFacturasTest(APITestCase):
+    """
+    Subida en dos pasos: URL firmada para PUT al bucket y confirmación con HEAD.
+    El HEAD al bucket se reemplaza por un mock.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+
+    def solicitar(self, **datos):
+        return self.client.post('/api/v1/facturas/solicitar-subida/', {'file_name': 'mi factura.pdf', **datos}, format='json')
+
+    def confirmar(self, **datos):
+        return self.client.post('/api/v1/facturas/confirmar-subida/', {'title': 'F-1', **datos}, format='json')
+
+    def test_solicitar_entrega_url_put_con_key_del_servidor(self):
+        response = self.solicitar(file_size=1000)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['key'].startswith('facturas/'))
+        self.assertTrue(response.data['key'].endswith('_mi_factura.pdf'))
+        self.assertEqual(response.data['method'], 'PUT')
+        self.assertIn('X-Amz-Signature=', response.data['upload_url'])
+
+    def test_solicitar_rechaza_archivo_muy_grande(self):
+        with self.settings(FACTURAS_MAX_BYTES=100):
+            response = self.solicitar(file_size=101)
+        self.assertEqual(response.status_code, 400)
+
+    def test_confirmar_registra_tamano_real(self):
+        key = self.solicitar().data['key']
+        with mock.patch('nota_app.views.metadata_objeto', return_value={'ContentLength': 1234}):
+            response = self.confirmar(key=key, file_size=1)
+            repetida = self.confirmar(key=key)
+        self.assertEqual(response.status_code, 201)
+        factura = DocumentFacturas.objects.get(id_factura=response.data['id_factura'])
+        self.assertEqual(factura.file_size, 1234)
+        self.assertTrue(factura.file_url.endswith(key))
+        self.assertEqual(repetida.status_code, 409)
+
+    def test_confirmar_sin_objeto_en_bucket(self):
+        key = self.solicitar().data['key']
+        with mock.patch('nota_app.views.metadata_objeto', return_value=None):
+            response = self.confirmar(key=key)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DocumentFacturas.objects.exists())
+
+    def test_confirmar_rechaza_key_fuera_del_prefijo(self):
+        response = self.confirmar(key='otra/carpeta.pdf')
+        self.assertEqual(response.status_code, 400)
+
+    def test_archivo_muy_grande_borra_solo_la_key_emitida(self):
+        key = self.solicitar().data['key']
+        with mock.patch('nota_app.views.metadata_objeto', return_value={'ContentLength': 101}), \
+                mock.patch('nota_app.views.obtener_cliente_s3') as cliente, \
+                self.settings(FACTURAS_MAX_BYTES=100):
+            response = self.confirmar(key=key)
+            repetida = self.confirmar(key=key)
+        self.assertEqual(response.status_code, 400)
+        cliente.return_value.delete_object.assert_called_once_with(Bucket=mock.ANY, Key=key)
+        # La key ya no está pendiente: no se vuelve a consultar ni a borrar
+        self.assertEqual(repetida.status_code, 400)
+        self.assertEqual(cliente.return_value.delete_object.call_count, 1)
+        self.assertFalse(DocumentFacturas.objects.exists())
+
+    def test_no_toca_keys_que_no_se_solicitaron(self):
+        key = self.solicitar().data['key']
+        otro = Usuarios.objects.create_user(username='otro', password='x', rut='2-7')
+        self.client.force_authenticate(otro)
+        with mock.patch('nota_app.views.metadata_objeto', return_value={'ContentLength': 101}) as metadata, \
+                mock.patch('nota_app.views.obtener_cliente_s3') as cliente, \
+                self.settings(FACTURAS_MAX_BYTES=100):
+            ajena = self.confirmar(key=key)
+            inventada = self.confirmar(key='facturas/de_otra_subida.pdf')
+        self.assertEqual((ajena.status_code, inventada.status_code), (400, 400))
+        metadata.assert_not_called()
+        cliente.return_value.delete_object.assert_not_called()
+
+
+@bucket_de_prueba
+class UrlFacturaTest(APITestCase):
+    """
+    Acción url de facturas: firma bajo demanda con el cliente S3 compartido
+    (reemplazado por un mock) y reutiliza la URL mientras siga vigente.
+    """
+
+    def setUp(self):
+        cache.clear()
+        almacenamiento.urls_firmadas.limpiar()
+        self.addCleanup(almacenamiento.urls_firmadas.limpiar)
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        self.factura = DocumentFacturas.objects.create(
+            title='F-1', file_url=almacenamiento.url_desde_key('facturas/f 1.pdf'), file_size=10, id_usuario=self.usuario,
+        )
+
+        self.cliente = mock.Mock()
+        self.cliente.generate_presigned_url.side_effect = (
+            lambda operacion, Params, ExpiresIn: f"https://firmada/{Params['Key']}?n={self.cliente.generate_presigned_url.call_count}"
+        )
+        patcher = mock.patch('nota_app.serializer.obtener_cliente_s3', return_value=self.cliente)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def url(self, **params):
+        return self.client.get(f'/api/v1/facturas/{self.factura.id_factura}/url/', params)
+
+    def test_ver_y_descargar(self):
+        ver = self.url()
+        descargar = self.url(mode='download')
+
+        self.assertEqual(ver.status_code, 200)
+        self.assertEqual(set(ver.data), {'url'})
+        self.assertEqual(ver.data['url'], 'https://firmada/facturas/f%201.pdf?n=1')
+        self.assertEqual(descargar.data['url'], 'https://firmada/facturas/f%201.pdf?n=2')
+
+        kwargs_ver, kwargs_descarga = [llamada.kwargs for llamada in self.cliente.generate_presigned_url.call_args_list]
+        self.assertEqual(kwargs_ver['Params']['ResponseContentDisposition'], 'inline')
+        self.assertEqual(kwargs_descarga['Params']['ResponseContentDisposition'], 'attachment; filename="F-1.pdf"')
+        self.assertEqual(kwargs_ver['ExpiresIn'], 24 * 60 * 60)
+
+    def test_reutiliza_url_firmada(self):
+        primera = self.url()
+        segunda = self.url()
+        self.assertEqual(primera.data, segunda.data)
+        self.assertEqual(self.cliente.generate_presigned_url.call_count, 1)
+        self.assertEqual(almacenamiento.urls_firmadas.estadisticas()['hits'], 1)
+
+        # Cambiar el título cambia el nombre de descarga: no se reutiliza
+        DocumentFacturas.objects.filter(pk=self.factura.pk).update(title='F-2')
+        self.url()
+        self.assertEqual(self.cliente.generate_presigned_url.call_count, 2)
+
+    def test_modo_invalido(self):
+        response = self.url(mode='otro')
+        self.assertEqual(response.status_code, 400)
+        self.cliente.generate_presigned_url.assert_not_called()
+
+    def test_error_al_firmar(self):
+        self.cliente.generate_presigned_url.side_effect = Exception('sin credenciales')
+        with mock.patch('builtins.print'):
+            response = self.url()
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('error', response.data)
+
+
+class CacheUrlsFirmadasTest(TestCase):
+    """
+    URLs firmadas reutilizadas hasta poco antes de vencer, en ambos backends.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.firmadas = 0
+
+    def generar(self, url='https://bucket/f.pdf?firma'):
+        def firmar():
+            self.firmadas += 1
+            return url
+        return firmar
+
+    def test_memoria_lru(self):
+        urls = almacenamiento.CacheUrlsFirmadas(max_entradas=2, margen=10)
+        urls.obtener('a', self.generar('A'), 100)
+        urls.obtener('b', self.generar('B'), 100)
+        self.assertEqual(urls.obtener('a', self.generar('A2'), 100), 'A')
+        # 'b' es la menos usada y sale al agregar 'c'
+        urls.obtener('c', self.generar('C'), 100)
+        self.assertEqual(urls.obtener('a', self.generar('A3'), 100), 'A')
+        self.assertEqual(urls.obtener('b', self.generar('B2'), 100), 'B2')
+        self.assertEqual(urls.estadisticas(), {'backend': 'memoria', 'hits': 2, 'misses': 4, 'entradas': 2})
+
+        urls.limpiar()
+        self.assertEqual(urls.estadisticas()['hits'], 0)
+
+    def test_memoria_vencimiento(self):
+        urls = almacenamiento.CacheUrlsFirmadas(margen=10)
+        with mock.patch.object(almacenamiento.time, 'monotonic', return_value=1000.0) as reloj:
+            urls.obtener('a', self.generar(), 100)
+            reloj.return_value = 1089.0
+            urls.obtener('a', self.generar(), 100)
+            self.assertEqual(self.firmadas, 1)
+            # Vigencia = expira - margen: a los 90 s se firma de nuevo
+            reloj.return_value = 1090.0
+            urls.obtener('a', self.generar(), 100)
+            self.assertEqual(self.firmadas, 2)
+
+        # Sin vigencia útil o sin URL no se guarda nada
+        urls.obtener('b', self.generar(), 10)
+        urls.obtener('c', lambda: None, 100)
+        self.assertEqual(urls.estadisticas()['entradas'], 1)
+
+    # El reloj falso solo controla el vencimiento del cache en memoria
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_django(self):
+        urls = almacenamiento.CacheUrlsFirmadas(backend='django', margen=10)
+        with mock.patch('time.time', return_value=1000.0) as reloj:
+            urls.obtener('a', self.generar(), 100)
+            self.assertEqual(urls.obtener('a', self.generar('otra'), 100), 'https://bucket/f.pdf?firma')
+            reloj.return_value = 1091.0
+            self.assertEqual(urls.obtener('a', self.generar('otra'), 100), 'otra')
+            # Otra instancia (otro proceso) ve las mismas URLs
+            otra = almacenamiento.CacheUrlsFirmadas(backend='django', margen=10)
+            self.assertEqual(otra.obtener('a', self.generar('x'), 100), 'otra')
+        self.assertEqual(urls.estadisticas(), {'backend': 'django', 'hits': 1, 'misses': 2, 'entradas': None})
+
+
+@bucket_de_prueba
+class MetadataPdfTest(APITestCase):
+    """
+    El número de páginas se lee con peticiones por rango sin bajar el PDF completo.
+    """
+
+    def setUp(self):
+        writer = PdfWriter()
+        for _ in range(300):
+            writer.add_blank_page(600, 800)
+        writer.add_metadata({'/Title': 'Factura 1', '/Producer': 'tests'})
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        self.datos = buffer.getvalue()
+
+        cliente = mock.Mock()
+        cliente.get_object.side_effect = self.get_object
+        patcher = mock.patch.object(pdf, 'obtener_cliente_s3', return_value=cliente)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_object(self, Bucket, Key, Range):
+        inicio, fin = map(int, Range.removeprefix('bytes=').split('-'))
+        return {'Body': io.BytesIO(self.datos[inicio:fin + 1])}
+
+    def test_lee_paginas_y_metadatos_por_rangos(self):
+        archivo = pdf.ArchivoRemoto('facturas/f.pdf', len(self.datos), tamano_bloque=4096)
+        page_count, metadata = pdf.leer_metadata_pdf(archivo)
+        self.assertEqual(page_count, 300)
+        self.assertEqual(metadata['titulo'], 'Factura 1')
+        self.assertLess(archivo.bytes_leidos, len(self.datos) // 2)
+
+    def test_comando_completa_facturas_sin_paginas(self):
+        usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        factura = DocumentFacturas.objects.create(
+            id_usuario=usuario, title='F', file_url='https://s3.example.com/bucket/facturas/f.pdf',
+            file_size=len(self.datos),
+        )
+        call_command('extraer_metadata_facturas', stdout=io.StringIO())
+        factura.refresh_from_db()
+        self.assertEqual(factura.page_count, 300)
+        self.assertEqual(factura.metadata_pdf['productor'], 'tests')
+
+
+class ResumenDespachosTest(APITestCase):
+    """
+    La tabla de resumen sigue a las notas y el dashboard responde desde ella.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        self.santiago = Clientes.objects.create(
+            razon_social='A', rut_cliente='1-A', direccion='-', comuna='SANTIAGO', id_usuario=self.usuario
+        )
+        self.maipu = Clientes.objects.create(
+            razon_social='B', rut_cliente='2-B', direccion='-', comuna='MAIPU', id_usuario=self.usuario
+        )
+
+    def crear_nota(self, num, cliente, dia, hora=12, despacho='DESPACHO'):
+        fecha = timezone.make_aware(timezone.datetime(2025, 3, dia, hora, 0))
+        return Notas.objects.create(
+            num_nota=num, cliente=cliente, fecha_despacho=fecha, despacho_retira=despacho, id_usuario=self.usuario
+        )
+
+    def tabla(self):
+        return sorted(
+            (f.dia, f.comuna, f.despacho_retira, f.total)
+            for f in ResumenDespachoDiario.objects.filter(total__gt=0)
+        )
+
+    def test_senales_mantienen_la_tabla_igual_a_reconstruir(self):
+        nota = self.crear_nota(1, self.santiago, 3)
+        self.crear_nota(2, self.santiago, 3, hora=23, despacho='RETIRA')
+        self.crear_nota(3, self.maipu, 4)
+        borrar = self.crear_nota(4, self.maipu, 5, despacho=None)
+
+        nota.despacho_retira = 'RETIRA'
+        nota.save()
+        borrar.delete()
+        self.maipu.comuna = 'PUDAHUEL'
+        self.maipu.save()
+
+        incremental = self.tabla()
+        resumen.reconstruir()
+        self.assertEqual(incremental, self.tabla())
+        self.assertIn((timezone.datetime(2025, 3, 4).date(), 'PUDAHUEL', 'DESPACHO', 1), incremental)
+
+    def test_resumen_responde_desde_la_tabla(self):
+        self.crear_nota(1, self.santiago, 3)
+        self.crear_nota(2, self.santiago, 3, hora=23, despacho='RETIRA')
+        self.crear_nota(3, self.maipu, 4)
+        self.crear_nota(4, self.maipu, 9)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/dashboard/resumen/', {'fecha_inicio': '2025-03-03', 'fecha_fin': '2025-03-04'})
+        self.assertEqual(response.status_code, 200)
+        consultas = [q['sql'] for q in ctx.captured_queries if 'resumen_despacho_diario' in q['sql']]
+        self.assertEqual(len(consultas), 1)
+
+        notas = response.data['notas']
+        self.assertEqual(notas['total'], 3)
+        self.assertEqual(notas['por_estado'][0], {'despacho_retira': 'DESPACHO', 'total': 2})
+        self.assertEqual(notas['por_dia'], [{'day': '2025-03-03', 'total': 2}, {'day': '2025-03-04', 'total': 1}])
+        self.assertEqual(len(response.data['comunas']['resumen']), 3)
+
+    def test_resumen_directo_coincide_con_la_tabla(self):
+        self.crear_nota(1, self.santiago, 3)
+        self.crear_nota(2, self.santiago, 3, hora=23, despacho='RETIRA')
+        self.crear_nota(3, self.maipu, 4, despacho=None)
+        inicio, fin = timezone.datetime(2025, 3, 1).date(), timezone.datetime(2025, 3, 31).date()
+        self.assertEqual(resumen.resumen_directo(inicio, fin), resumen.resumen_notas(inicio, fin))
+
+
+class ResumenCacheTest(APITestCase):
+    """
+    El resumen se cachea por rango y solo se invalida si cambia un día del rango.
+    """
+    url = '/api/v1/dashboard/resumen/'
+    rango = {'fecha_inicio': '2025-03-01', 'fecha_fin': '2025-03-10'}
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        self.cliente = Clientes.objects.create(
+            razon_social='A', rut_cliente='1-A', direccion='-', comuna='SANTIAGO', id_usuario=self.usuario
+        )
+
+    def crear_nota(self, num, dia):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notas.objects.create(
+                num_nota=num, cliente=self.cliente, id_usuario=self.usuario,
+                fecha_despacho=timezone.make_aware(timezone.datetime(2025, 3, dia, 12, 0)),
+            )
+
+    def consultas_resumen(self, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, self.rango, **headers)
+        return response, sum('resumen_despacho_diario' in q['sql'] for q in ctx.captured_queries)
+
+    def test_cache_etag_e_invalidacion_por_dia(self):
+        self.crear_nota(1, 5)
+        primera, consultas = self.consultas_resumen()
+        self.assertEqual((primera.status_code, consultas), (200, 1))
+        etag = primera['ETag']
+
+        repetida, consultas = self.consultas_resumen(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((repetida.status_code, consultas), (304, 0))
+
+        # Un cambio fuera del rango no invalida
+        self.crear_nota(2, 20)
+        response, consultas = self.consultas_resumen(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, consultas), (304, 0))
+
+        # Un cambio dentro del rango sí
+        self.crear_nota(3, 7)
+        response, consultas = self.consultas_resumen(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, consultas), (200, 1))
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['notas']['total'], 2)
+
+    def test_reconstruir_invalida_todos_los_rangos(self):
+        self.crear_nota(1, 5)
+        self.consultas_resumen()
+        with self.captureOnCommitCallbacks(execute=True):
+            resumen.reconstruir()
+        response, consultas = self.consultas_resumen()
+        self.assertEqual((response.status_code, consultas), (200, 1))
+
+    def test_version_perdida_vuelve_a_calcular(self):
+        # Si el cache descarta la versión de un día, el rango se recalcula
+        self.crear_nota(1, 5)
+        primera, _ = self.consultas_resumen()
+        cache.delete(resumen._clave_dia(timezone.datetime(2025, 3, 5).date()))
+        response, consultas = self.consultas_resumen()
+        self.assertEqual(consultas, 1)
+        self.assertEqual(response['ETag'], primera['ETag'])
+
+
+class IndicesExplainTest(TestCase):
+    """
+    Las consultas frecuentes deben usar los índices declarados en los modelos.
+    """
+
+    def assertUsaIndice(self, queryset, indice):
+        plan = queryset.explain()
+        self.assertIn(indice, plan, f'El plan no usa {indice}:\n{plan}')
+
+    def test_listados_por_cursor(self):
+        self.assertUsaIndice(Notas.objects.order_by(*NotasView.cursor_ordering)[:100], 'notas_despacho_idx')
+        self.assertUsaIndice(NotaProducto.objects.order_by(*NotaProductoView.cursor_ordering)[:100], 'nota_producto_creacion_idx')
+        self.assertUsaIndice(DocumentFacturas.objects.order_by(*DocumentFacturasView.cursor_ordering)[:100], 'facturas_creacion_idx')
+
+    def test_filtros_por_estado(self):
+        self.assertUsaIndice(
+            Notas.objects.filter(estado_solicitud='SOLICITADO').order_by('-fecha_despacho')[:100],
+            'notas_estado_despacho_idx',
+        )
+        self.assertUsaIndice(
+            NotaProducto.objects.filter(estado='PENDIENTE').order_by('-fecha_creacion')[:100],
+            'nota_producto_estado_idx',
+        )
+        self.assertUsaIndice(
+            DocumentFacturas.objects.filter(estado='NO PAGADO').order_by('-created_at')[:100],
+            'facturas_estado_creacion_idx',
+        )
+        self.assertUsaIndice(
+            PedidoMateriasPrimas.objects.filter(estado='PENDIENTE').order_by('fecha_entrega')[:100],
+            'pedido_estado_entrega_idx',
+        )
+
+    def test_rango_del_resumen(self):
+        inicio, fin = timezone.datetime(2025, 3, 1).date(), timezone.datetime(2025, 3, 31).date()
+        self.assertUsaIndice(resumen.filas_notas(inicio, fin), 'notas_despacho_retira_idx')
+
+
+class BusquedaPrefijoTest(APITestCase):
+    """
+    Los autocompletados buscan por prefijo de palabra, sin tildes ni mayúsculas.
+    """
+
+    def setUp(self):
+        cache.clear()
+        catalogo_productos.limpiar()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        for i, nombre in enumerate(['Azúcar Flor 1kg', 'Harina de Azúcar', 'Café Molido', 'AZUCAR']):
+            Productos.objects.create(nombre=nombre, codigo=f'P{i}', id_usuario=self.usuario)
+
+    def nombres(self, q):
+        response = self.client.get('/api/v1/pedido_materias_primas/buscar-productos/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [p['nombre'] for p in response.data]
+
+    def test_normaliza_y_ordena_por_relevancia(self):
+        self.assertEqual(busqueda.tokenizar('  Azúcar-Flor  1kg '), ['azucar', 'flor', '1kg'])
+        # Palabra completa primero, luego la que empieza el nombre y los nombres cortos
+        self.assertEqual(self.nombres('azucar'), ['AZUCAR', 'Azúcar Flor 1kg', 'Harina de Azúcar'])
+        self.assertEqual(self.nombres('az fl'), ['Azúcar Flor 1kg'])
+        self.assertEqual(self.nombres('mol caf'), ['Café Molido'])
+        self.assertEqual(self.nombres('zzz'), [])
+
+    def test_senales_mantienen_el_indice(self):
+        producto = Productos.objects.get(nombre='Café Molido')
+        producto.nombre = 'Té Ceylán'
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.save()
+        self.assertEqual(self.nombres('cafe'), [])
+        self.assertEqual(self.nombres('ceylan'), ['Té Ceylán'])
+
+        id_producto = producto.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.delete()
+        self.assertEqual(self.nombres('ceylan'), [])
+        self.assertFalse(IndiceBusqueda.objects.filter(entidad='producto', id_objeto=id_producto).exists())
+
+
+class CatalogoProductosTest(APITestCase):
+    """
+    Las búsquedas por código se responden desde el catálogo en memoria.
+    """
+
+    def setUp(self):
+        cache.clear()
+        catalogo_productos.limpiar()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        Productos.objects.create(nombre='Harina', codigo='H1', stock=5, id_usuario=self.usuario)
+
+    def test_por_codigo_sin_consultas_despues_de_cargar(self):
+        self.client.get('/api/v1/productos/por-codigo/', {'codigo': 'H1'})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/productos/por-codigo/', {'codigo': 'H1'})
+            no_existe = self.client.get('/api/v1/productos/por-codigo/', {'codigo': 'NO'})
+        self.assertEqual((response.status_code, response.data['nombre'], response.data['stock']), (200, 'Harina', 5))
+        self.assertEqual(no_existe.status_code, 404)
+        self.assertFalse([q for q in ctx.captured_queries if 'productos' in q['sql']])
+
+    def test_cambios_se_ven_tras_la_senal(self):
+        catalogo_productos.obtener_por_codigo('H1')
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = Productos.objects.create(nombre='Azúcar', codigo='A1', id_usuario=self.usuario)
+            Productos.objects.filter(codigo='H1').update(stock=9)
+            Productos.objects.get(codigo='H1').save()
+        self.assertEqual(catalogo_productos.obtener_por_codigo('A1')['id_producto'], nuevo.pk)
+        self.assertEqual(catalogo_productos.obtener_por_codigo('H1')['stock'], 9)
+        self.assertEqual(catalogo_productos.buscar('azu'), [nuevo.pk])
+
+        # Un código que aún no está en memoria se busca en la base de datos
+        otro = Productos.objects.create(nombre='Sal', codigo='S1', id_usuario=self.usuario)
+        self.assertEqual(catalogo_productos.ids_por_codigo(['H1', 'S1', 'NO']), {'H1': catalogo_productos.por_codigo['H1'], 'S1': otro.pk})
+
+    def test_borrado_y_alta_en_otro_proceso(self):
+        # Sin ejecutar los on_commit, como si los cambios ocurrieran en otro worker;
+        # el total de productos no cambia
+        catalogo_productos.obtener_por_codigo('H1')
+        indice = catalogo_productos._indice
+        with self.captureOnCommitCallbacks(execute=False):
+            Productos.objects.filter(codigo='H1').delete()
+            Productos.objects.create(nombre='Sal', codigo='S1', id_usuario=self.usuario)
+        catalogo_productos.marcar_cambio()
+
+        self.assertIsNone(catalogo_productos.obtener_por_codigo('H1'))
+        self.assertIsNotNone(catalogo_productos.obtener_por_codigo('S1'))
+        self.assertEqual(catalogo_productos.buscar('harina'), [])
+        # El índice anterior no se modificó: se reemplazó
+        self.assertIn('H1', indice.por_codigo)
+
+
+class TypeaheadTest(APITestCase):
+    """
+    Las sugerencias se reutilizan del cache hasta que cambia la entidad.
+    """
+
+    def setUp(self):
+        cache.clear()
+        catalogo_productos.limpiar()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.harinas = Proveedores.objects.create(razon_social='Harinas del Sur', rut_proveedor='76-1', id_usuario=self.usuario)
+            Proveedores.objects.create(razon_social='Hielo Norte', rut_proveedor='76-2', id_usuario=self.usuario)
+
+    def test_origen_de_las_sugerencias(self):
+        self.assertEqual(typeahead.sugerencias('proveedor', 'h')[1], 'indice')
+        items, origen = typeahead.sugerencias('proveedor', 'har')
+        self.assertEqual((origen, [item['id'] for item in items]), ('prefijo', [self.harinas.pk]))
+        self.assertEqual(items[0]['rut_proveedor'], '76-1')
+        self.assertEqual(typeahead.sugerencias('proveedor', 'HAR')[1], 'cache')
+
+    def test_cambio_invalida_el_cache(self):
+        typeahead.sugerencias('proveedor', 'ha')
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = Proveedores.objects.create(razon_social='Harina Fina', rut_proveedor='76-3', id_usuario=self.usuario)
+        items, origen = typeahead.sugerencias('proveedor', 'ha')
+        self.assertEqual(origen, 'indice')
+        self.assertIn(nuevo.pk, [item['id'] for item in items])
+
+    def test_endpoint(self):
+        Productos.objects.create(nombre='Harina', codigo='H1', unidad_medida='KG', id_usuario=self.usuario)
+        response = self.client.get('/api/v1/typeahead/', {'entidad': 'producto', 'q': 'har'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['label'], item['codigo']) for item in response.data], [('Harina', 'H1')])
+        self.assertIn('typeahead;desc="catalogo"', response['Server-Timing'])
+
+        response = self.client.get('/api/v1/typeahead/', {'entidad': 'otra', 'q': 'har'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConsultasPorLoteTest(APITestCase):
+    """
+    Las variantes por lote resuelven todas las claves con una sola consulta.
+    """
+
+    def setUp(self):
+        cache.clear()
+        catalogo_productos.limpiar()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        self.cliente = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        self.nota = Notas.objects.create(num_nota=10, cliente=self.cliente, fecha_despacho=timezone.now(), id_usuario=self.usuario)
+        Productos.objects.create(nombre='Harina', codigo='H1', stock=5, id_usuario=self.usuario)
+
+    def test_notas(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/nota/validar-numeros/', {'num_notas': '10,11,10'})
+        self.assertEqual(response.json(), {'10': True, '11': False})
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        response = self.client.post('/api/v1/nota/clientes-por-notas/', {'notas': [10, 11]}, format='json')
+        datos = response.json()
+        self.assertEqual((datos['10']['rut_cliente'], datos['10']['nota_id'], datos['11']), ('11-1', self.nota.pk, None))
+
+        response = self.client.get('/api/v1/nota/validar-numeros/', {'num_notas': '10,abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ruts_y_codigos(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/v1/cliente/por-ruts/', {'ruts': ['11-1', '22-2']}, format='json')
+        self.assertEqual(response.json(), {'11-1': response.json()['11-1'], '22-2': None})
+        self.assertEqual(response.json()['11-1']['razon_social'], 'Panadería')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        response = self.client.get('/api/v1/productos/por-codigos/', {'codigos': 'H1,NO'})
+        self.assertEqual((response.json()['H1']['stock'], response.json()['NO']), (5, None))
+
+        self.assertEqual(self.client.get('/api/v1/cliente/por-ruts/').status_code, 400)
+        response = self.client.get('/api/v1/cliente/por-ruts/', {'ruts': ','.join(str(i) for i in range(501))})
+        self.assertEqual(response.status_code, 400)
+
+
+class OperacionesLoteTest(APITestCase):
+    """
+    Los lotes escriben los elementos válidos e informan los errores por posición.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        self.cliente = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        self.producto = Productos.objects.create(nombre='Harina', codigo='H1', id_usuario=self.usuario)
+        self.fecha = timezone.now()
+
+    def test_crear_notas(self):
+        elementos = [
+            {'num_nota': 1, 'rut_cliente': '11-1', 'fecha_despacho': self.fecha, 'despacho_retira': 'DESPACHO'},
+            {'num_nota': 1, 'rut_cliente': '11-1', 'fecha_despacho': self.fecha},
+            {'num_nota': 2, 'rut_cliente': '99-9', 'fecha_despacho': self.fecha},
+            {'num_nota': 3, 'rut_cliente': '99-9', 'fecha_despacho': self.fecha, 'guardar_cliente': True,
+             'razon_social': 'Nuevo', 'direccion': '-', 'comuna': 'PUDAHUEL'},
+            {'rut_cliente': '11-1'},
+            # Cliente nuevo sin dirección: error del elemento, no del lote
+            {'num_nota': 4, 'rut_cliente': '88-8', 'fecha_despacho': self.fecha, 'guardar_cliente': True,
+             'razon_social': 'Incompleto', 'comuna': 'PUDAHUEL'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/nota/lote/', elementos, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(nota['num_nota'] for nota in response.data['resultados']), [1, 3])
+        self.assertEqual([error['indice'] for error in response.data['errores']], [1, 2, 4, 5])
+        self.assertIn('num_nota', response.data['errores'][0]['errores'])
+        self.assertIn('direccion', response.data['errores'][3]['errores'])
+        self.assertFalse(Clientes.objects.filter(rut_cliente='88-8').exists())
+        self.assertEqual(resumen.resumen_notas(timezone.localdate(self.fecha), timezone.localdate(self.fecha))['total'], 2)
+
+    def test_actualizar_y_eliminar_notas(self):
+        nota = Notas.objects.create(num_nota=1, cliente=self.cliente, fecha_despacho=self.fecha, despacho_retira='DESPACHO', id_usuario=self.usuario)
+        otra = Notas.objects.create(num_nota=2, cliente=self.cliente, fecha_despacho=self.fecha, id_usuario=self.usuario)
+        response = self.client.patch('/api/v1/nota/lote/', [
+            {'id_nota': nota.pk, 'despacho_retira': 'RETIRA'},
+            {'id_nota': otra.pk, 'num_nota': 1},
+            {'id_nota': 999, 'observacion': 'x'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([n['despacho_retira'] for n in response.data['resultados']], ['RETIRA'])
+        self.assertEqual([error['indice'] for error in response.data['errores']], [1, 2])
+        nota.refresh_from_db()
+        self.assertEqual(nota.id_usuario_modificacion, self.usuario)
+        estados = resumen.resumen_notas(timezone.localdate(self.fecha), timezone.localdate(self.fecha))['por_estado']
+        self.assertEqual({e['despacho_retira']: e['total'] for e in estados}, {'RETIRA': 1, None: 1})
+
+        response = self.client.delete('/api/v1/nota/lote/', {'ids': [otra.pk, 999]}, format='json')
+        self.assertEqual((response.data['resultados'], len(response.data['errores'])), ([otra.pk], 1))
+        self.assertFalse(Notas.objects.filter(pk=otra.pk).exists())
+
+    def test_nota_productos(self):
+        nota = Notas.objects.create(num_nota=1, cliente=self.cliente, fecha_despacho=self.fecha, id_usuario=self.usuario)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/v1/notas_productos/lote/', [
+                {'nota_id': nota.pk, 'producto_id': self.producto.pk, 'cantidad': 3},
+                {'nota_id': nota.pk, 'producto_id': self.producto.pk, 'cantidad': 4},
+                {'nota_id': 999, 'producto_id': self.producto.pk, 'cantidad': 1},
+                {'producto_id': self.producto.pk, 'cantidad': 'x'},
+            ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error['indice'] for error in response.data['errores']], [1, 2, 3])
+        linea = NotaProducto.objects.get()
+        self.assertEqual((linea.cantidad, linea.usuario_creacion), (3, self.usuario))
+        self.assertLess(len(ctx.captured_queries), 10)
+
+        response = self.client.patch('/api/v1/notas_productos/lote/', [{'id': linea.pk, 'estado': 'LISTO'}], format='json')
+        self.assertEqual(response.data['resultados'][0]['estado'], 'LISTO')
+
+        response = self.client.post('/api/v1/notas_productos/lote/', [{'producto_id': 999}], format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.delete('/api/v1/notas_productos/lote/', [linea.pk], format='json')
+        self.assertEqual(response.data['resultados'], [linea.pk])
+
+    def test_nota_productos_sin_ids_de_bulk_create(self):
+        # Como en MySQL: los ids se releen por par y solo deben ser los del lote
+        nota = Notas.objects.create(num_nota=1, cliente=self.cliente, fecha_despacho=self.fecha, id_usuario=self.usuario)
+        otra = Notas.objects.create(num_nota=2, cliente=self.cliente, fecha_despacho=self.fecha, id_usuario=self.usuario)
+        sal = Productos.objects.create(nombre='Sal', codigo='S1', id_usuario=self.usuario)
+        existente = NotaProducto.objects.create(nota=nota, producto=self.producto, cantidad=1, usuario_creacion=self.usuario)
+
+        with mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock, return_value=False
+        ):
+            ids, errores = masivo.crear_nota_productos([
+                {'nota_id': nota.pk, 'producto_id': sal.pk, 'cantidad': 2},
+                {'nota_id': otra.pk, 'producto_id': self.producto.pk, 'cantidad': 3},
+                {'producto_id': sal.pk, 'cantidad': 4},
+            ], self.usuario)
+
+        self.assertEqual(errores, [])
+        self.assertNotIn(existente.pk, ids)
+        self.assertEqual(sorted(ids), sorted(NotaProducto.objects.exclude(pk=existente.pk).values_list('pk', flat=True)))
+
+
+class ExportacionTest(APITestCase):
+    """
+    Las exportaciones se generan en el servidor por partes.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        cliente = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        for numero in (1, 2):
+            Notas.objects.create(num_nota=numero, cliente=cliente, fecha_despacho=timezone.now(), id_usuario=self.usuario)
+
+    def test_csv(self):
+        response = self.client.get('/api/v1/nota/exportar/', {'formato': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertIn('notas.csv', response['Content-Disposition'])
+        lineas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lineas[0].split(',')[:2], ['N° nota', 'Razón Social'])
+        self.assertEqual([linea.split(',')[0] for linea in lineas[1:]], ['2', '1'])
+
+    def test_xlsx(self):
+        response = self.client.get('/api/v1/nota/exportar/', {'formato': 'xlsx'})
+        hoja = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual((hoja.max_row, hoja['B2'].value), (3, 'Panadería'))
+        self.assertIsNotNone(hoja['D2'].value)
+
+        response = self.client.get('/api/v1/notas_productos/exportar/')
+        hoja = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(hoja.max_row, 1)
+        self.assertEqual(hoja['A1'].value, 'Nota')
+
+        response = self.client.get('/api/v1/pedido_materias_primas/exportar/', {'formato': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+        DocumentFacturas.objects.create(title='Factura 1', file_url='https://bucket/f1.pdf', file_size=10, id_usuario=self.usuario, estado='PAGADO')
+        response = self.client.get('/api/v1/facturas/exportar/', {'estado': 'PAGADO'})
+        hoja = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual((hoja.max_row, hoja['A2'].value, hoja['C2'].value), (2, 'Factura 1', 'tester'))
+
+
+    def test_bloques_por_llave(self):
+        # Bloques de 2 filas con empates en el orden y nulos en fecha_entrega
+        producto = Productos.objects.create(nombre='Harina', codigo='H1', id_usuario=self.usuario)
+        fecha = timezone.now()
+        for entrega in (None, fecha, None, fecha, fecha - timezone.timedelta(days=1), None, fecha):
+            PedidoMateriasPrimas.objects.create(id_producto=producto, id_usuario=self.usuario, fecha_entrega=entrega)
+        columnas = [('Id', 'id_pedido'), ('Entrega', 'fecha_entrega')]
+
+        with mock.patch.object(exportacion, 'TAMANO_BLOQUE', 2):
+            for orden in (('fecha_entrega', 'id_pedido'), ('-fecha_entrega', '-id_pedido'), ('-id_pedido',)):
+                queryset = PedidoMateriasPrimas.objects.order_by(*orden)
+                # El mismo orden en una sola consulta
+                esperado = list(exportacion._ordenar(queryset, exportacion._orden(queryset)).values_list('pk', flat=True))
+                with CaptureQueriesContext(connection) as ctx:
+                    obtenido = [pedido for pedido, _ in exportacion.filas(queryset, columnas)]
+                self.assertEqual(obtenido, esperado)
+                self.assertEqual(len(obtenido), 7)
+                self.assertEqual(len(ctx.captured_queries), 4)
+
+            nulos_primero = [pedido for pedido, _ in exportacion.filas(PedidoMateriasPrimas.objects.order_by('fecha_entrega', 'id_pedido'), columnas)]
+            self.assertEqual(nulos_primero[:3], list(PedidoMateriasPrimas.objects.filter(fecha_entrega=None).order_by('pk').values_list('pk', flat=True)))
+
+            response = self.client.get('/api/v1/nota/exportar/', {'formato': 'csv', 'ordering': 'num_nota'})
+            lineas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+            self.assertEqual([linea.split(',')[0] for linea in lineas[1:]], ['1', '2'])
+
+
+class FiltrosListadoTest(APITestCase):
+    """
+    Los listados filtran, ordenan y recortan campos en el servidor.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        maipu = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        florida = Clientes.objects.create(razon_social='Almacén', rut_cliente='22-2', direccion='-', comuna='LA FLORIDA', id_usuario=self.usuario)
+        hoy = timezone.localtime().replace(hour=12)
+        Notas.objects.create(num_nota=1, cliente=maipu, fecha_despacho=hoy, despacho_retira='DESPACHO', id_usuario=self.usuario)
+        Notas.objects.create(num_nota=2, cliente=florida, fecha_despacho=hoy - timezone.timedelta(days=3), estado_solicitud='SOLICITADO', id_usuario=self.usuario)
+        Notas.objects.create(num_nota=3, cliente=florida, fecha_despacho=hoy - timezone.timedelta(days=5), id_usuario=self.usuario)
+        self.hoy = hoy.date()
+
+    def numeros(self, params):
+        response = self.client.get('/api/v1/nota/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [nota['num_nota'] for nota in response.data['results']]
+
+    def test_filtros(self):
+        self.assertEqual(self.numeros({'estado_solicitud': 'NO SOLICITADO'}), [1, 3])
+        self.assertEqual(self.numeros({'estado_solicitud': 'SOLICITADO,NO SOLICITADO', 'comuna': 'LA FLORIDA'}), [2, 3])
+        self.assertEqual(self.numeros({'fecha_desde': (self.hoy - timezone.timedelta(days=3)).isoformat()}), [1, 2])
+        self.assertEqual(self.numeros({'fecha_hasta': (self.hoy - timezone.timedelta(days=4)).isoformat()}), [3])
+        self.assertEqual(self.numeros({'despacho_retira': 'DESPACHO'}), [1])
+        self.assertEqual(self.numeros({'ordering': 'num_nota'}), [1, 2, 3])
+
+        self.assertEqual(self.client.get('/api/v1/nota/', {'fecha_desde': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/nota/', {'ordering': 'observacion'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/notas_productos/', {'nota': 'x'}).status_code, 400)
+
+    def test_campos_parciales(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/nota/', {'fields': 'num_nota,razon_social_cliente', 'ordering': 'num_nota'})
+        self.assertEqual(response.data['results'][0], {'num_nota': 1, 'razon_social_cliente': 'Panadería'})
+        sql = next(q['sql'] for q in ctx.captured_queries if 'FROM "notas"' in q['sql'])
+        self.assertNotIn('"observacion"', sql)
+        self.assertNotIn('"correo"', sql)
+
+        # Un serializer anidado trae la relación completa sin consultas por fila
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/nota/', {'fields': 'cliente,usuario_creador'})
+        self.assertEqual(response.data['results'][0]['cliente']['usuario_creador'], 'tester')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        producto = Productos.objects.create(nombre='Harina', codigo='H1', id_usuario=self.usuario)
+        NotaProducto.objects.create(nota=Notas.objects.get(num_nota=1), producto=producto, cantidad=2, usuario_creacion=self.usuario)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/notas_productos/', {'fields': 'nota,cantidad', 'estado': 'PENDIENTE,LISTO'})
+        self.assertEqual(response.data['results'][0]['nota']['cliente']['comuna'], 'MAIPU')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        self.assertEqual(self.client.get('/api/v1/nota/', {'fields': 'no_existe'}).status_code, 400)
+
+
+class ListadoCondicionalTest(APITestCase):
+    """
+    Los catálogos responden 304 mientras no cambien.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        self.producto = Productos.objects.create(nombre='Harina', codigo='H1', id_usuario=self.usuario)
+
+    def test_etag(self):
+        response = self.client.get('/api/v1/productos/')
+        etag = response['ETag']
+        self.assertTrue(response['Last-Modified'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/productos/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('MAX', ctx.captured_queries[0]['sql'])
+
+        # Otra query es otra respuesta
+        response = self.client.get('/api/v1/productos/', {'fields': 'codigo'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        Productos.objects.create(nombre='Sal', codigo='S1', id_usuario=self.usuario)
+        response = self.client.get('/api/v1/productos/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, len(response.data)), (200, 2))
+
+        Productos.objects.filter(codigo='S1').delete()
+        self.assertEqual(self.client.get('/api/v1/productos/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_last_modified(self):
+        # Sin filas no hay fecha de modificación
+        self.assertNotIn('Last-Modified', self.client.get('/api/v1/cliente/'))
+
+        response = self.client.get('/api/v1/productos/')
+        response = self.client.get('/api/v1/productos/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/api/v1/productos/', HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2015 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+
+class SincronizacionTest(APITestCase):
+    """
+    Con sync_token el listado trae solo los cambios y los borrados.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        self.harina = Productos.objects.create(nombre='Harina', codigo='H1', id_usuario=self.usuario)
+        self.sal = Productos.objects.create(nombre='Sal', codigo='S1', id_usuario=self.usuario)
+        # Filas modificadas antes del margen de la marca
+        Productos.objects.update(fecha_modificacion=timezone.now() - timezone.timedelta(hours=1))
+
+    def test_cambios_y_eliminados(self):
+        response = self.client.get('/api/v1/productos/', {'sync_token': ''})
+        self.assertEqual((len(response.data['results']), response.data['deleted']), (2, []))
+        token = sincronizacion.codificar_token(timezone.now() - timezone.timedelta(minutes=5))
+
+        azucar = Productos.objects.create(nombre='Azúcar', codigo='A1', id_usuario=self.usuario)
+        sal_id = self.sal.pk
+        self.sal.delete()
+        response = self.client.get('/api/v1/productos/', {'sync_token': token})
+        self.assertEqual([p['id_producto'] for p in response.data['results']], [azucar.pk])
+        self.assertEqual(response.data['deleted'], [sal_id])
+        self.assertTrue(response.data['sync_token'])
+
+        desde = (timezone.now() - timezone.timedelta(minutes=5)).isoformat()
+        response = self.client.get('/api/v1/productos/', {'modified_since': desde})
+        self.assertEqual(response.data['deleted'], [sal_id])
+
+    def test_foto_completa_paginada(self):
+        cliente = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        for numero in (1, 2, 3):
+            Notas.objects.create(num_nota=numero, cliente=cliente, fecha_despacho=timezone.now(), id_usuario=self.usuario)
+
+        response = self.client.get('/api/v1/nota/', {'sync_token': '', 'page_size': 2})
+        self.assertEqual((len(response.data['results']), response.data['sync_token']), (2, None))
+        self.assertIn('sync_marca=', response.data['next'])
+        marca = response.data['next'].split('sync_marca=')[1].split('&')[0]
+
+        response = self.client.get(response.data['next'])
+        self.assertIsNone(response.data['next'])
+        self.assertEqual([nota['num_nota'] for nota in response.data['results']], [1])
+        # La marca es la de la primera página
+        self.assertEqual((response.data['sync_token'], response.data['deleted']), (marca, []))
+
+        self.assertEqual(self.client.get('/api/v1/nota/', {'sync_token': '', 'sync_marca': 'x'}).status_code, 400)
+
+    def test_marca_invalida_o_vencida(self):
+        self.assertEqual(self.client.get('/api/v1/cliente/', {'sync_token': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/nota/', {'modified_since': 'ayer'}).status_code, 400)
+        vencido = sincronizacion.codificar_token(timezone.now() - timezone.timedelta(days=90))
+        self.assertEqual(self.client.get('/api/v1/personal/', {'sync_token': vencido}).status_code, 410)
+
+
+class MetricasMiddlewareTest(APITestCase):
+    """
+    Cada solicitud informa sus consultas y tiempos en Server-Timing y en el log.
+    """
+
+    def setUp(self):
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        Productos.objects.create(nombre='Harina', codigo='H1', id_usuario=self.usuario)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://app.example.cl'])
+    def test_server_timing_y_log(self):
+        with self.assertLogs('nota_app.metricas', 'INFO') as logs:
+            response = self.client.get('/api/v1/productos/', HTTP_ORIGIN='https://app.example.cl')
+
+        metricas = [metrica.split(';')[0] for metrica in response['Server-Timing'].split(', ')]
+        self.assertEqual(metricas, ['db', 'serialize', 'render', 'total'])
+        self.assertEqual(response['Timing-Allow-Origin'], 'https://app.example.cl')
+
+        linea = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((linea['vista'], linea['estado'], linea['usuario']), ('productos-list', 200, self.usuario.pk))
+        self.assertGreater(linea['consultas'], 0)
+        self.assertIn(f'desc="{linea["consultas"]} consultas"', response['Server-Timing'])
+        self.assertEqual(linea['bytes'], len(response.content))
+
+    def test_serializacion_separada_del_render(self):
+        original = ProductosSerializer.to_representation
+
+        def lento(serializer, instancia):
+            time.sleep(0.05)
+            return original(serializer, instancia)
+
+        with mock.patch.object(ProductosSerializer, 'to_representation', lento), \
+                self.assertLogs('nota_app.metricas', 'INFO') as logs:
+            response = self.client.get('/api/v1/productos/')
+
+        linea = json.loads(logs.records[-1].getMessage())
+        self.assertGreaterEqual(linea['serializacion_ms'], 50)
+        self.assertLess(linea['render_ms'], 50)
+        self.assertIn(f'serialize;dur={linea["serializacion_ms"]}', response['Server-Timing'])
+
+    def test_otro_origen(self):
+        with self.assertLogs('nota_app.metricas', 'INFO'):
+            response = self.client.get('/api/v1/productos/', HTTP_ORIGIN='https://otro.example.cl')
+        self.assertNotIn('Timing-Allow-Origin', response)
+
+
+class PlanillaTestBase(APITestCase):
+    """Datos y planillas comunes a las pruebas de importación."""
+
+    def setUp(self):
+        catalogo_productos.limpiar()
+        self.usuario = Usuarios.objects.create_user(username='tester', password='x', rut='1-9')
+        self.client.force_authenticate(self.usuario)
+        cliente = Clientes.objects.create(razon_social='Panadería', rut_cliente='11-1', direccion='-', comuna='MAIPU', id_usuario=self.usuario)
+        self.nota = Notas.objects.create(num_nota=1, cliente=cliente, fecha_despacho=timezone.now(), id_usuario=self.usuario)
+        self.producto = Productos.objects.create(nombre='Harina', codigo='0012', id_usuario=self.usuario)
+
+    def planilla(self, filas, nombre='planilla.xlsx'):
+        libro = Workbook()
+        hoja = libro.active
+        hoja.append(importacion.COLUMNAS_EXCEL)
+        for fila in filas:
+            hoja.append(fila)
+        contenido = io.BytesIO()
+        libro.save(contenido)
+        return SimpleUploadedFile(nombre, contenido.getvalue())
+
+
+class ImportacionPlanillaTest(PlanillaTestBase):
+    """
+    Carga de líneas de picking desde la planilla del ERP.
+    """
+
+    def importar(self, filas):
+        return importacion.importar_nota_productos(
+            importacion.leer_planilla_por_bloques(self.planilla(filas)), self.usuario
+        )
+
+    def test_crea_actualiza_y_reporta_omitidas(self):
+        otro = Usuarios.objects.create_user(username='otro', password='x', rut='2-7')
+        existente = NotaProducto.objects.create(nota=self.nota, producto=self.producto, cantidad=1, usuario_creacion=otro)
+        sal = Productos.objects.create(nombre='Sal', codigo='S1', id_usuario=self.usuario)
+
+        reporte = self.importar([
+            [1, '0012', 5],     # fila 2: actualiza la línea existente
+            [1, 'S1', 3],       # fila 3: crea
+            [2, 'S1', 1],       # fila 4: la nota no existe
+            [1, 'NO', 1],       # fila 5: el producto no existe
+            ['x', 'S1', 1],     # fila 6
+            [1, None, 1],       # fila 7
+            [1, 'S1', 'abc'],   # fila 8
+            [1, 'S1', 4],       # fila 9: repite la fila 3 y gana
+            [1, '0012', 2.5],   # fila 10: no se trunca a 2
+            [1, '0012', -1],    # fila 11
+        ])
+
+        self.assertEqual((reporte['total_filas'], reporte['procesadas']), (10, 2))
+        self.assertEqual(reporte['omitidas'], [
+            {'fila': 3, 'motivo': 'Fila duplicada, se usa la última ocurrencia'},
+            {'fila': 4, 'motivo': 'La nota 2 no existe'},
+            {'fila': 5, 'motivo': 'El producto NO no existe'},
+            {'fila': 6, 'motivo': 'Número de nota inválido'},
+            {'fila': 7, 'motivo': 'Código de artículo vacío'},
+            {'fila': 8, 'motivo': 'Cantidad inválida'},
+            {'fila': 10, 'motivo': 'Cantidad inválida'},
+            {'fila': 11, 'motivo': 'Cantidad inválida'},
+        ])
+        self.assertEqual(reporte['total_omitidas'], 8)
+        self.assertEqual(reporte['omitidas_por_motivo'], {
+            'Fila duplicada': 1, 'Nota inexistente': 1, 'Producto inexistente': 1,
+            'Número de nota inválido': 1, 'Código de artículo vacío': 1, 'Cantidad inválida': 3,
+        })
+        existente.refresh_from_db()
+        # Actualizada: cambia la cantidad y la auditoría, se conserva el creador
+        self.assertEqual((existente.cantidad, existente.usuario_creacion, existente.usuario_modificacion), (5, otro, self.usuario))
+        creada = NotaProducto.objects.get(producto=sal)
+        self.assertEqual((creada.nota, creada.cantidad, creada.usuario_creacion), (self.nota, 4, self.usuario))
+        self.assertEqual(NotaProducto.objects.count(), 2)
+
+    def test_detalle_de_omitidas_acotado(self):
+        # Tres bloques de 4 filas; solo se detallan las 3 primeras omitidas
+        planilla = self.planilla([[9, '0012', 1]] * 10 + [[1, '0012', 'x']] * 2)
+        with mock.patch.object(importacion, 'MAX_OMITIDAS_DETALLE', 3):
+            reporte = importacion.importar_nota_productos(importacion.leer_planilla_por_bloques(planilla, tamano=4), self.usuario)
+        self.assertEqual(reporte['total_omitidas'], 12)
+        self.assertEqual(reporte['omitidas_por_motivo'], {'Fila duplicada': 7, 'Nota inexistente': 3, 'Cantidad inválida': 2})
+        self.assertEqual([omitida['fila'] for omitida in reporte['omitidas']], [2, 3, 4])
+
+    def test_consultas_no_crecen_con_las_filas(self):
+        productos = [
+            Productos.objects.create(nombre=f'Producto {i}', codigo=f'P{i}', id_usuario=self.usuario) for i in range(20)
+        ]
+        catalogo_productos.obtener_por_codigo('0012')
+
+        def contar(cantidad):
+            with CaptureQueriesContext(connection) as ctx:
+                reporte = self.importar([[1, producto.codigo, 1] for producto in productos[:cantidad]])
+            self.assertEqual(reporte['procesadas'], cantidad)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(contar(2), contar(20))
+
+    def test_upload_excel_encola_la_carga(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post('/api/v1/notas_productos/upload_excel/', {'file': self.planilla([[1, '0012', 5]])})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.data['estado'], response.data['nombre_archivo']), ('PENDIENTE', 'planilla.xlsx'))
+        self.assertEqual(len(callbacks), 1)
+        self.addCleanup(ImportacionExcel.objects.get(pk=response.data['job_id']).archivo.delete, save=False)
+
+        archivo = SimpleUploadedFile('planilla.txt', b'x')
+        self.assertEqual(self.client.post('/api/v1/notas_productos/upload_excel/', {'file': archivo}).status_code, 400)
+        self.assertEqual(self.client.post('/api/v1/notas_productos/upload_excel/', {}).status_code, 400)
+
+    def test_csv_conserva_ceros_del_codigo(self):
+        archivo = SimpleUploadedFile('planilla.csv', b'numnota,cod_articu,pend\n1,0012,5\n')
+        reporte = importacion.importar_nota_productos(importacion.leer_planilla_por_bloques(archivo), self.usuario)
+        self.assertEqual((reporte['procesadas'], reporte['omitidas']), (1, []))
+        self.assertEqual(NotaProducto.objects.get().producto, self.producto)
+
+
+class ImportacionEnSegundoPlanoTest(PlanillaTestBase):
+    """
+    Ciclo de una carga en segundo plano: PENDIENTE, PROCESANDO y TERMINADO o ERROR.
+    El pool se reemplaza por una ejecución inmediata en el mismo hilo.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for parche in (
+            mock.patch.object(tareas._executor, 'submit', side_effect=lambda funcion: funcion()),
+            # La conexión del test no se puede cerrar dentro de su transacción
+            mock.patch.object(tareas, 'connections'),
+            mock.patch.object(tareas, 'close_old_connections'),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def subir(self, archivo):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/notas_productos/upload_excel/', {'file': archivo})
+        self.assertEqual((response.status_code, response.data['estado']), (202, 'PENDIENTE'))
+        return response.data['job_id']
+
+    def estado(self, job_id):
+        return self.client.get(f'/api/v1/notas_productos/upload_excel/{job_id}/').data
+
+    def test_terminado(self):
+        estados = []
+        importar = tareas.importar_nota_productos
+
+        def importar_registrando(*args, **kwargs):
+            estados.append(ImportacionExcel.objects.get().estado)
+            return importar(*args, **kwargs)
+
+        with mock.patch.object(tareas, 'importar_nota_productos', side_effect=importar_registrando):
+            job_id = self.subir(self.planilla([[1, '0012', 5], [9, '0012', 1]]))
+
+        self.assertEqual(estados, ['PROCESANDO'])
+        datos = self.estado(job_id)
+        self.assertEqual(
+            (datos['estado'], datos['total_filas'], datos['filas_procesadas'], datos['filas_omitidas']),
+            ('TERMINADO', 2, 1, 1),
+        )
+        self.assertEqual(datos['omitidas'], [{'fila': 3, 'motivo': 'La nota 9 no existe'}])
+        # El archivo se borra al terminar
+        self.assertFalse(ImportacionExcel.objects.get().archivo)
+
+    def test_error(self):
+        archivo = SimpleUploadedFile('planilla.csv', b'numnota,otra\n1,2\n')
+        job_id = self.subir(archivo)
+        self.addCleanup(ImportacionExcel.objects.get(pk=job_id).archivo.delete, save=False)
+        datos = self.estado(job_id)
+        self.assertEqual(datos['estado'], 'ERROR')
+        self.assertTrue(datos['error'])
+
+        self.assertEqual(self.client.get('/api/v1/notas_productos/upload_excel/999/').status_code, 404)
+
+    def test_solo_el_dueno_ve_la_carga(self):
+        importacion_excel = ImportacionExcel.objects.create(nombre_archivo='p.xlsx', estado='TERMINADO', id_usuario=self.usuario)
+        url = f'/api/v1/notas_productos/upload_excel/{importacion_excel.pk}/'
+
+        otro = Usuarios.objects.create_user(username='otro', password='x', rut='2-7')
+        self.client.force_authenticate(otro)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        admin = Usuarios.objects.create_user(username='admin', password='x', rut='3-5', is_staff=True)
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_abandonada_tras_reinicio(self):
+        importacion_excel = ImportacionExcel.objects.create(nombre_archivo='p.xlsx', estado='PROCESANDO', id_usuario=self.usuario)
+        self.assertEqual(self.estado(importacion_excel.pk)['estado'], 'PROCESANDO')
+
+        ImportacionExcel.objects.update(fecha_modificacion=timezone.now() - tareas.ABANDONO - timezone.timedelta(seconds=1))
+        datos = self.estado(importacion_excel.pk)
+        self.assertEqual((datos['estado'], datos['error']), ('ERROR', tareas.MENSAJE_ABANDONO))
@@ -0,0 +1,106 @@
+"""
+Sugerencias para los autocompletados (clientes, productos, proveedores y facturas).
+
+Cada respuesta es una lista liviana de {id, label} más los pocos campos que
+los formularios copian al elegir una opción. Los resultados se guardan en el
+cache de Django por texto normalizado:
+
+- si el texto ya está en cache se responde directo;
+- si un prefijo más corto está en cache y su resultado era completo (trajo
+  todas las coincidencias), el nuevo resultado se filtra de ese sin consultar;
+- si no, productos sale del catálogo en memoria y el resto del índice de
+  búsqueda.
+
+Las señales suben la versión de la entidad al confirmar un cambio, lo que deja
+sin efecto todas sus entradas en cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from .busqueda import ENTIDADES, buscar_ids, coincide, relevancia, tokenizar
+from .catalogo import catalogo_productos
+
+# entidad: (campo de la etiqueta, campos extra)
+CAMPOS = {
+    'cliente': ('razon_social', ['rut_cliente']),
+    'producto': ('nombre', ['codigo', 'unidad_medida']),
+    'proveedor': ('razon_social', ['rut_proveedor']),
+    'factura': ('title', []),
+}
+
+# Resultados guardados por consulta; si hay menos, el resultado es completo
+CANDIDATOS = 100
+LIMITE = 10
+
+
+def _clave_version(entidad):
+    return f'typeahead:{entidad}:version'
+
+
+def _clave(entidad, version, texto):
+    # Sin espacios para que la clave sirva también en memcached
+    return f'typeahead:{entidad}:{version}:{texto.replace(" ", "+")}'
+
+
+def invalidar(entidad):
+    """Descarta todo el cache de sugerencias de la entidad."""
+    try:
+        cache.incr(_clave_version(entidad))
+    except ValueError:
+        cache.set(_clave_version(entidad), 1, None)
+
+
+def _desde_base(entidad, texto):
+    etiqueta, extra = CAMPOS[entidad]
+    if entidad == 'producto':
+        ids = catalogo_productos.buscar(texto, CANDIDATOS + 1)
+        registros = catalogo_productos.obtener_por_ids(ids)
+        return [
+            {'id': r['id_producto'], 'label': r[etiqueta], **{campo: r[campo] for campo in extra}}
+            for r in registros
+        ], 'catalogo'
+
+    ids = buscar_ids(entidad, texto, CANDIDATOS + 1)
+    modelo, _ = ENTIDADES[entidad]
+    filas = modelo.objects.in_bulk(ids) if ids else {}
+    return [
+        {'id': pk, 'label': getattr(filas[pk], etiqueta), **{campo: getattr(filas[pk], campo) for campo in extra}}
+        for pk in ids if pk in filas
+    ], 'indice'
+
+
+def sugerencias(entidad, texto, limite=LIMITE):
+    """
+    Retorna (items, origen) donde origen es 'cache', 'prefijo', 'catalogo' o
+    'indice' según de dónde salió el resultado.
+    """
+    terminos = list(dict.fromkeys(tokenizar(texto)))
+    if not terminos:
+        return [], 'vacio'
+
+    normalizado = ' '.join(terminos)
+    version = cache.get(_clave_version(entidad), 0)
+    timeout = getattr(settings, 'TYPEAHEAD_CACHE_TIMEOUT', 5 * 60)
+
+    entrada = cache.get(_clave(entidad, version, normalizado))
+    if entrada is not None:
+        return entrada['items'][:limite], 'cache'
+
+    # Prefijos más cortos del mismo texto, del más largo al más corto
+    cortos = [normalizado[:n].strip() for n in range(len(normalizado) - 1, 0, -1)]
+    guardados = cache.get_many([_clave(entidad, version, corto) for corto in cortos])
+    for corto in cortos:
+        anterior = guardados.get(_clave(entidad, version, corto))
+        if anterior is None or not anterior['completo']:
+            continue
+        items = sorted(
+            (item for item in anterior['items'] if coincide(tokenizar(item['label']), terminos)),
+            key=lambda item: (*relevancia(tokenizar(item['label']), terminos), item['id']),
+        )
+        cache.set(_clave(entidad, version, normalizado), {'items': items, 'completo': True}, timeout)
+        return items[:limite], 'prefijo'
+
+    items, origen = _desde_base(entidad, texto)
+    completo = len(items) <= CANDIDATOS
+    cache.set(_clave(entidad, version, normalizado), {'items': items[:CANDIDATOS], 'completo': completo}, timeout)
+    return items[:limite], origen
+
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework import routers
-from .views import UsuarioView, NotasView, ClientesView, DashboardViewSet, CSRFTokenView, ProductosView, ProveedoresView, PersonalView, PedidoMateriasPrimasView, DocumentFacturasView, NotaProductoView
+from .views import UsuarioView, NotasView, ClientesView, DashboardViewSet, CSRFTokenView, ProductosView, ProveedoresView, PersonalView, PedidoMateriasPrimasView, DocumentFacturasView, NotaProductoView, TypeaheadView
 
 
 router = routers.DefaultRouter()
@@ -24,6 +24,7 @@ usuario_extra_routes = [
 
 urlpatterns = [
     path('csrf/', CSRFTokenView.as_view(), name='csrf'),
+    path('typeahead/', TypeaheadView.as_view(), name='typeahead'),
     path('', include(router.urls)),
     *usuario_extra_routes,
 ] 
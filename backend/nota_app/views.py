@@ -1,8 +1,17 @@
 from rest_framework import viewsets, status
 from django.db import transaction
-from .serializer import UsuariosSerializer, NotasSerializer, ClientesSerializer, ProductosSerializer, ProveedoresSerializer, PersonalSerializer, HistoricoSabadosSerializer, PedidoMateriasPrimasSerializer, DocumentFacturasSerializer, NotaProductoSerializer
-from .models import Usuarios, Notas, Clientes, Productos, Proveedores, Personal, Sabado, SabadoTrabajado, PedidoMateriasPrimas, DocumentFacturas, NotaProducto
-import pandas as pd
+from .serializer import UsuariosSerializer, NotasSerializer, ClientesSerializer, ProductosSerializer, ProveedoresSerializer, PersonalSerializer, HistoricoSabadosSerializer, PedidoMateriasPrimasSerializer, DocumentFacturasSerializer, NotaProductoSerializer, ImportacionExcelSerializer, SolicitudSubidaFacturaSerializer, ConfirmarSubidaFacturaSerializer
+from .models import Usuarios, Notas, Clientes, Productos, Proveedores, Personal, Sabado, SabadoTrabajado, PedidoMateriasPrimas, DocumentFacturas, NotaProducto, ImportacionExcel
+from .pagination import CursorPaginacion
+from .resumen import resumen_cacheado
+from .busqueda import buscar
+from .catalogo import catalogo_productos
+from . import masivo, sincronizacion, typeahead
+from .filtros import campos_pedidos, ordenamiento, plan_campos, recortar_campos
+from .exportacion import FORMATOS, respuesta_exportacion
+from .tareas import encolar_importacion, encolar_metadata_factura, marcar_abandonadas
+from .middleware import sumar_serializacion
+from .almacenamiento import SUBIDA_EXPIRA, obtener_cliente_s3, key_desde_url, url_desde_key, generar_key_factura, url_subida_firmada, registrar_subida, subida_pendiente, cerrar_subida, metadata_objeto, urls_firmadas
 from rest_framework import permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -12,26 +21,280 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import AllowAny
 from rest_framework import status
-from django.db.models import Count, Q
+from django.db.models import Count, F, Max
+from django.utils.http import http_date, parse_http_date_safe
 from datetime import datetime
+import hashlib
 import logging
+import time
 from django.utils.timezone import make_aware
-from django.db.models import DateField
-from django.db.models.functions import Cast
 from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.throttling import ScopedRateThrottle
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.http import JsonResponse
 from django.middleware.csrf import get_token
 from datetime import timedelta
 from django.utils import timezone
 from collections import defaultdict
-import boto3
-import os
+from functools import lru_cache
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
-class UsuarioView(viewsets.ModelViewSet):
+class QueryPlanMixin:
+    """
+    Aplica el plan de consulta declarado en `query_plan` según la acción.
+    Cada entrada puede definir select_related, prefetch_related y only; la
+    clave 'default' se usa para las acciones que no tienen un plan propio.
+
+    En list y retrieve, ?fields=a,b deja solo esos campos en la respuesta y
+    lee solo las columnas que necesitan.
+    """
+    query_plan = {}
+
+    def campos_parciales(self):
+        if self.action not in ('list', 'retrieve'):
+            return None
+        return campos_pedidos(self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = self.query_plan.get(self.action, self.query_plan.get('default', {}))
+        select_related, only = plan.get('select_related'), plan.get('only')
+
+        campos = self.campos_parciales()
+        if campos and not plan.get('prefetch_related'):
+            serializer = self.get_serializer()
+            recortado = plan_campos(serializer, campos, select_related or [], ordenamiento(self.request, self))
+            if recortado is not None:
+                select_related, only = recortado
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if plan.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        if only:
+            queryset = queryset.only(*only)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_parciales()
+        if campos:
+            recortar_campos(serializer, campos)
+        return serializer
+
+
+@lru_cache(maxsize=None)
+def _serializador_medido(clase):
+    """Subclase de `clase` que suma el tiempo de armar `.data` en la solicitud."""
+    class Medido(clase):
+        @property
+        def data(self):
+            inicio = time.perf_counter()
+            try:
+                return super().data
+            finally:
+                sumar_serializacion(self.context.get('request'), time.perf_counter() - inicio)
+
+    Medido.__name__ = Medido.__qualname__ = clase.__name__
+    return Medido
+
+
+class SerializacionMedidaMixin:
+    """
+    Mide cuánto tarda serializer.data (to_representation de cada fila y sus
+    campos anidados, incluidas las consultas que dispare) para que
+    MetricasMiddleware lo informe como serialize en Server-Timing.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        # Con many=True DRF entrega un ListSerializer: se mide ese, el externo
+        serializer.__class__ = _serializador_medido(type(serializer))
+        return serializer
+
+
+# Claves aceptadas por una consulta por lote
+MAX_CLAVES_LOTE = 500
+
+
+def claves_lote(request, nombre):
+    """
+    Claves de una consulta por lote, sin repetidos y en el orden recibido.
+    Vienen en el body (POST, lista o texto) o en la query separadas por comas.
+    """
+    valor = request.data.get(nombre) if request.method == 'POST' else request.query_params.get(nombre)
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    if not isinstance(valor, list):
+        return []
+    return list(dict.fromkeys(str(clave).strip() for clave in valor if str(clave).strip()))
+
+
+def error_claves_lote(claves, nombre):
+    """Respuesta 400 si la lista de claves está vacía o es muy larga, si no None."""
+    if not claves:
+        return Response({'error': f'Debe indicar {nombre}'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(claves) > MAX_CLAVES_LOTE:
+        return Response(
+            {'error': f'Se aceptan hasta {MAX_CLAVES_LOTE} {nombre} por consulta'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return None
+
+
+class LoteMixin:
+    """
+    Agrega <ruta>/lote/ para crear (POST), actualizar (PATCH) o eliminar
+    (DELETE, lista de ids o {"ids": [...]}) varios registros en una sola
+    transacción. `operaciones_lote` indica la función de masivo.py por método.
+    Responde los registros escritos y los errores por posición; si ningún
+    elemento fue válido responde 400.
+    """
+    operaciones_lote = {}
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='lote')
+    def lote(self, request):
+        elementos = request.data
+        if request.method == 'DELETE' and isinstance(elementos, dict):
+            elementos = elementos.get('ids')
+        if not isinstance(elementos, list) or not elementos:
+            return Response({'error': 'Debe enviar una lista de elementos'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(elementos) > masivo.MAX_ELEMENTOS:
+            return Response(
+                {'error': f'Se aceptan hasta {masivo.MAX_ELEMENTOS} elementos por lote'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            ids, errores = self.operaciones_lote[request.method](elementos, request.user)
+
+        if request.method == 'DELETE':
+            resultados = ids
+        else:
+            resultados = self.get_serializer(self.get_queryset().filter(pk__in=ids), many=True).data
+
+        if not ids:
+            codigo = status.HTTP_400_BAD_REQUEST
+        elif request.method == 'POST':
+            codigo = status.HTTP_201_CREATED
+        else:
+            codigo = status.HTTP_200_OK
+        return Response({'resultados': resultados, 'errores': errores}, status=codigo)
+
+
+class ExportacionMixin:
+    """
+    Agrega <ruta>/exportar/?formato=csv|xlsx con las columnas de
+    `columnas_exportacion` [(encabezado, campo)]. Usa los mismos filtros que el
+    listado y su mismo orden.
+    """
+    columnas_exportacion = []
+    nombre_exportacion = 'datos'
+
+    @action(detail=False, methods=['get'], url_path='exportar')
+    def exportar(self, request):
+        formato = request.query_params.get('formato', 'xlsx')
+        if formato not in FORMATOS:
+            return Response(
+                {'error': f"formato debe ser uno de: {', '.join(FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*(ordenamiento(request, self) or ('pk',)))
+        return respuesta_exportacion(queryset, self.columnas_exportacion, self.nombre_exportacion, formato)
+
+
+class ListadoCondicionalMixin:
+    """
+    GET condicional en el listado. ETag y Last-Modified salen de
+    MAX(`campo_modificacion`) y COUNT(*) del queryset filtrado en una sola
+    consulta agregada; si el cliente ya tiene esa versión se responde 304 sin
+    leer ni serializar filas. Los cambios hechos con update() que no tocan
+    `campo_modificacion` no cambian la versión.
+    """
+    campo_modificacion = 'fecha_modificacion'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        version = queryset.aggregate(ultima=Max(self.campo_modificacion), total=Count('pk'))
+        ultima = version['ultima']
+
+        # La respuesta depende de la query (filtros, ?fields=) y del formato
+        firma = '|'.join([
+            request.get_full_path(), request.accepted_renderer.format,
+            str(version['total']), ultima.isoformat() if ultima else '',
+        ])
+        encabezados = {'ETag': f'"{hashlib.md5(firma.encode()).hexdigest()}"', 'Cache-Control': 'private, no-cache'}
+        if ultima is not None:
+            encabezados['Last-Modified'] = http_date(ultima.timestamp())
+
+        if 'If-None-Match' in request.headers:
+            no_modificado = etag_coincide(request, encabezados['ETag'])
+        else:
+            desde = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            no_modificado = desde is not None and ultima is not None and int(ultima.timestamp()) <= desde
+        if no_modificado:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=encabezados)
+
+        respuesta = super().list(request, *args, **kwargs)
+        for encabezado, valor in encabezados.items():
+            respuesta[encabezado] = valor
+        return respuesta
+
+
+class SincronizacionMixin:
+    """
+    Listado incremental con ?sync_token= o ?modified_since= (ver
+    sincronizacion.py). Responde {results, deleted, sync_token}.
+
+    Si la vista pagina, la respuesta se pagina igual que el listado: la marca
+    se fija en la primera página y viaja en el enlace `next`; `deleted` y
+    `sync_token` llegan completos en la última página (en las demás van
+    vacíos), así la foto completa de una tabla grande no sale en una sola
+    respuesta.
+    """
+    campo_modificacion = 'fecha_modificacion'
+
+    def list(self, request, *args, **kwargs):
+        if 'sync_token' not in request.query_params and 'modified_since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            desde = sincronizacion.marca_desde(request.query_params)
+            marca = sincronizacion.marca_paginas(request.query_params)
+        except sincronizacion.TokenInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except sincronizacion.TokenVencido:
+            return Response(
+                {'error': 'La marca es muy antigua, se debe recargar el listado completo'},
+                status=status.HTTP_410_GONE
+            )
+
+        queryset, eliminados, token = sincronizacion.cambios(
+            self.filter_queryset(self.get_queryset()),
+            self.campo_modificacion,
+            self.get_queryset().model._meta.model_name,
+            desde,
+        )
+        pagina = self.paginate_queryset(queryset)
+        if pagina is None:
+            serializer = self.get_serializer(queryset, many=True)
+            return Response({'results': serializer.data, 'deleted': eliminados, 'sync_token': token})
+
+        token = marca or token
+        response = self.get_paginated_response(self.get_serializer(pagina, many=True).data)
+        if response.data['next']:
+            response.data['next'] = replace_query_param(response.data['next'], sincronizacion.PARAMETRO_MARCA, token)
+            response.data.update(deleted=[], sync_token=None)
+        else:
+            response.data.update(deleted=eliminados, sync_token=token)
+        return response
+
+
+class UsuarioView(SerializacionMedidaMixin, viewsets.ModelViewSet):
     serializer_class = UsuariosSerializer
     queryset = Usuarios.objects.all()
 
@@ -86,10 +349,62 @@ class UsuarioView(viewsets.ModelViewSet):
         response.delete_cookie('csrftoken')
         return response
         
-class NotasView(viewsets.ModelViewSet):
+class NotasView(SerializacionMedidaMixin, SincronizacionMixin, LoteMixin, ExportacionMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = NotasSerializer
     queryset = Notas.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CursorPaginacion
+    cursor_ordering = ('-fecha_despacho', '-id_nota')
+    ordenamientos = {
+        'fecha_despacho': ('fecha_despacho', 'id_nota'),
+        '-fecha_despacho': ('-fecha_despacho', '-id_nota'),
+        'num_nota': ('num_nota', 'id_nota'),
+        '-num_nota': ('-num_nota', '-id_nota'),
+    }
+    filtros = {
+        'fecha_desde': ('fecha_despacho__gte', 'desde'),
+        'fecha_hasta': ('fecha_despacho__lte', 'hasta'),
+        'estado_solicitud': ('estado_solicitud', 'texto'),
+        'despacho_retira': ('despacho_retira', 'texto'),
+        'comuna': ('cliente__comuna', 'texto'),
+    }
+    query_plan = {
+        # NotasSerializer anida ClientesSerializer y muestra los usuarios de ambos
+        'default': {
+            'select_related': [
+                'cliente__id_usuario', 'cliente__id_usuario_modificacion',
+                'id_usuario', 'id_usuario_modificacion',
+            ],
+        },
+        'destroy': {},
+        'exportar': {},
+    }
+    operaciones_lote = {
+        'POST': masivo.crear_notas,
+        'PATCH': masivo.actualizar_notas,
+        'DELETE': masivo.eliminar_notas,
+    }
+    nombre_exportacion = 'notas'
+    columnas_exportacion = [
+        ('N° nota', 'num_nota'),
+        ('Razón Social', 'cliente__razon_social'),
+        ('Rut Cliente', 'cliente__rut_cliente'),
+        ('Fecha Despacho', 'fecha_despacho'),
+        ('Nombre Contacto', 'cliente__contacto'),
+        ('Correo', 'cliente__correo'),
+        ('Teléfono', 'cliente__telefono'),
+        ('Dirección', 'cliente__direccion'),
+        ('Comuna', 'cliente__comuna'),
+        ('Tipo Despacho', 'despacho_retira'),
+        ('Observación', 'observacion'),
+        ('Horario Desde', 'horario_desde'),
+        ('Horario Hasta', 'horario_hasta'),
+        ('Fecha Creación', 'fecha_creacion'),
+        ('Estado', 'estado_solicitud'),
+        ('Usuario Creación', 'id_usuario__username'),
+        ('Usuario Modificación', 'id_usuario_modificacion__username'),
+        ('Fecha Modificación', 'fecha_modificacion'),
+    ]
 
     @action(detail=False, methods=['get'], url_path='validar-numero')
     def validar_numero(self, request):
@@ -99,7 +414,31 @@ class NotasView(viewsets.ModelViewSet):
         
         existe = Notas.objects.filter(num_nota=num_nota).exists()
         return Response({'existe': existe})
-    
+
+    def numeros_lote(self, request, nombre):
+        """Números de nota del lote como enteros, o una respuesta 400."""
+        claves = claves_lote(request, nombre)
+        error = error_claves_lote(claves, nombre)
+        if error:
+            return None, error
+        try:
+            return [int(clave) for clave in claves], None
+        except ValueError:
+            return None, Response(
+                {'error': 'Los números de nota deben ser enteros válidos.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['get', 'post'], url_path='validar-numeros')
+    def validar_numeros(self, request):
+        """{num_nota: existe} para varios números en una sola consulta."""
+        numeros, error = self.numeros_lote(request, 'num_notas')
+        if error:
+            return error
+
+        existentes = set(Notas.objects.filter(num_nota__in=numeros).values_list('num_nota', flat=True))
+        return Response({numero: numero in existentes for numero in numeros})
+
     @action(detail=False, methods=['get'], url_path='cliente_por_nota')
     def cliente_por_nota(self, request):
         num_nota = request.query_params.get('nota')
@@ -113,20 +452,7 @@ class NotasView(viewsets.ModelViewSet):
             cliente = nota.cliente
 
             if cliente:
-                data = {
-                    'id_cliente': cliente.id_cliente,
-                    'razon_social': cliente.razon_social,
-                    'rut_cliente': cliente.rut_cliente,
-                    'direccion': cliente.direccion,
-                    'comuna': cliente.comuna,
-                    'telefono': cliente.telefono,
-                    'correo': cliente.correo,
-                    'contacto': cliente.contacto,
-                    'despacho_retira': nota.despacho_retira,
-                    'fecha_despacho': nota.fecha_despacho,
-                    'nota_id': nota.id_nota,
-                }
-                return Response(data, status=status.HTTP_200_OK)
+                return Response(datos_cliente_nota(nota), status=status.HTTP_200_OK)
             else:
                 return Response({'error': 'La nota no tiene cliente asociado.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -135,11 +461,46 @@ class NotasView(viewsets.ModelViewSet):
         except Notas.DoesNotExist:
             return Response({'error': 'No existe esa nota de venta.'}, status=status.HTTP_404_NOT_FOUND)
 
-
-class ClientesView(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get', 'post'], url_path='clientes-por-notas')
+    def clientes_por_notas(self, request):
+        """
+        {num_nota: datos del cliente} para varias notas en una sola consulta;
+        null si la nota no existe o no tiene cliente.
+        """
+        numeros, error = self.numeros_lote(request, 'notas')
+        if error:
+            return error
+
+        notas = Notas.objects.filter(num_nota__in=numeros, cliente__isnull=False).select_related('cliente')
+        por_numero = {nota.num_nota: datos_cliente_nota(nota) for nota in notas}
+        return Response({numero: por_numero.get(numero) for numero in numeros})
+
+
+def datos_cliente_nota(nota):
+    cliente = nota.cliente
+    return {
+        'id_cliente': cliente.id_cliente,
+        'razon_social': cliente.razon_social,
+        'rut_cliente': cliente.rut_cliente,
+        'direccion': cliente.direccion,
+        'comuna': cliente.comuna,
+        'telefono': cliente.telefono,
+        'correo': cliente.correo,
+        'contacto': cliente.contacto,
+        'despacho_retira': nota.despacho_retira,
+        'fecha_despacho': nota.fecha_despacho,
+        'nota_id': nota.id_nota,
+    }
+
+
+class ClientesView(SerializacionMedidaMixin, SincronizacionMixin, ListadoCondicionalMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = ClientesSerializer
     queryset = Clientes.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_plan = {
+        'default': {'select_related': ['id_usuario', 'id_usuario_modificacion']},
+        'destroy': {},
+    }
 
     @action(detail=False, methods=['get', 'put', 'patch'], url_path='por-rut')
     def obtener_por_rut(self, request):
@@ -159,21 +520,35 @@ class ClientesView(viewsets.ModelViewSet):
                 return Response(serializer.data)
             
             # Manejo del GET
-            data = {
-                'direccion': cliente.direccion,
-                'comuna': cliente.comuna,
-                'telefono': cliente.telefono,
-                'correo': cliente.correo,
-                'contacto': cliente.contacto,
-                'razon_social': cliente.razon_social,
-            }
-            return Response(data)
+            return Response(datos_cliente_rut(cliente))
             
         except Clientes.DoesNotExist:
             return Response({'error': 'Cliente no encontrado'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get', 'post'], url_path='por-ruts')
+    def obtener_por_ruts(self, request):
+        """{rut: datos del cliente} para varios RUT en una sola consulta; null si no existe."""
+        ruts = claves_lote(request, 'ruts')
+        error = error_claves_lote(ruts, 'ruts')
+        if error:
+            return error
+
+        por_rut = {cliente.rut_cliente: datos_cliente_rut(cliente) for cliente in Clientes.objects.filter(rut_cliente__in=ruts)}
+        return Response({rut: por_rut.get(rut) for rut in ruts})
+
+
+def datos_cliente_rut(cliente):
+    return {
+        'direccion': cliente.direccion,
+        'comuna': cliente.comuna,
+        'telefono': cliente.telefono,
+        'correo': cliente.correo,
+        'contacto': cliente.contacto,
+        'razon_social': cliente.razon_social,
+    }
+
 
 class CookieTokenObtainPairView(TokenObtainPairView):
     permission_classes = [AllowAny]
@@ -250,6 +625,40 @@ class CSRFTokenView(APIView):
         return JsonResponse({'message': 'CSRF token set'})
 
 
+class TypeaheadView(APIView):
+    """
+    Sugerencias livianas {id, label} para los autocompletados.
+    ?entidad=cliente|producto|proveedor|factura&q=texto[&limite=10]
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'typeahead'
+
+    def get(self, request):
+        entidad = request.query_params.get('entidad')
+        if entidad not in typeahead.CAMPOS:
+            return Response(
+                {'error': f"entidad debe ser una de: {', '.join(typeahead.CAMPOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limite = min(int(request.query_params.get('limite', typeahead.LIMITE)), typeahead.CANDIDATOS)
+        except ValueError:
+            return Response({'error': 'limite debe ser un número'}, status=status.HTTP_400_BAD_REQUEST)
+
+        inicio = time.perf_counter()
+        items, origen = typeahead.sugerencias(entidad, request.query_params.get('q', ''), limite)
+        duracion = (time.perf_counter() - inicio) * 1000
+        return Response(items, headers={'Server-Timing': f'typeahead;desc="{origen}";dur={duracion:.1f}'})
+
+
+def etag_coincide(request, etag):
+    """True si el ETag está en el If-None-Match de la petición."""
+    if_none_match = request.headers.get('If-None-Match', '')
+    candidatos = {valor.strip().removeprefix('W/') for valor in if_none_match.split(',')}
+    return etag in candidatos or '*' in candidatos
+
+
 class DashboardViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -276,56 +685,30 @@ class DashboardViewSet(viewsets.ViewSet):
                     status=400
                 )
             
-            # Filtro base para notas usando datetime
-            notas_filtro = Q(fecha_despacho__gte=fecha_inicio) & Q(fecha_despacho__lte=fecha_fin)
-            
-            # Estadísticas de notas
-            total_notas = Notas.objects.filter(notas_filtro).count()
-            
-            # Notas por estado_solicitud
-            notas_por_despacho = Notas.objects.filter(notas_filtro).values(
-                'despacho_retira'
-            ).annotate(
-                total=Count('id_nota')
-            ).order_by('-total')
-            
-            # Notas por día usando TruncDate para agrupar correctamente
-            notas_por_dia = Notas.objects.filter(
-                notas_filtro & Q(fecha_despacho__isnull=False)
-            ).annotate(
-                dia=Cast('fecha_despacho', DateField())
-            ).values('dia').annotate(
-                total=Count('id_nota')
-            ).order_by('dia')
-            
-            
-            # Notas por comuna
-            notas_por_comuna = Notas.objects.filter(notas_filtro).exclude(
-                cliente__comuna__isnull=True
-            ).values(
-                'cliente__comuna', 'despacho_retira'
-            ).annotate(
-                total=Count('id_nota')
-            ).order_by('-total')
+            # Se responde desde la tabla de resumen diario, mantenida por señales,
+            # con cache por rango y ETag para que el navegador revalide con 304
+            notas, etag = resumen_cacheado(fecha_inicio.date(), fecha_fin.date())
+            encabezados = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+            if etag_coincide(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=encabezados)
 
-            
             # Preparar respuesta con manejo de valores None
             response_data = {
                 'notas': {
-                    'total': total_notas,
-                    'por_estado': list(notas_por_despacho),
+                    'total': notas['total'],
+                    'por_estado': notas['por_estado'],
                     'por_dia': [{
                         'day': item['dia'].strftime('%Y-%m-%d') if item['dia'] else 'Fecha no disponible',
                         'total': item['total']
-                    } for item in notas_por_dia],
+                    } for item in notas['por_dia']],
                 },
                 'comunas': {
-                    'resumen': list(notas_por_comuna),
+                    'resumen': notas['por_comuna'],
 }
             }
             
             logger.debug(f"Datos del dashboard: {response_data}")
-            return Response(response_data)
+            return Response(response_data, headers=encabezados)
             
         except ValueError as e:
             logger.error(f"Error en formato de fecha: {str(e)}")
@@ -340,10 +723,14 @@ class DashboardViewSet(viewsets.ViewSet):
                 status=500
             )
         
-class ProductosView(viewsets.ModelViewSet):
+class ProductosView(SerializacionMedidaMixin, SincronizacionMixin, ListadoCondicionalMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = ProductosSerializer
     queryset = Productos.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_plan = {
+        'default': {'select_related': ['id_usuario', 'id_usuario_modificacion']},
+        'destroy': {},
+    }
 
     @action(detail=False, methods=['get', 'put', 'patch'], url_path='por-codigo')
     def obtener_por_codigo(self, request):
@@ -352,8 +739,15 @@ class ProductosView(viewsets.ModelViewSet):
             return Response({'error': 'Código es requerido'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
+            # Manejo del GET desde el catálogo en memoria
+            if request.method == 'GET':
+                producto = catalogo_productos.obtener_por_codigo(codigo)
+                if producto is None:
+                    raise Productos.DoesNotExist
+                return Response(datos_producto(producto))
+
             producto = Productos.objects.get(codigo=codigo)
-            
+
             # Manejo de métodos PUT/PATCH
             if request.method in ['PUT', 'PATCH']:
                 partial = request.method == 'PATCH'  # True para PATCH, False para PUT
@@ -361,31 +755,49 @@ class ProductosView(viewsets.ModelViewSet):
                 serializer.is_valid(raise_exception=True)
                 serializer.save()
                 return Response(serializer.data)
-            
-            # Manejo del GET
-            data = {
-                'id_producto': producto.id_producto,
-                'nombre': producto.nombre,
-                'codigo': producto.codigo,
-                'descripcion': producto.descripcion,
-                'precio': producto.precio_venta,
-                'stock': producto.stock,
-                'categoria': producto.categoria,
-                'unidad_medida': producto.unidad_medida,
-                'precio_compra': producto.precio_compra,
-            }
-            return Response(data)
-            
+
         except Productos.DoesNotExist:
             return Response({'error': 'Producto no encontrado'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-
-class ProveedoresView(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get', 'post'], url_path='por-codigos')
+    def obtener_por_codigos(self, request):
+        """{codigo: datos del producto} para varios códigos; null si no existe."""
+        codigos = claves_lote(request, 'codigos')
+        error = error_claves_lote(codigos, 'codigos')
+        if error:
+            return error
+
+        productos = catalogo_productos.obtener_por_codigos(codigos)
+        return Response({
+            codigo: datos_producto(productos[codigo]) if codigo in productos else None
+            for codigo in codigos
+        })
+
+
+def datos_producto(producto):
+    return {
+        'id_producto': producto['id_producto'],
+        'nombre': producto['nombre'],
+        'codigo': producto['codigo'],
+        'descripcion': producto['descripcion'],
+        'precio': producto['precio_venta'],
+        'stock': producto['stock'],
+        'categoria': producto['categoria'],
+        'unidad_medida': producto['unidad_medida'],
+        'precio_compra': producto['precio_compra'],
+    }
+
+
+class ProveedoresView(SerializacionMedidaMixin, SincronizacionMixin, ListadoCondicionalMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = ProveedoresSerializer
     queryset = Proveedores.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_plan = {
+        'default': {'select_related': ['id_usuario', 'id_usuario_modificacion']},
+        'destroy': {},
+    }
 
     @action(detail=False, methods=['get', 'put', 'patch'], url_path='por-rut')
     def obtener_por_rut(self, request):
@@ -418,10 +830,17 @@ class ProveedoresView(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PersonalView(viewsets.ModelViewSet):
+class PersonalView(SerializacionMedidaMixin, SincronizacionMixin, ListadoCondicionalMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = PersonalSerializer
     queryset = Personal.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_plan = {
+        'default': {'select_related': ['id_usuario', 'id_usuario_modificacion']},
+        'destroy': {},
+        # Las acciones de sábados solo necesitan la instancia de Personal
+        'asignar_sabados': {},
+        'obtener_sabados_trabajados': {},
+    }
 
     @action(detail=True, methods=['post'], url_path='asignar-sabados')
     def asignar_sabados(self, request, pk=None):
@@ -512,55 +931,197 @@ class PersonalView(viewsets.ModelViewSet):
         serializer = HistoricoSabadosSerializer(response_data, many=True)
         return Response(serializer.data)
     
-class PedidoMateriasPrimasView(viewsets.ModelViewSet):
+class PedidoMateriasPrimasView(SerializacionMedidaMixin, ExportacionMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = PedidoMateriasPrimasSerializer
     queryset = PedidoMateriasPrimas.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cursor_ordering = ('id_pedido',)
+    ordenamientos = {
+        'fecha_entrega': ('fecha_entrega', 'id_pedido'),
+        '-fecha_entrega': ('-fecha_entrega', '-id_pedido'),
+    }
+    filtros = {
+        'estado': ('estado', 'texto'),
+        'proveedor': ('id_proveedor', 'entero'),
+        'fecha_entrega_desde': ('fecha_entrega__gte', 'desde'),
+        'fecha_entrega_hasta': ('fecha_entrega__lte', 'hasta'),
+    }
+    query_plan = {
+        'default': {
+            'select_related': [
+                'id_usuario', 'id_usuario_modificacion',
+                'id_proveedor', 'id_producto',
+            ],
+        },
+        'destroy': {},
+        'exportar': {},
+    }
+    nombre_exportacion = 'materias_primas'
+    columnas_exportacion = [
+        ('ID Pedido', 'id_pedido'),
+        ('RUT Proveedor', 'id_proveedor__rut_proveedor'),
+        ('Razón Social', 'id_proveedor__razon_social'),
+        ('Código Producto', 'id_producto__codigo'),
+        ('Producto', 'id_producto__nombre'),
+        ('Cantidad', 'cantidad'),
+        ('Unidad de Medida', 'unidad_medida'),
+        ('Fecha Entrega', 'fecha_entrega'),
+        ('Fecha Creación', 'fecha_creacion'),
+        ('Fecha Modificación', 'fecha_modificacion'),
+        ('Estado', 'estado'),
+    ]
 
     @action(detail=False, methods=['get'], url_path='buscar-proveedores')
     def buscar_proveedores(self, request):
         q = request.GET.get('q', '')
-        proveedores = Proveedores.objects.filter(razon_social__icontains=q)[:10]
+        proveedores = buscar('proveedor', q, Proveedores.objects.select_related('id_usuario', 'id_usuario_modificacion'))
         serializer = ProveedoresSerializer(proveedores, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='buscar-productos')
     def buscar_productos(self, request):
         q = request.GET.get('q', '')
-        productos = Productos.objects.filter(nombre__icontains=q)[:10]
+        queryset = Productos.objects.select_related('id_usuario', 'id_usuario_modificacion')
+        ids = catalogo_productos.buscar(q)
+        if ids:
+            encontrados = queryset.in_bulk(ids)
+            productos = [encontrados[pk] for pk in ids if pk in encontrados]
+        else:
+            productos = [] if q.strip() else queryset[:10]
         serializer = ProductosSerializer(productos, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class DocumentFacturasView(viewsets.ModelViewSet):
+class DocumentFacturasView(SerializacionMedidaMixin, ExportacionMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = DocumentFacturasSerializer
     queryset = DocumentFacturas.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-
+    pagination_class = CursorPaginacion
+    cursor_ordering = ('-created_at', '-id_factura')
+    ordenamientos = {
+        'created_at': ('created_at', 'id_factura'),
+        '-created_at': ('-created_at', '-id_factura'),
+    }
+    filtros = {
+        'estado': ('estado', 'texto'),
+        'empresa': ('empresa', 'texto'),
+    }
+    query_plan = {
+        'default': {'select_related': ['id_usuario']},
+        'destroy': {},
+        'exportar': {},
+        'url': {'only': ['id_factura', 'title', 'file_url']},
+    }
+    nombre_exportacion = 'facturas'
+    columnas_exportacion = [
+        ('Título', 'title'),
+        ('Empresa', 'empresa'),
+        ('Subido por', 'id_usuario__username'),
+        ('Fecha Subida', 'created_at'),
+        ('Observación', 'observacion'),
+        ('Estado', 'estado'),
+    ]
+
+    def perform_create(self, serializer):
+        # Páginas y metadatos se leen del bucket en segundo plano
+        factura = serializer.save()
+        encolar_metadata_factura(factura)
    
     @action(detail=False, methods=['get'], url_path='buscar-por-titulo')
     def buscar_por_titulo(self, request):
         q = request.GET.get('q', '')
-        pdfs = DocumentFacturas.objects.filter(title__icontains=q)[:10]
+        pdfs = buscar('factura', q, self.get_queryset())
         serializer = self.get_serializer(pdfs, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+    @action(detail=True, methods=['get'], url_path='url')
+    def url(self, request, pk=None):
+        """
+        Firma bajo demanda la URL de una factura.
+        ?mode=view la abre en el navegador, ?mode=download fuerza la descarga.
+        """
+        mode = request.query_params.get('mode', 'view')
+        if mode not in ('view', 'download'):
+            return Response({'error': 'mode debe ser view o download'}, status=status.HTTP_400_BAD_REQUEST)
+
+        factura = self.get_object()
+        serializer = self.get_serializer()
+        url = serializer.get_download_url(factura) if mode == 'download' else serializer.get_signed_url(factura)
+        if url is None:
+            return Response({'error': 'No se pudo generar la URL del archivo'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'url': url})
+
+    @action(detail=False, methods=['post'], url_path='solicitar-subida')
+    def solicitar_subida(self, request):
+        """
+        Paso 1 de la subida directa: entrega una URL firmada para hacer PUT del
+        PDF al bucket con una key elegida por el servidor.
+        """
+        solicitud = SolicitudSubidaFacturaSerializer(data=request.data)
+        solicitud.is_valid(raise_exception=True)
+
+        key = generar_key_factura(solicitud.validated_data['file_name'])
+        content_type = solicitud.validated_data['content_type']
+        upload_url = url_subida_firmada(key, content_type)
+        registrar_subida(key, request.user.pk)
+        return Response({
+            'key': key,
+            'upload_url': upload_url,
+            'method': 'PUT',
+            'headers': {'Content-Type': content_type},
+            'expires_in': SUBIDA_EXPIRA,
+        })
+
+    @action(detail=False, methods=['post'], url_path='confirmar-subida')
+    def confirmar_subida(self, request):
+        """
+        Paso 2 de la subida directa: verifica con HEAD que el archivo está en el
+        bucket y registra la factura con su tamaño real.
+        """
+        confirmacion = ConfirmarSubidaFacturaSerializer(data=request.data)
+        confirmacion.is_valid(raise_exception=True)
+        key = confirmacion.validated_data['key']
+
+        if DocumentFacturas.objects.filter(file_url=url_desde_key(key)).exists():
+            return Response({'error': 'Esta subida ya fue confirmada'}, status=status.HTTP_409_CONFLICT)
+
+        # Solo se confirma (o se borra) la key que solicitar-subida entregó a este usuario
+        if not subida_pendiente(key, request.user.pk):
+            return Response({'error': 'La subida no fue solicitada o ya venció'}, status=status.HTTP_400_BAD_REQUEST)
+
+        objeto = metadata_objeto(key)
+        if objeto is None:
+            return Response({'error': 'El archivo no se encuentra en el bucket'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_size = objeto['ContentLength']
+        if file_size > settings.FACTURAS_MAX_BYTES:
+            obtener_cliente_s3().delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+            cerrar_subida(key)
+            return Response({'error': 'El archivo supera el tamaño máximo permitido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {campo: valor for campo, valor in request.data.items() if campo != 'key'}
+        data['file_size'] = file_size
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        factura = serializer.save(file_url=url_desde_key(key), file_size=file_size)
+        cerrar_subida(key)
+        encolar_metadata_factura(factura)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='estadisticas-urls', permission_classes=[permissions.IsAdminUser])
+    def estadisticas_urls(self, request):
+        """Aciertos y fallos del cache de URLs firmadas en este proceso."""
+        return Response(urls_firmadas.estadisticas())
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
 
         # Obtener el nombre del archivo del campo file_url
-        file_key = instance.file_url.split(f"{os.getenv('AWS_STORAGE_BUCKET_NAME')}/")[-1]
-
-        # Conexión a R2
-        s3 = boto3.client(
-            "s3",
-            endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        )
+        file_key = key_desde_url(instance.file_url)
+        s3 = obtener_cliente_s3()
 
         try:
-            s3.delete_object(Bucket=os.getenv("AWS_STORAGE_BUCKET_NAME"), Key=file_key)
+            s3.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=file_key)
             print(f"✅ Archivo eliminado de R2: {file_key}")
         except Exception as e:
             print(f"⚠️ Error al eliminar en R2: {e}")
@@ -570,22 +1131,99 @@ class DocumentFacturasView(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
-class NotaProductoView(viewsets.ModelViewSet):
+class NotaProductoView(SerializacionMedidaMixin, LoteMixin, ExportacionMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """
     ViewSet para manejar NotaProducto.
     - CRUD de NotaProducto
-    - Subida de Excel para cargar/actualizar datos
+    - Listado compacto para el grid de picking (?view=compact)
+    - Altas, cambios y bajas por lote (lote/)
+    - Exportación a CSV/XLSX (exportar/)
+    - Subida de Excel para cargar/actualizar datos en segundo plano
     """
     permission_classes = [permissions.IsAuthenticated]
     queryset = NotaProducto.objects.all()
     serializer_class = NotaProductoSerializer
-
+    pagination_class = CursorPaginacion
+    cursor_ordering = ('-fecha_creacion', '-id')
+    ordenamientos = {
+        'fecha_creacion': ('fecha_creacion', 'id'),
+        '-fecha_creacion': ('-fecha_creacion', '-id'),
+    }
+    filtros = {
+        'estado': ('estado', 'texto'),
+        'tipo': ('tipo', 'texto'),
+        'nota': ('nota__num_nota', 'entero'),
+        'nota_id': ('nota_id', 'entero'),
+    }
+    query_plan = {
+        # NotaProductoSerializer anida la nota (con su cliente) y el producto completos
+        'default': {
+            'select_related': [
+                'nota__cliente__id_usuario', 'nota__cliente__id_usuario_modificacion',
+                'nota__id_usuario', 'nota__id_usuario_modificacion',
+                'producto__id_usuario', 'producto__id_usuario_modificacion',
+                'usuario_creacion', 'usuario_modificacion',
+            ],
+        },
+        'destroy': {},
+        'exportar': {},
+    }
+    operaciones_lote = {
+        'POST': masivo.crear_nota_productos,
+        'PATCH': masivo.actualizar_nota_productos,
+        'DELETE': masivo.eliminar_nota_productos,
+    }
+    nombre_exportacion = 'picking'
+    columnas_exportacion = [
+        ('Nota', 'nota__num_nota'),
+        ('Cliente', 'nota__cliente__razon_social'),
+        ('Código', 'producto__codigo'),
+        ('Producto', 'producto__nombre'),
+        ('Cantidad', 'cantidad'),
+        ('Fecha Despacho', 'nota__fecha_despacho'),
+        ('Local', 'tipo'),
+        ('Fecha Creación', 'fecha_creacion'),
+        ('Usuario Creador', 'usuario_creacion__username'),
+        ('Usuario Modificador', 'usuario_modificacion__username'),
+        ('Fecha Modificación', 'fecha_modificacion'),
+        ('Observación', 'observacion'),
+        ('Estado', 'estado'),
+    ]
+
+    # Columnas que muestra PickingGrid.jsx, resueltas en una sola consulta values()
+    campos_compactos = ['id', 'cantidad', 'tipo', 'observacion', 'estado', 'fecha_creacion', 'fecha_modificacion']
+    campos_compactos_relacionados = {
+        'id_nota': F('nota_id'),
+        'num_nota': F('nota__num_nota'),
+        'fecha_despacho': F('nota__fecha_despacho'),
+        'estado_solicitud': F('nota__estado_solicitud'),
+        'razon_social_cliente': F('nota__cliente__razon_social'),
+        'id_producto': F('producto_id'),
+        'producto_nombre': F('producto__nombre'),
+        'producto_codigo': F('producto__codigo'),
+        'usuario_creador': F('usuario_creacion__username'),
+        'usuario_modificador': F('usuario_modificacion__username'),
+    }
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('view') != 'compact':
+            return super().list(request, *args, **kwargs)
+
+        # Filas planas sin pasar por los serializers anidados
+        queryset = self.filter_queryset(
+            NotaProducto.objects.values(*self.campos_compactos, **self.campos_compactos_relacionados)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(list(queryset))
 
     @action(detail=False, methods=['post'], url_path='upload_excel')
     def upload_excel(self, request):
         """
-        Sube un Excel con columnas [numnota, cod_articu, pend] y
-        lo guarda en la tabla NotaProducto (crea o actualiza).
+        Recibe un Excel (xlsx) o CSV con columnas [numnota, cod_articu, pend] y
+        encola su carga en NotaProducto (crea o actualiza).
+        Responde de inmediato con el id de la tarea para consultar el avance.
         """
         file = request.FILES.get("file")
         if not file:
@@ -594,49 +1232,39 @@ class NotaProductoView(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            columnas_necesarias = ['numnota', 'cod_articu', 'pend']
-            df = pd.read_excel(file, usecols=columnas_necesarias)
-
-            registros_procesados = 0
-            for _, row in df.iterrows():
-
-                num_nota_excel = int(row['numnota'])
-                cod_articu_excel = str(row['cod_articu']).strip()
-                cantidad = int(row['pend'])
-
-                try:
-                   
-                    nota = Notas.objects.get(num_nota=num_nota_excel)
-                    producto = Productos.objects.get(codigo=cod_articu_excel)
-
-                    obj, created = NotaProducto.objects.update_or_create(
-                        nota=nota,
-                        producto=producto,
-                        defaults={
-                            'cantidad': cantidad,
-                            'usuario_creacion': request.user, 
-                            'usuario_modificacion': request.user
-                            }
-                    )
-                    if created:
-                        obj.usuario_creacion = request.user
-                        obj.save()
-                    registros_procesados += 1
-
-                except (Notas.DoesNotExist, Productos.DoesNotExist):
-                    # Si no existe la nota o el producto, se omite
-                    continue
-
-            return Response(
-                {"msg": f"Archivo procesado correctamente. {registros_procesados} registros cargados/actualizados."},
-                status=status.HTTP_200_OK
-            )
-
-        except Exception as e:
+        if not file.name.lower().endswith(('.xlsx', '.xls', '.csv')):
             return Response(
-                {"error": f"Error al procesar el archivo: {str(e)}"},
+                {"error": "El archivo debe ser .xlsx, .xls o .csv"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    
\ No newline at end of file
+        importacion = ImportacionExcel.objects.create(
+            archivo=file,
+            nombre_archivo=file.name,
+            id_usuario=request.user,
+        )
+        encolar_importacion(importacion)
+
+        return Response(
+            {
+                "msg": "Archivo recibido, la carga se está procesando.",
+                **ImportacionExcelSerializer(importacion).data,
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    # Sin throttling: el frontend consulta el avance cada pocos segundos
+    @action(detail=False, methods=['get'], url_path=r'upload_excel/(?P<job_id>\d+)', throttle_classes=[])
+    def estado_upload_excel(self, request, job_id=None):
+        """Avance de una carga: filas procesadas, omitidas y errores."""
+        # Cada usuario ve solo sus cargas; el personal las ve todas
+        filtros = {'id_importacion': job_id}
+        if not request.user.is_staff:
+            filtros['id_usuario'] = request.user
+        marcar_abandonadas(**filtros)
+        try:
+            importacion = ImportacionExcel.objects.select_related('id_usuario').get(**filtros)
+        except ImportacionExcel.DoesNotExist:
+            return Response({"error": "No existe esa carga"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(ImportacionExcelSerializer(importacion).data)
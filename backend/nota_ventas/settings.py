@@ -62,6 +62,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'nota_app.middleware.JWTTokenFromCookieMiddleware',
+    'nota_app.middleware.MetricasMiddleware',
     'csp.middleware.CSPMiddleware',
     'django.middleware.security.SecurityMiddleware', 
     'whitenoise.middleware.WhiteNoiseMiddleware',   
@@ -117,6 +118,33 @@ DATABASES = {
     }
 }
 
+# Cache compartido entre los workers de gunicorn (resumen del dashboard,
+# autocompletados, URLs firmadas con URLS_FIRMADAS_CACHE='django').
+# Con REDIS_URL se usa Redis; si no, en producción la tabla de cache en MySQL,
+# que se crea con `python manage.py createcachetable`. En local, un solo
+# proceso, basta la memoria.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif IS_PRODUCTION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_USER_MODEL = 'nota_app.Usuarios'
 
 # Password validation
@@ -172,6 +200,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', 
     ],
+    'DEFAULT_FILTER_BACKENDS': [
+        'nota_app.filtros.FiltrosDeclarativos',
+    ],
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
     'DEFAULT_VERSION': 'v1',
     'ALLOWED_VERSIONS': ['v1', 'v2'],
@@ -182,7 +213,8 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '30/hour',
-        'user': '200/hour'
+        'user': '200/hour',
+        'typeahead': '3000/hour'
     }
 }
 
@@ -272,6 +304,14 @@ if IS_PRODUCTION:
                 'class': 'logging.FileHandler',
                 'filename': os.path.join(BASE_DIR, 'django.log'),
             },
+            'metricas': {
+                'level': 'INFO',
+                'class': 'logging.StreamHandler',
+                'formatter': 'mensaje',
+            },
+        },
+        'formatters': {
+            'mensaje': {'format': '%(message)s'},
         },
         'loggers': {
             'django': {
@@ -279,6 +319,12 @@ if IS_PRODUCTION:
                 'level': 'WARNING',
                 'propagate': True,
             },
+            # Una línea JSON por solicitud (ver MetricasMiddleware)
+            'nota_app.metricas': {
+                'handlers': ['metricas'],
+                'level': 'INFO',
+                'propagate': False,
+            },
         },
     }
 
@@ -301,6 +347,27 @@ AWS_S3_REGION_NAME = "auto"
 AWS_S3_SIGNATURE_VERSION = "s3v4"
 AWS_DEFAULT_ACL = 'private'
 AWS_S3_FILE_OVERWRITE = False
+AWS_S3_MAX_POOL_CONNECTIONS = 20  # Conexiones del cliente S3 compartido (nota_app/almacenamiento.py)
+
+# Cache de URLs firmadas de facturas: 'memoria' (por proceso) o 'django' (CACHES['default'])
+URLS_FIRMADAS_CACHE = os.getenv('URLS_FIRMADAS_CACHE', 'memoria')
+URLS_FIRMADAS_MAX_ENTRADAS = 5000
+
+# Segundos que se guarda en cache cada resumen del dashboard (se invalida al cambiar notas)
+RESUMEN_CACHE_TIMEOUT = 10 * 60
+
+# Segundos entre revisiones del catálogo de productos en memoria de cada proceso
+CATALOGO_PRODUCTOS_REFRESCO = 30
+
+# Segundos que se guardan las sugerencias de los autocompletados
+TYPEAHEAD_CACHE_TIMEOUT = 5 * 60
+
+# Días que se guardan los borrados para la sincronización incremental;
+# un sync_token más antiguo obliga a recargar el listado completo
+SINCRONIZACION_RETENCION_DIAS = 30
+
+# Tamaño máximo de una factura subida directo al bucket
+FACTURAS_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
 
 AWS_S3_OBJECT_PARAMETERS = {
     "ContentDisposition": "inline",
@@ -320,8 +387,9 @@ CONTENT_SECURITY_POLICY = {
         "default-src": ["'self'"],
         "script-src": ["'self'"],
         "style-src": ["'self'", "'unsafe-inline'"],
-        "img-src": ["'self'", "data:", AWS_S3_ENDPOINT_URL],
-        "connect-src": ["'self'", AWS_S3_ENDPOINT_URL],
+        # Sin AWS_S3_ENDPOINT_URL (tests, desarrollo) el bucket no se agrega
+        "img-src": ["'self'", "data:", *filter(None, [AWS_S3_ENDPOINT_URL])],
+        "connect-src": ["'self'", *filter(None, [AWS_S3_ENDPOINT_URL])],
         "frame-ancestors": ["'none'"],
     }
 }
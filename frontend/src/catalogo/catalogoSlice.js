@@ -0,0 +1,48 @@
+import { createSlice } from '@reduxjs/toolkit';
+import { sincronizarCatalogo } from './catalogoThunk';
+
+// Cada catálogo guarda sus filas por id; las filas repetidas se reemplazan
+const catalogoVacio = { porId: {}, syncToken: null, loading: false, error: null };
+
+const catalogoSlice = createSlice({
+  name: 'catalogo',
+  initialState: {},
+  reducers: {
+    limpiarCatalogos: () => ({}),
+  },
+  extraReducers: (builder) => {
+    builder
+      .addCase(sincronizarCatalogo.pending, (state, action) => {
+        const { recurso } = action.meta.arg;
+        state[recurso] = { ...(state[recurso] || catalogoVacio), loading: true, error: null };
+      })
+      .addCase(sincronizarCatalogo.fulfilled, (state, action) => {
+        const { recurso, campoId } = action.meta.arg;
+        const { results, deleted, sync_token, completo } = action.payload;
+        const catalogo = state[recurso];
+        if (completo) {
+          catalogo.porId = {};
+        }
+        results.forEach((fila) => {
+          catalogo.porId[fila[campoId]] = fila;
+        });
+        deleted.forEach((id) => {
+          delete catalogo.porId[id];
+        });
+        catalogo.syncToken = sync_token;
+        catalogo.loading = false;
+      })
+      .addCase(sincronizarCatalogo.rejected, (state, action) => {
+        const { recurso } = action.meta.arg;
+        state[recurso].loading = false;
+        state[recurso].error = action.payload?.detail || 'Error desconocido';
+      });
+  }
+});
+
+// Filas del catálogo por id; quien lo usa arma la lista con useMemo
+const sinFilas = {};
+export const seleccionarCatalogo = (recurso) => (state) => state.catalogo[recurso]?.porId || sinFilas;
+
+export const { limpiarCatalogos } = catalogoSlice.actions;
+export default catalogoSlice.reducer;
@@ -0,0 +1,33 @@
+import { createAsyncThunk } from '@reduxjs/toolkit';
+import { api } from '../utils/api';
+
+// Si el listado se pagina, recorre las páginas; deleted y sync_token vienen en la última
+const traerCambios = async (recurso, syncToken) => {
+  let { data } = await api.get(`/${recurso}/`, { params: { sync_token: syncToken } });
+  const results = [...data.results];
+  while (data.next) {
+    ({ data } = await api.get(data.next));
+    results.push(...data.results);
+  }
+  return { results, deleted: data.deleted, sync_token: data.sync_token };
+};
+
+// Sincroniza una copia local de un catálogo (productos, cliente, ...).
+// La primera vez pide la foto completa (sync_token vacío); después solo los
+// cambios desde el último sync_token. Si el token venció (410) recarga todo.
+export const sincronizarCatalogo = createAsyncThunk('catalogo/sincronizar', async ({ recurso }, thunkAPI) => {
+  const syncToken = thunkAPI.getState().catalogo[recurso]?.syncToken || '';
+  try {
+    return { ...(await traerCambios(recurso, syncToken)), completo: !syncToken };
+  } catch (error) {
+    if (error.response?.status === 410) {
+      try {
+        return { ...(await traerCambios(recurso, '')), completo: true };
+      } catch (error) {
+        console.error(error);
+      }
+    }
+    console.error(error);
+    return thunkAPI.rejectWithValue({ detail: `Error al sincronizar ${recurso}` });
+  }
+});
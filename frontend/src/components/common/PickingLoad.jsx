@@ -7,6 +7,18 @@ import DropZone from "./DropZone";
 
 
 
+const INTERVALO_CONSULTA_MS = 1500;
+
+// Consulta el avance de la carga hasta que termine
+const esperarCarga = async (jobId) => {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, INTERVALO_CONSULTA_MS));
+        const { data } = await api.get(`notas_productos/upload_excel/${jobId}/`);
+        if (data.estado === 'TERMINADO' || data.estado === 'ERROR') return data;
+    }
+};
+
+
 const PickingLoad = () => {
 
     const [loading, setLoading] = useState(false);
@@ -22,7 +34,21 @@ const PickingLoad = () => {
         try {
             setLoading(true);
             const res = await api.post('notas_productos/upload_excel/', formData, { headers: { 'Content-Type': 'multipart/form-data' } });
-            enqueueSnackbar(res.data.msg || "Archivo subido con éxito", { variant: "success" });
+            enqueueSnackbar(res.data.msg || "Archivo recibido", { variant: "info" });
+
+            const resultado = await esperarCarga(res.data.job_id);
+            if (resultado.estado === 'ERROR') {
+                enqueueSnackbar(`Error al procesar el archivo: ${resultado.error}`, { variant: "error" });
+                return;
+            }
+            enqueueSnackbar(`Archivo procesado correctamente. ${resultado.filas_procesadas} registros cargados/actualizados.`, { variant: "success" });
+
+            // omitidas trae solo el detalle de las primeras; el total viene en filas_omitidas
+            const omitidas = resultado.omitidas || [];
+            if (resultado.filas_omitidas) {
+                const { fila, motivo } = omitidas[0];
+                enqueueSnackbar(`${resultado.filas_omitidas} filas omitidas (fila ${fila}: ${motivo})`, { variant: "warning" });
+            }
 
         } catch (err) {
             console.error("Error subiendo el archivo:", err);
@@ -39,7 +65,7 @@ const PickingLoad = () => {
         <>
         <DropZone
             onFilesDrop={handleFilesDrop}
-            accept='.xls,.xlsx'
+            accept='.xls,.xlsx,.csv'
             loading={loading}
         />
         </>
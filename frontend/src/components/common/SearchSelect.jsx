@@ -1,5 +1,5 @@
 import { Autocomplete, TextField } from "@mui/material";
-import { useState, useMemo } from "react";
+import { useState, useMemo, useRef } from "react";
 import { Controller } from "react-hook-form";
 import { api } from "../../utils/api";
 import { debounce } from "lodash";
@@ -9,19 +9,30 @@ const SearchSelect = ({
     control,
     label,
     endpoint,       // ej: "/proveedores/buscar/"
+    entidad,        // cliente | producto | proveedor | factura: usa /typeahead/ con opciones {id, label}
     getOptionLabel, // cómo mostrar la opción
     onSelect,       // callback cuando seleccionas un item
     debounceTime = 400,
 }) => {
     const [options, setOptions] = useState([]);
+    // Respuestas ya recibidas en este campo, para no repetir la petición al borrar
+    const cacheRef = useRef(new Map());
 
     const fetchOptions = async (texto) => {
-        if (!texto) {
+        const query = texto?.trim();
+        if (!query) {
             setOptions([]);
             return;
         }
+        if (cacheRef.current.has(query)) {
+            setOptions(cacheRef.current.get(query));
+            return;
+        }
         try {
-            const { data } = await api.get(endpoint, { params: { q: texto } });
+            const { data } = entidad
+                ? await api.get("/typeahead/", { params: { entidad, q: query } })
+                : await api.get(endpoint, { params: { q: query } });
+            cacheRef.current.set(query, data);
             setOptions(data);
         } catch (error) {
             console.error(error);
@@ -29,10 +40,10 @@ const SearchSelect = ({
     };
 
     // Memoizamos el debounce para que no se regenere en cada render
-    const debouncedFetch = useMemo(
-        () => debounce(fetchOptions, debounceTime),
-        [endpoint, debounceTime]
-    );
+    const debouncedFetch = useMemo(() => {
+        cacheRef.current = new Map();
+        return debounce(fetchOptions, debounceTime);
+    }, [endpoint, entidad, debounceTime]);
 
     return (
         <Controller
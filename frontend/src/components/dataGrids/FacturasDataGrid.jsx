@@ -1,13 +1,12 @@
 import { format, parseISO } from "date-fns";
 import { useSnackbar } from "notistack";
-import { useCallback, useEffect, useState } from "react";
-import { api } from "../../utils/api";
-import { exportExcel } from "../../utils/exportExcel";
+import { useEffect, useMemo, useState } from "react";
+import { api, descargarExportacion, fetchUrlFactura, subirFactura } from "../../utils/api";
+import usePaginacionServidor from "../../hooks/usePaginacionServidor";
 import CustomToolBar from "../common/CustomToolbar";
 import ConfirmDialog from "../common/ConfirmDialog";
 import {
   Box,
-  CircularProgress,
   Typography,
   IconButton,
 } from "@mui/material";
@@ -39,13 +38,9 @@ const formatearFacturas = (pdf) => ({
   observacion: pdf.observacion
     ? pdf.observacion.toUpperCase()
     : "",
-  signed_url: pdf.signed_url || pdf.file_url,
-  download_url: pdf.download_url || pdf.signed_url || pdf.file_url,
 });
 
 const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
-  const [facturas, setfacturas] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [uploading, setUploading] = useState(false);
   const [confirmOpen, setConfirmOpen] = useState(false);
   const [confirmOpenPagar, setConfirmOpenPagar] = useState(false);
@@ -57,26 +52,22 @@ const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
   const { extractPDFMetadata, extracting } = usePDFMetadata();
 
 
-  const fetchFacturas = useCallback(async () => {
-    try {
-      const res = await api.get("/facturas/");
-      const formateados = res.data
-        .filter((n) => n.estado === estado)
-        .map(formatearFacturas);
-      setfacturas(formateados);
-    } catch (error) {
+  // Una página a la vez desde el servidor, por fecha de subida
+  const { filas, error, recargar, gridProps, columnasOrdenables } = usePaginacionServidor(
+    "/facturas/",
+    { urls: false, estado },
+    { ordenables: ["created_at"], ordenInicial: [{ field: "created_at", sort: "desc" }] },
+  );
+  const facturas = useMemo(() => filas.map(formatearFacturas), [filas]);
+
+  useEffect(() => {
+    if (error) {
       console.error("Error al obtener las Facturas:", error);
       enqueueSnackbar("Error al cargar las Facturas", {
         variant: "error",
       });
-    } finally {
-      setLoading(false);
     }
-  }, [enqueueSnackbar, estado]);
-
-  useEffect(() => {
-    fetchFacturas();
-  }, [fetchFacturas]);
+  }, [error, enqueueSnackbar]);
 
   const handleFilesDrop = async (files) => {
     setUploading(true);
@@ -111,21 +102,15 @@ const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
 
     const normalizedFile = normalizeFileName(currentFile);
 
-    const formData = new FormData();
-    formData.append('file', normalizedFile);
-    formData.append('title', metadata.title);
-    formData.append('file_size', currentFile.size);
-    if (metadata.observacion) formData.append('observacion', metadata.observacion);
-    if (metadata.empresa) formData.append('empresa', metadata.empresa);
-
+    const datos = { title: metadata.title };
+    if (metadata.observacion) datos.observacion = metadata.observacion;
+    if (metadata.empresa) datos.empresa = metadata.empresa;
 
     try {
-      await api.post('/facturas/', formData, {
-        headers: { 'Content-Type': 'multipart/form-data' },
-      });
+      await subirFactura(normalizedFile, datos);
 
       enqueueSnackbar('Factura subida correctamente', { variant: 'success' });
-      fetchFacturas();
+      recargar();
     } catch (error) {
       console.error('Error subiendo la Factura:', error);
       enqueueSnackbar('Error al subir la Factura', { variant: 'error' });
@@ -137,25 +122,39 @@ const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
     }
   };
 
-  const onExport = () => {
-    const columnsToExport = columns.filter((c) => !c.disableExport);
-    exportExcel(columnsToExport, facturas, exportNombre);
+  const onExport = async () => {
+    try {
+      await descargarExportacion("/facturas/exportar/", { estado }, exportNombre);
+    } catch (error) {
+      console.error("Error al exportar las Facturas:", error);
+      enqueueSnackbar("Error al exportar las Facturas", { variant: "error" });
+    }
   };
 
-  const handleView = (pdf) => {
-
-    window.open(pdf.signed_url, "_blank");
+  // Las URLs se firman al hacer clic; la ventana se abre antes para que no la bloquee el navegador
+  const handleView = async (pdf) => {
+    const ventana = window.open("", "_blank");
+    try {
+      ventana.location.href = await fetchUrlFactura(pdf.id_factura, "view");
+    } catch (error) {
+      ventana?.close();
+      console.error("Error al abrir la Factura:", error);
+      enqueueSnackbar("Error al abrir la Factura", { variant: "error" });
+    }
   };
 
- const handleDownload = (pdf) => {
-  if (!pdf.download_url) return;
-
-  const link = document.createElement("a");
-  link.href = pdf.download_url;
-  link.download = pdf.title ? `${pdf.title}.pdf` : "archivo.pdf";
-  document.body.appendChild(link);
-  link.click();
-  document.body.removeChild(link);
+ const handleDownload = async (pdf) => {
+  try {
+    const link = document.createElement("a");
+    link.href = await fetchUrlFactura(pdf.id_factura, "download");
+    link.download = pdf.title ? `${pdf.title}.pdf` : "archivo.pdf";
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+  } catch (error) {
+    console.error("Error al descargar la Factura:", error);
+    enqueueSnackbar("Error al descargar Factura", { variant: "error" });
+  }
 };
 
 
@@ -174,7 +173,7 @@ const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
       await api.delete(`/facturas/${pdfSeleccionado.id_factura}/`);
       enqueueSnackbar("factura eliminada correctamente", { variant: "success" });
       setConfirmOpen(false);
-      fetchFacturas(); // refresca la grilla
+      recargar(); // refresca la grilla
     } catch (error) {
       console.error("Error al eliminar la Factura:", error);
       enqueueSnackbar("Error al eliminar la Factura", { variant: "error" });
@@ -186,7 +185,7 @@ const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
       await api.patch(`/facturas/${pdfSeleccionado.id_factura}/`, { estado: "PAGADO" });
       enqueueSnackbar("Factura marcada como PAGADO", { variant: "success" });
       setConfirmOpenPagar(false);
-      fetchFacturas(); // refresca la grilla
+      recargar(); // refresca la grilla
     } catch (error) {
       console.error("Error al marcar la Factura como PAGADO:", error);
       enqueueSnackbar("Error al marcar la Factura como PAGADO", { variant: "error" });
@@ -195,14 +194,6 @@ const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
 
 
 
-  if (loading) {
-    return (
-      <Box display="flex" justifyContent="center" mt={30}>
-        <CircularProgress />
-      </Box>
-    );
-  }
-
   const columns = [
     {
       field: "title",
@@ -358,18 +349,15 @@ const FacturasDataGrid = ({ nombre, exportNombre, estado }) => {
 
       <DataGrid
         rows={facturas}
-        columns={columns}
-        loading={loading}
+        columns={columnasOrdenables(columns)}
         getRowId={(row) => row.id_factura}
-        pageSize={10}
+        {...gridProps}
         slots={{ toolbar: CustomToolBar }}
         slotProps={{ toolbar: { onExport } }}
         showToolbar
-        rowsPerPageOptions={[10, 20, 50]}
         getRowHeight={() => 30}
         disableSelectionOnClick
         initialState={{
-          sorting: { sortModel: [{ field: "created_at", sort: "desc" }] },
           columns: {
             columnVisibilityModel: {
               creator: false,
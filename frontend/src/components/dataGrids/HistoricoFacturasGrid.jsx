@@ -1,13 +1,12 @@
 import { format, parseISO } from "date-fns";
 import { useSnackbar } from "notistack";
-import { useCallback, useEffect, useState } from "react";
-import { api } from "../../utils/api";
-import { exportExcel } from "../../utils/exportExcel";
+import { useEffect, useMemo, useState } from "react";
+import { api, descargarExportacion, fetchUrlFactura } from "../../utils/api";
+import usePaginacionServidor from "../../hooks/usePaginacionServidor";
 import CustomToolBar from "../common/CustomToolbar";
 import ConfirmDialog from "../common/ConfirmDialog";
 import {
   Box,
-  CircularProgress,
   Typography,
   IconButton,
 } from "@mui/material";
@@ -41,8 +40,6 @@ const formatearFacturas = (pdf) => ({
 });
 
 const HistoricoFacturasGrid = ({ nombre, exportNombre, estado }) => {
-  const [facturas, setfacturas] = useState([]);
-  const [loading, setLoading] = useState(true)
   const [confirmOpen, setConfirmOpen] = useState(false);
   const [confirmOpenPagar, setConfirmOpenPagar] = useState(false);
   const [pdfSeleccionado, setPdfSeleccionado] = useState(null);
@@ -50,52 +47,53 @@ const HistoricoFacturasGrid = ({ nombre, exportNombre, estado }) => {
 
 
 
-  const fetchFacturas = useCallback(async () => {
-    try {
-      const res = await api.get("/facturas/");
-      const formateados = res.data
-        .filter((n) => n.estado === estado)
-        .map(formatearFacturas);
-      setfacturas(formateados);
-    } catch (error) {
+  // Una página a la vez desde el servidor, por fecha de subida
+  const { filas, error, recargar, gridProps, columnasOrdenables } = usePaginacionServidor(
+    "/facturas/",
+    { urls: false, estado },
+    { ordenables: ["created_at"], ordenInicial: [{ field: "created_at", sort: "desc" }] },
+  );
+  const facturas = useMemo(() => filas.map(formatearFacturas), [filas]);
+
+  useEffect(() => {
+    if (error) {
       console.error("Error al obtener las Facturas:", error);
       enqueueSnackbar("Error al cargar las Facturas", {
         variant: "error",
       });
-    } finally {
-      setLoading(false);
     }
-  }, [enqueueSnackbar, estado]);
-
-  useEffect(() => {
-    fetchFacturas();
-  }, [fetchFacturas]);
+  }, [error, enqueueSnackbar]);
 
 
-  const onExport = () => {
-    const columnsToExport = columns.filter((c) => !c.disableExport);
-    exportExcel(columnsToExport, facturas, exportNombre);
+  const onExport = async () => {
+    try {
+      await descargarExportacion("/facturas/exportar/", { estado }, exportNombre);
+    } catch (error) {
+      console.error("Error al exportar las Facturas:", error);
+      enqueueSnackbar("Error al exportar las Facturas", { variant: "error" });
+    }
   };
 
-  const handleView = (fileUrl) => {
-    window.open(fileUrl, "_blank");
+  // Las URLs se firman al hacer clic; la ventana se abre antes para que no la bloquee el navegador
+  const handleView = async (pdfId) => {
+    const ventana = window.open("", "_blank");
+    try {
+      ventana.location.href = await fetchUrlFactura(pdfId, "view");
+    } catch (error) {
+      ventana?.close();
+      console.error(error);
+      enqueueSnackbar("Error al abrir la Factura", { variant: "error" });
+    }
   };
 
   const handleDownload = async (pdfId, pdfTitle) => {
     try {
-      const res = await api.get(`facturas/${pdfId}/download_factura/`, {
-        responseType: "blob",
-      });
-
-      const blob = res.data;
-      const url = window.URL.createObjectURL(blob);
       const link = document.createElement("a");
-      link.href = url;
+      link.href = await fetchUrlFactura(pdfId, "download");
       link.download = pdfTitle.endsWith(".pdf") ? pdfTitle : `${pdfTitle}.pdf`;
       document.body.appendChild(link);
       link.click();
       link.remove();
-      window.URL.revokeObjectURL(url);
     } catch (error) {
       console.error(error);
       enqueueSnackbar("Error al descargar Factura", { variant: "error" });
@@ -117,7 +115,7 @@ const HistoricoFacturasGrid = ({ nombre, exportNombre, estado }) => {
       await api.delete(`/facturas/${pdfSeleccionado.id_factura}/`);
       enqueueSnackbar("factura eliminada correctamente", { variant: "success" });
       setConfirmOpen(false);
-      fetchFacturas(); // refresca la grilla
+      recargar(); // refresca la grilla
     } catch (error) {
       console.error("Error al eliminar la Factura:", error);
       enqueueSnackbar("Error al eliminar la Factura", { variant: "error" });
@@ -129,7 +127,7 @@ const HistoricoFacturasGrid = ({ nombre, exportNombre, estado }) => {
       await api.patch(`/facturas/${pdfSeleccionado.id_factura}/`, { estado: "NO PAGADO" });
       enqueueSnackbar("Factura marcada como PAGADO", { variant: "success" });
       setConfirmOpenPagar(false);
-      fetchFacturas(); // refresca la grilla
+      recargar(); // refresca la grilla
     } catch (error) {
       console.error("Error al marcar la Factura como PAGADO:", error);
       enqueueSnackbar("Error al marcar la Factura como PAGADO", { variant: "error" });
@@ -138,14 +136,6 @@ const HistoricoFacturasGrid = ({ nombre, exportNombre, estado }) => {
 
 
 
-  if (loading) {
-    return (
-      <Box display="flex" justifyContent="center" mt={30}>
-        <CircularProgress />
-      </Box>
-    );
-  }
-
   const columns = [
     {
       field: "title",
@@ -219,7 +209,7 @@ const HistoricoFacturasGrid = ({ nombre, exportNombre, estado }) => {
           <IconButton
             color="primary"
             size="small"
-            onClick={() => handleView(params.row.file_url)}
+            onClick={() => handleView(params.row.id_factura)}
             title="Ver Factura"
           >
             <Visibility />
@@ -295,18 +285,15 @@ const HistoricoFacturasGrid = ({ nombre, exportNombre, estado }) => {
 
       <DataGrid
         rows={facturas}
-        columns={columns}
-        loading={loading}
+        columns={columnasOrdenables(columns)}
         getRowId={(row) => row.id_factura}
-        pageSize={10}
+        {...gridProps}
         slots={{ toolbar: CustomToolBar }}
         slotProps={{ toolbar: { onExport } }}
         showToolbar
-        rowsPerPageOptions={[10, 20, 50]}
         getRowHeight={() => 30}
         disableSelectionOnClick
         initialState={{
-          sorting: { sortModel: [{ field: "created_at", sort: "desc" }] },
           columns: {
             columnVisibilityModel: {
               creator: false,
@@ -1,9 +1,11 @@
 import { format, parseISO } from "date-fns";
 import { useSnackbar } from "notistack";
-import { useCallback, useEffect, useState } from "react";
-import { api } from "../../utils/api";
-import { exportExcel } from "../../utils/exportExcel";
+import { useCallback, useEffect, useState, useMemo } from "react";
+import { useDispatch, useSelector } from "react-redux";
+import { api, descargarExportacion } from "../../utils/api";
 import CustomToolBar from "../common/CustomToolbar";
+import { sincronizarCatalogo } from "../../catalogo/catalogoThunk";
+import { seleccionarCatalogo } from "../../catalogo/catalogoSlice";
 import ConfirmDialog from "../common/ConfirmDialog";
 import { Box, CircularProgress, Typography, IconButton, Tooltip } from "@mui/material";
 import { DataGrid } from "@mui/x-data-grid";
@@ -34,15 +36,15 @@ const MateriasPrimasGrid = ({ nombre, exportNombre, estado }) => {
     const [pedidoToDelete, setPedidoToDelete] = useState(null);
     const [deletingId, setDeletingId] = useState(null);
     const [confirmOpenDelete, setConfirmOpenDelete] = useState(false);
-    const [productos, setProductos] = useState([]);
+    const dispatch = useDispatch();
+    const productosPorId = useSelector(seleccionarCatalogo("productos"));
+    const productos = useMemo(() => Object.values(productosPorId), [productosPorId]);
     const { enqueueSnackbar } = useSnackbar();
 
     const fetchMateriasPrimas = useCallback(async () => {
         try {
-            const res = await api.get("/pedido_materias_primas/");
-            const filtradas = res.data
-                .filter((n) => n.estado === estado)
-                .map(formatearPrima);
+            const res = await api.get("/pedido_materias_primas/", { params: { estado } });
+            const filtradas = res.data.map(formatearPrima);
             setMateriasPrimas(filtradas);
         } catch (error) {
             console.error("Error al obtener las materias primas:", error);
@@ -58,25 +60,21 @@ const MateriasPrimasGrid = ({ nombre, exportNombre, estado }) => {
         fetchMateriasPrimas();
     }, [fetchMateriasPrimas]);
 
-    // Cargar productos
+    // Copia local del catálogo de productos: tras la primera carga solo trae los cambios
     useEffect(() => {
-        const fetchProductos = async () => {
-            try {
-                const res = await api.get("/productos/");
-                setProductos(res.data);
+        dispatch(sincronizarCatalogo({ recurso: "productos", campoId: "id_producto" }))
+            .unwrap()
+            .catch(() => enqueueSnackbar("Error al cargar productos", { variant: "error" }));
+    }, [dispatch, enqueueSnackbar]);
 
-            } catch (error) {
-                console.error("Error al cargar productos:", error);
-                enqueueSnackbar("Error al cargar productos", { variant: "error" });
-            }
-        };
-        fetchProductos();
-    }, [enqueueSnackbar]);
 
-
-    const onExport = () => {
-        const columnsToExport = columns.filter((c) => !c.disableExport);
-        exportExcel(columnsToExport, materiasPrimas, exportNombre);
+    const onExport = async () => {
+        try {
+            await descargarExportacion("/pedido_materias_primas/exportar/", { estado }, exportNombre);
+        } catch (error) {
+            console.error("Error al exportar las materias primas:", error);
+            enqueueSnackbar("Error al exportar las materias primas", { variant: "error" });
+        }
     };
 
     const handleOpenConfirm = (pedido) => {
@@ -1,12 +1,12 @@
-import { useEffect, useState, useCallback } from 'react';
+import { useEffect, useMemo, useState } from 'react';
 import { DataGrid } from '@mui/x-data-grid';
-import { Box, CircularProgress, Typography, IconButton, Tooltip } from '@mui/material';
+import { Box, Typography, IconButton, Tooltip } from '@mui/material';
 import DeleteIcon from '@mui/icons-material/Delete';
 import { useSnackbar } from 'notistack';
-import { api } from '../../utils/api';
+import { api, descargarExportacion } from '../../utils/api';
+import usePaginacionServidor from '../../hooks/usePaginacionServidor';
 
 import dataGridEs from '../../utils/dataGridEs';
-import { exportExcel } from '../../utils/exportExcel';
 import EditNotaModal from '../modals/EditNotaModal';
 
 import { format, parseISO } from 'date-fns';
@@ -39,8 +39,6 @@ const formatearNota = (nota) => ({
 
 
 const NotasDataGrid = ({ estado, nombre, exportNombre, userGroups }) => {
-  const [notas, setNotas] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [modalOpen, setModalOpen] = useState(false);
   const [notaSeleccionada, setNotaSeleccionada] = useState(null);
   const [deletingId, setDeletingId] = useState(null);
@@ -50,34 +48,26 @@ const NotasDataGrid = ({ estado, nombre, exportNombre, userGroups }) => {
   const esVentas = userGroups?.includes('Ventas');
 
 
-  const fetchNotas = useCallback(async () => {
-    try {
-      const res = await api.get('/nota/');
-      const filtradas = res.data
-        .filter(n => n.estado_solicitud === estado)
-        .map(formatearNota);
-      setNotas(filtradas);
-    } catch (error) {
+  // Una página a la vez desde el servidor, ordenada por fecha de despacho o número
+  const { filas, setFilas, error, recargar, gridProps, columnasOrdenables } = usePaginacionServidor(
+    '/nota/',
+    { estado_solicitud: estado },
+    { ordenables: ['fecha_despacho', 'num_nota'], ordenInicial: [{ field: 'fecha_despacho', sort: 'asc' }] },
+  );
+  const notas = useMemo(() => filas.map(formatearNota), [filas]);
+
+  useEffect(() => {
+    if (error) {
       console.error('Error al obtener las notas:', error);
       enqueueSnackbar('Error al cargar las notas', { variant: 'error' });
-    } finally {
-      setLoading(false);
     }
-  }, [estado, enqueueSnackbar]);
-
-  useEffect(() => {
-    fetchNotas();
-  }, [fetchNotas]);
+  }, [error, enqueueSnackbar]);
 
 
 
   const handleGuardar = async () => {
-    try {
-      await fetchNotas();
-      enqueueSnackbar('Nota guardada correctamente', { variant: 'success' });
-    } catch {
-      enqueueSnackbar('Error al cargar notas después de guardar', { variant: 'error' });
-    }
+    recargar();
+    enqueueSnackbar('Nota guardada correctamente', { variant: 'success' });
   };
 
   const handleRowClick = (params) => {
@@ -114,7 +104,7 @@ const NotasDataGrid = ({ estado, nombre, exportNombre, userGroups }) => {
     try {
       setDeletingId(id);
       await api.delete(`/nota/${id}/`);
-      setNotas(prev => prev.filter(n => n.id_nota !== id));
+      setFilas(prev => prev.filter(n => n.id_nota !== id));
       enqueueSnackbar('Nota borrada correctamente', { variant: 'success' });
     } catch (error) {
       console.error('Error al borrar la nota:', error);
@@ -184,21 +174,17 @@ const NotasDataGrid = ({ estado, nombre, exportNombre, userGroups }) => {
     ),
   };
 
-  const columns = esVentas ? baseColumns : [...baseColumns, deleteColumn];
+  const columns = columnasOrdenables(esVentas ? baseColumns : [...baseColumns, deleteColumn]);
 
-  const onExport = () => {
-    const columnsToExport = columns.filter(column => !column.disableExport);
-    exportExcel(columnsToExport, notas, exportNombre);
+  const onExport = async () => {
+    try {
+      await descargarExportacion('/nota/exportar/', { estado_solicitud: estado }, exportNombre);
+    } catch (error) {
+      console.error('Error al exportar las notas:', error);
+      enqueueSnackbar('Error al exportar las notas', { variant: 'error' });
+    }
   };
 
-  if (loading) {
-    return (
-      <Box display="flex" justifyContent="center" mt={30}>
-        <CircularProgress />
-      </Box>
-    );
-  }
-
   return (
     <Box sx={{ height: '80vh', width: '83.5vw', marginLeft: 2 }}>
       <Typography variant="h5" gutterBottom>{nombre}</Typography>
@@ -206,9 +192,8 @@ const NotasDataGrid = ({ estado, nombre, exportNombre, userGroups }) => {
         rows={notas}
         columns={columns}
         getRowId={(row) => row.id_nota}
-        pageSize={10}
+        {...gridProps}
         density="compact"
-        rowsPerPageOptions={[10, 25, 50]}
         onRowDoubleClick={handleRowClick}
         slots={{ toolbar: CustomToolBar }}
         slotProps={{ toolbar: { onExport } }}
@@ -219,7 +204,6 @@ const NotasDataGrid = ({ estado, nombre, exportNombre, userGroups }) => {
           fontSize: 13,
         }}
         initialState={{
-          sorting: { sortModel: [{ field: 'fecha_despacho', sort: 'asc' }] },
           columns: {
             columnVisibilityModel: {
               rut_cliente: false,
@@ -1,12 +1,15 @@
-import { useCallback, useEffect, useState } from "react"
-import { api } from "../../utils/api";
+import { useEffect, useState, useMemo } from "react";
+import { useDispatch, useSelector } from "react-redux";
+import { api, descargarExportacion } from "../../utils/api";
+import usePaginacionServidor from "../../hooks/usePaginacionServidor";
 import { format, parseISO } from "date-fns";
 import { useSnackbar } from "notistack";
-import { exportExcel } from "../../utils/exportExcel";
 import { DataGrid } from "@mui/x-data-grid";
-import { Box, CircularProgress, Typography, IconButton, Tooltip, Select, MenuItem, FormControl } from "@mui/material";
+import { Box, Typography, IconButton, Tooltip, Select, MenuItem, FormControl } from "@mui/material";
 import DeleteIcon from '@mui/icons-material/Delete';
 import CustomToolBar from "../common/CustomToolbar";
+import { sincronizarCatalogo } from "../../catalogo/catalogoThunk";
+import { seleccionarCatalogo } from "../../catalogo/catalogoSlice";
 import ConfirmDialog from "../common/ConfirmDialog";
 import dataGridEs from "../../utils/dataGridEs";
 import PickingModal from "../modals/PickingModal";
@@ -15,14 +18,14 @@ import PickingModal from "../modals/PickingModal";
 const formatearPicking = (picking) => ({
     ...picking,
     fecha_creacion: picking.fecha_creacion ? format(parseISO(picking.fecha_creacion), 'dd/MM/yyyy') : '',
-    razon_social_cliente: picking.nota?.cliente?.razon_social || '',
-    producto_nombre: picking.producto?.nombre || '',
-    nota: picking.nota?.num_nota || null,
-    fecha_despacho: picking.nota?.fecha_despacho ? format(parseISO(picking.nota.fecha_despacho), 'dd/MM/yyyy') : '',
+    razon_social_cliente: picking.razon_social_cliente || '',
+    producto_nombre: picking.producto_nombre || '',
+    nota: picking.num_nota || null,
+    fecha_despacho: picking.fecha_despacho ? format(parseISO(picking.fecha_despacho), 'dd/MM/yyyy') : '',
     fecha_modificacion: picking.fecha_modificacion ? format(parseISO(picking.fecha_modificacion), 'dd/MM/yyyy') : '',
-    estado_solicitud: picking.nota?.estado_solicitud || '',
-    id_nota: picking.nota?.id_nota || null,
-    fecha_creacion_time: picking.fecha_creacion || ''
+    estado_solicitud: picking.estado_solicitud || '',
+    id_nota: picking.id_nota || null,
+    fecha_creacion_time: picking.fecha_creacion
         ? format(parseISO(picking.fecha_creacion), 'HH:mm')
         : '',
 });
@@ -30,8 +33,6 @@ const formatearPicking = (picking) => ({
 
 const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
 
-    const [pickingData, setPickingData] = useState([]);
-    const [loading, setLoading] = useState(true);
     const { enqueueSnackbar } = useSnackbar();
     const [confirmOpen, setConfirmOpen] = useState(false);
     const [pedidoToDelete, setPedidoToDelete] = useState(null);
@@ -39,42 +40,34 @@ const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
     const [pedidoSeleccionado, setPedidoSeleccionado] = useState(null);
     const [productoSeleccionado, setProductoSeleccionado] = useState(null);
     const [modalOpen, setModalOpen] = useState(false);
-    const [productos, setProductos] = useState([]);
+    const dispatch = useDispatch();
+    const productosPorId = useSelector(seleccionarCatalogo("productos"));
+    const productos = useMemo(() => Object.values(productosPorId), [productosPorId]);
     const esVentas = userGroup.includes('Ventas');
 
 
 
-    const fetchPickingData = useCallback(async () => {
-        try {
-            const res = await api.get('/notas_productos/');
-            const resFiltradas = res.data
-                .filter((p) => estado.includes(p.estado))
-                .map(formatearPicking);
-            setPickingData(resFiltradas);
-        } catch (error) {
+    // Una página a la vez desde el servidor, en la vista compacta
+    const { filas, setFilas, error, recargar, gridProps, columnasOrdenables } = usePaginacionServidor(
+        '/notas_productos/',
+        { view: 'compact', estado: estado.join(',') },
+        { ordenables: ['fecha_creacion'] },
+    );
+    const pickingData = useMemo(() => filas.map(formatearPicking), [filas]);
+
+    useEffect(() => {
+        if (error) {
             console.error('Error al obtener los datos de picking:', error);
             enqueueSnackbar('Error al cargar los datos de picking', { variant: 'error' });
-        } finally {
-            setLoading(false);
         }
-    }, [estado, enqueueSnackbar]);
-
-    useEffect(() => {
-        const fetchProductos = async () => {
-            try {
-                const res = await api.get("/productos/");
-                setProductos(res.data);
-            } catch (error) {
-                console.error("Error al cargar productos:", error);
-                enqueueSnackbar("Error al cargar productos", { variant: "error" });
-            }
-        };
-        fetchProductos();
-    }, [enqueueSnackbar]);
+    }, [error, enqueueSnackbar]);
 
+    // Copia local del catálogo de productos: tras la primera carga solo trae los cambios
     useEffect(() => {
-        fetchPickingData();
-    }, [fetchPickingData]);
+        dispatch(sincronizarCatalogo({ recurso: "productos", campoId: "id_producto" }))
+            .unwrap()
+            .catch(() => enqueueSnackbar("Error al cargar productos", { variant: "error" }));
+    }, [dispatch, enqueueSnackbar]);
 
     const handleOpenModal = (pedido) => {
 
@@ -105,7 +98,7 @@ const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
         try {
             setDeletingId(id);
             await api.delete(`/notas_productos/${id}/`);
-            setPickingData(prev => prev.filter(n => n.id !== id));
+            setFilas(prev => prev.filter(n => n.id !== id));
             enqueueSnackbar('Pedido borrado correctamente', { variant: 'success' });
         } catch (error) {
             console.error('Error al borrar el pedido:', error);
@@ -173,7 +166,7 @@ const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
                                     await api.patch(`/notas_productos/${params.row.id}/`, {
                                         estado: newVal,
                                     });
-                                    setPickingData((prev) =>
+                                    setFilas((prev) =>
                                         prev.map((r) =>
                                             r.id === params.row.id ? { ...r, estado: newVal } : r
                                         )
@@ -248,23 +241,18 @@ const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
     };
 
 
-    const columns = esVentas ? baseColumns : [...baseColumns, deleteColumn];
+    const columns = columnasOrdenables(esVentas ? baseColumns : [...baseColumns, deleteColumn]);
 
-    const onExport = () => {
-        const columnsToExport = columns.filter(column => !column.disableExport);
-        exportExcel(columnsToExport, pickingData, exportNombre);
+    const onExport = async () => {
+        try {
+            await descargarExportacion('/notas_productos/exportar/', { estado: estado.join(',') }, exportNombre);
+        } catch (error) {
+            console.error('Error al exportar el picking:', error);
+            enqueueSnackbar('Error al exportar el picking', { variant: 'error' });
+        }
     };
 
 
-    if (loading) {
-        return (
-            <Box display="flex" justifyContent="center" mt={30}>
-                <CircularProgress />
-            </Box>
-        );
-    }
-
-
     return (
         <Box sx={{ height: '80vh', width: '83.5vw', marginLeft: 2 }}>
             <Typography variant="h5" gutterBottom>{nombre}</Typography>
@@ -272,9 +260,8 @@ const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
                 rows={pickingData}
                 columns={columns}
                 getRowId={(row) => row.id}
-                pageSize={10}
+                {...gridProps}
                 density="compact"
-                rowsPerPageOptions={[10, 25, 50]}
                 onRowDoubleClick={(params) => handleOpenModal(params.row)}
                 slots={{ toolbar: CustomToolBar }}
                 slotProps={{ toolbar: { onExport } }}
@@ -285,9 +272,6 @@ const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
                     fontSize: 13,
                     userSelect: 'none',
                 }}
-                initialState={{
-                    sorting: { sortModel: [{ field: 'fecha_despacho', sort: 'asc' }] }
-                }}
                 columnVisibilityModel={{
 
                     usuario_creador: false,
@@ -307,7 +291,7 @@ const PickingGrid = ({ estado, nombre, exportNombre, userGroup }) => {
                     open={modalOpen}
                     onClose={() => setModalOpen(false)}
                     pedido={pedidoSeleccionado}
-                    onUpdated={fetchPickingData}
+                    onUpdated={recargar}
                     productoSeleccionado={productoSeleccionado}
                 />
             )}
@@ -202,14 +202,14 @@ const MPrimasForm = () => {
                   name="razon_social"
                   control={form.control}
                   label="Razón Social"
-                  endpoint="/pedido_materias_primas/buscar-proveedores"
+                  entidad="proveedor"
                   getOptionLabel={(option) =>
-                    typeof option === "string" ? option : option.razon_social
+                    typeof option === "string" ? option : option.label
                   }
                   onSelect={(value) => {
                     if (value) {
                       form.setValue("rut_proveedor", value.rut_proveedor);
-                      form.setValue("id_proveedor", value.id_proveedor);
+                      form.setValue("id_proveedor", value.id);
                     } else {
                       form.setValue("rut_proveedor", "");
                       form.setValue("id_proveedor", "");
@@ -221,15 +221,15 @@ const MPrimasForm = () => {
                   name="producto"
                   control={form.control}
                   label="Producto"
-                  endpoint="/pedido_materias_primas/buscar-productos"
+                  entidad="producto"
                   getOptionLabel={(option) =>
-                    typeof option === "string" ? option : option.nombre
+                    typeof option === "string" ? option : option.label
                   }
                   onSelect={(value) => {
                     if (value) {
                       form.setValue("codigo", value.codigo);
                       form.setValue("unidad_medida", value.unidad_medida);
-                      form.setValue("id_producto", value.id_producto);
+                      form.setValue("id_producto", value.id);
                     } else {
                       form.setValue("codigo", "");
                       form.setValue("unidad_medida", "");
@@ -324,15 +324,15 @@ export const PickingForm = () => {
                                     name="producto"
                                     control={control}
                                     label="Producto"
-                                    endpoint="/pedido_materias_primas/buscar-productos"
+                                    entidad="producto"
                                     autoComplete='off'
                                     autoCorrect="off"
                                     getOptionLabel={(option) =>
-                                        typeof option === 'string' ? option : option.nombre
+                                        typeof option === 'string' ? option : option.label
                                     }
                                     onSelect={(value) => {
                                         if (value) {
-                                            setValue('producto_id', value.id_producto);
+                                            setValue('producto_id', value.id);
                                         } else {
                                             setValue('producto_id', null);
                                         }
@@ -171,14 +171,14 @@ const MateriasPrimasModal = ({ open, onClose, pedido, onUpdated }) => {
                             name="nombre_proveedor"
                             control={control}
                             label="Razón Social"
-                            endpoint="/pedido_materias_primas/buscar-proveedores"
+                            entidad="proveedor"
                             getOptionLabel={(option) =>
-                                typeof option === "string" ? option : option.razon_social
+                                typeof option === "string" ? option : option.label
                             }
                             onSelect={(value) => {
                                 if (value) {
                                     setValue("rut_proveedor", value.rut_proveedor);
-                                    setValue("id_proveedor", value.id_proveedor);
+                                    setValue("id_proveedor", value.id);
                                 } else {
                                     setValue("rut_proveedor", "");
                                     setValue("id_proveedor", "");
@@ -192,15 +192,15 @@ const MateriasPrimasModal = ({ open, onClose, pedido, onUpdated }) => {
                             name="producto"
                             control={control}
                             label="Producto"
-                            endpoint="/pedido_materias_primas/buscar-productos"
+                            entidad="producto"
                             getOptionLabel={(option) =>
-                                typeof option === "string" ? option : option.nombre
+                                typeof option === "string" ? option : option.label
                             }
                             onSelect={(value) => {
                                 if (value) {
                                     setValue("codigo", value.codigo);
                                     setValue("unidad_medida", value.unidad_medida);
-                                    setValue("id_producto", value.id_producto);
+                                    setValue("id_producto", value.id);
                                 } else {
                                     setValue("codigo", "");
                                     setValue("unidad_medida", "");
@@ -61,8 +61,8 @@ const PDFMetadataModal = ({
     };
 
     const handleEmpresaSelect = (selectedValue) => {
-        if (selectedValue && selectedValue.razon_social) {
-            setValue('empresa', selectedValue.razon_social);
+        if (selectedValue && selectedValue.label) {
+            setValue('empresa', selectedValue.label);
         }
     };
 
@@ -109,10 +109,10 @@ const PDFMetadataModal = ({
                             name="empresa"
                             control={control}
                             label="Empresa / Proveedor"
-                            endpoint="/pedido_materias_primas/buscar-proveedores"
+                            entidad="proveedor"
                             getOptionLabel={(option) => {
                                 if (typeof option === 'string') return option;
-                                return option.razon_social || option.nombre || '';
+                                return option.label || '';
                             }}
                             onSelect={handleEmpresaSelect}
                         />
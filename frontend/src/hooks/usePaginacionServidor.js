@@ -0,0 +1,81 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+import { api } from "../utils/api";
+
+const TAMANOS_PAGINA = [25, 50, 100];
+
+// Paginación en el servidor para un DataGrid sobre un listado con cursor.
+// Pide una página a la vez y guarda el cursor de cada página visitada para
+// poder volver atrás. Si cambian los parámetros, el tamaño o el orden vuelve
+// a la primera página. `ordenables` son las columnas que el servidor sabe
+// ordenar (los nombres de ?ordering=); las demás no se pueden ordenar.
+const usePaginacionServidor = (url, params, { ordenables = [], ordenInicial = [] } = {}) => {
+  const [paginationModel, setPaginationModel] = useState({ page: 0, pageSize: TAMANOS_PAGINA[0] });
+  const [sortModel, setSortModel] = useState(ordenInicial);
+  const [filas, setFilas] = useState([]);
+  const [hasNextPage, setHasNextPage] = useState(false);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
+  const [version, setVersion] = useState(0);
+
+  const orden = sortModel[0];
+  const ordering = orden && ordenables.includes(orden.field)
+    ? `${orden.sort === 'desc' ? '-' : ''}${orden.field}`
+    : undefined;
+  const clave = JSON.stringify({ ...params, ordering, page_size: paginationModel.pageSize });
+
+  // cursores[i] es la URL de la página i; la primera se pide con los parámetros
+  const cursores = useRef([null]);
+  const claveActual = useRef(clave);
+
+  useEffect(() => {
+    if (claveActual.current !== clave) {
+      claveActual.current = clave;
+      cursores.current = [null];
+      if (paginationModel.page !== 0) {
+        setPaginationModel((modelo) => ({ ...modelo, page: 0 }));
+        return;
+      }
+    }
+
+    let vigente = true;
+    const cursor = cursores.current[paginationModel.page];
+    setLoading(true);
+    (cursor ? api.get(cursor) : api.get(url, { params: JSON.parse(clave) }))
+      .then(({ data }) => {
+        if (!vigente) return;
+        cursores.current[paginationModel.page + 1] = data.next;
+        setFilas(data.results);
+        setHasNextPage(Boolean(data.next));
+        setError(null);
+      })
+      .catch((error) => vigente && setError(error))
+      .finally(() => vigente && setLoading(false));
+
+    return () => {
+      vigente = false;
+    };
+  }, [url, clave, paginationModel.page, version]);
+
+  // Vuelve a pedir la página actual (después de guardar o borrar)
+  const recargar = useCallback(() => setVersion((v) => v + 1), []);
+
+  const gridProps = {
+    paginationMode: 'server',
+    sortingMode: 'server',
+    rowCount: -1,
+    paginationMeta: { hasNextPage },
+    paginationModel,
+    onPaginationModelChange: setPaginationModel,
+    pageSizeOptions: TAMANOS_PAGINA,
+    sortModel,
+    onSortModelChange: setSortModel,
+    loading,
+  };
+
+  const columnasOrdenables = (columnas) =>
+    columnas.map((columna) => ({ ...columna, sortable: ordenables.includes(columna.field) }));
+
+  return { filas, setFilas, loading, error, recargar, gridProps, columnasOrdenables };
+};
+
+export default usePaginacionServidor;
@@ -1,6 +1,7 @@
 import { useEffect } from 'react';
 import { useDispatch } from 'react-redux';
 import { clearStore } from '../auth/authSlice';
+import { limpiarCatalogos } from '../catalogo/catalogoSlice';
 import { LoginForm } from '../components/forms/LoginForm';
 import { Grid, Box} from '@mui/material';
 import jj_baner from '../assets/imagenes/jj_baner.jpg'
@@ -10,6 +11,7 @@ const LoginPage = () => {
 
   useEffect(() => {
     dispatch(clearStore());
+    dispatch(limpiarCatalogos());
   }, [dispatch]);
 
   return (
@@ -1,9 +1,11 @@
 import { configureStore } from '@reduxjs/toolkit';
 import authReducer from './auth/authSlice';
+import catalogoReducer from './catalogo/catalogoSlice';
 
 const store = configureStore({
   reducer: {
     auth: authReducer,
+    catalogo: catalogoReducer,
   },
   middleware: (getDefaultMiddleware) =>
     getDefaultMiddleware({
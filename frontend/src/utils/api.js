@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { saveAs } from 'file-saver';
 
 export const api = axios.create({
   baseURL: import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1/',
@@ -53,3 +54,37 @@ api.interceptors.response.use(
     return Promise.reject(error);
   }
 );
+
+// Descarga el Excel que arma el servidor con los mismos filtros del listado
+export const descargarExportacion = async (url, params = {}, nombre = 'datos') => {
+  const { data } = await api.get(url, { params: { formato: 'xlsx', ...params }, responseType: 'blob' });
+  saveAs(data, `${nombre}.xlsx`);
+};
+
+// Pide al backend la URL firmada de una factura (mode: 'view' | 'download')
+export const fetchUrlFactura = async (idFactura, mode = 'view') => {
+  const { data } = await api.get(`/facturas/${idFactura}/url/`, { params: { mode } });
+  return data.url;
+};
+
+// Sube el PDF directo al bucket con una URL firmada y luego registra la factura
+export const subirFactura = async (file, metadata) => {
+  const { data: subida } = await api.post('/facturas/solicitar-subida/', {
+    file_name: file.name,
+    content_type: 'application/pdf',
+    file_size: file.size,
+  });
+
+  // fetch sin credenciales: la URL firmada ya autoriza el PUT
+  const respuesta = await fetch(subida.upload_url, {
+    method: subida.method,
+    headers: subida.headers,
+    body: file,
+  });
+  if (!respuesta.ok) {
+    throw new Error(`Error subiendo al bucket: ${respuesta.status}`);
+  }
+
+  const { data } = await api.post('/facturas/confirmar-subida/', { key: subida.key, ...metadata });
+  return data;
+};